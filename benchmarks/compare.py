@@ -0,0 +1,82 @@
+"""
+Сравнение двух результатов `benchmarks.run`.
+
+Печатает по каждой паре (сценарий, стадия, бэкенд) изменение лучшего
+времени и пиковой памяти. Код возврата 1, если хоть одна стадия стала
+медленнее или прожорливее больше чем на `--threshold`.
+
+Пример:
+    python -m benchmarks.compare before.json after.json --threshold 0.15
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+Key = Tuple[str, str, str]
+
+# Ниже этих значений колебания — шум, а не регрессия
+_MIN_SECONDS = 0.001
+_MIN_MB = 0.5
+
+
+def _load(path: Path) -> Dict[Key, Dict[str, Any]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return {
+        (row["scenario"], row["stage"], row.get("backend") or ""): row
+        for row in payload["results"]
+    }
+
+
+def _ratio(old: float, new: float, floor: float) -> float:
+    if max(old, new) < floor:
+        return 0.0
+    return (new - old) / max(old, floor)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнивает результаты двух прогонов бенчмарка")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="допустимый прирост (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    baseline = _load(args.baseline)
+    candidate = _load(args.candidate)
+
+    regressions = 0
+    print(f"{'сценарий':<28} {'стадия':<34} {'время, мс':>22} {'память, MB':>22}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        time_delta = _ratio(old["best_seconds"], new["best_seconds"], _MIN_SECONDS)
+        mem_delta = _ratio(old["peak_mb"], new["peak_mb"], _MIN_MB)
+        regressed = time_delta > args.threshold or mem_delta > args.threshold
+        regressions += regressed
+
+        scenario, stage, backend = key
+        label = f"{stage}[{backend}]" if backend else stage
+        print(
+            f"{scenario:<28} {label:<34} "
+            f"{old['best_seconds'] * 1000:8.2f} → {new['best_seconds'] * 1000:8.2f} ({time_delta:+6.1%}) "
+            f"{old['peak_mb']:7.2f} → {new['peak_mb']:7.2f} ({mem_delta:+6.1%})"
+            f"{'  ⚠️' if regressed else ''}"
+        )
+
+    for title, keys in (
+        ("Только в базовом прогоне", baseline.keys() - candidate.keys()),
+        ("Только в новом прогоне", candidate.keys() - baseline.keys()),
+    ):
+        if keys:
+            print(f"{title}: {', '.join('/'.join(filter(None, key)) for key in sorted(keys))}")
+
+    if regressions:
+        print(f"Регрессий больше {args.threshold:.0%}: {regressions}")
+        sys.exit(1)
+    print("Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
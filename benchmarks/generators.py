@@ -0,0 +1,93 @@
+"""
+Синтетические листы "Доступы" и "Чаты" для бенчмарков.
+
+Листы генерируются в том же виде, в каком их отдаёт Sheets API
+(`values.batchGet`): списки строк из строк, хвостовые пустые ячейки
+обрезаны. Все генераторы детерминированы при одинаковом `seed`.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import List
+
+Sheet = List[List[str]]
+
+FIXED_COLUMNS = ["tg_id", "username", "fio"]
+_FIRST_TG_ID = 100_000_000
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    """Размер и форма синтетической таблицы."""
+    users: int
+    chats: int
+    density: float = 0.05      # доля "+" среди ячеек чатов
+    change_rate: float = 0.01  # доля строк, изменённых между версиями
+
+    @property
+    def name(self) -> str:
+        return f"{self.users}u-{self.chats}c-d{self.density:g}-r{self.change_rate:g}"
+
+
+def chat_name(index: int) -> str:
+    return f"Чат {index:04d}"
+
+
+def chat_id(index: int) -> str:
+    return str(-1_001_000_000_000 - index)
+
+
+def generate_mapping(chats: int) -> Sheet:
+    """Лист "Чаты": заголовок и по строке на чат."""
+    return [["chat_name", "chat_id"]] + [[chat_name(i), chat_id(i)] for i in range(chats)]
+
+
+def generate_access(scenario: Scenario, seed: int = 0) -> Sheet:
+    """Лист "Доступы": у каждого пользователя примерно `density` отмеченных чатов."""
+    rng = random.Random(seed)
+    headers = FIXED_COLUMNS + [chat_name(i) for i in range(scenario.chats)]
+    rows: Sheet = [headers]
+    for number in range(scenario.users):
+        rows.append(_user_row(rng, _FIRST_TG_ID + number, scenario.chats, scenario.density))
+    return rows
+
+
+def mutate_access(access: Sheet, scenario: Scenario, seed: int = 1) -> Sheet:
+    """
+    Следующая версия листа: `change_rate` строк изменена.
+
+    Изменения поровну делятся между перевыдачей чатов, удалением строки
+    и добавлением нового пользователя в конец листа.
+    """
+    rng = random.Random(seed)
+    rows = [list(row) for row in access]
+    body = len(rows) - 1
+    changes = int(body * scenario.change_rate)
+    if not changes:
+        return rows
+
+    targets = rng.sample(range(1, len(rows)), min(changes, body))
+    removed = set()
+    next_tg_id = _FIRST_TG_ID + scenario.users
+    for position, row_index in enumerate(targets):
+        kind = position % 3
+        if kind == 0:
+            tg_id = int(rows[row_index][0])
+            rows[row_index] = _user_row(rng, tg_id, scenario.chats, scenario.density)
+        elif kind == 1:
+            removed.add(row_index)
+        else:
+            rows.append(_user_row(rng, next_tg_id, scenario.chats, scenario.density))
+            next_tg_id += 1
+
+    return [row for index, row in enumerate(rows) if index not in removed]
+
+
+def _user_row(rng: random.Random, tg_id: int, chats: int, density: float) -> List[str]:
+    row = [str(tg_id), f"user{tg_id}", f"Пользователь {tg_id}"]
+    cells = ["+" if rng.random() < density else "" for _ in range(chats)]
+    # Sheets API не возвращает хвостовые пустые ячейки
+    while cells and not cells[-1]:
+        cells.pop()
+    return row + cells
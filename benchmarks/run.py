@@ -0,0 +1,255 @@
+"""
+Бенчмарк конвейера синхронизации и проверки доступа на синтетических таблицах.
+
+Для каждого сценария (пользователи × колонки чатов × плотность × доля
+изменений) измеряются стадии: валидация, разбор строк, нормализация,
+инкрементальная загрузка, операции кэша, detect_changes (и его вариант
+на NumPy, если numpy установлен) и chat_is_managed.
+По каждой стадии — лучшее и медианное время из `--repeat` прогонов и
+пиковая память отдельного прогона под tracemalloc. Результат пишется
+в JSON и сравнивается с другой версией через `benchmarks.compare`.
+
+Пример:
+    python -m benchmarks.run --users 1000,10000 --chats 50,500 --output before.json
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import importlib.util
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import suppress
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from benchmarks.generators import Scenario, generate_access, generate_mapping, mutate_access
+from src.services import gsheets
+from src.services.notifier import detect_changes
+from src.services.user_data import normalize_user_record
+from src.storage.bitset_cache import BitsetCacheRepository
+from src.storage.cache import CacheRepository
+from src.storage.sqlite_cache import SqliteCacheRepository
+from src.utils.logger import logger
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+BACKENDS = ("memory", "bitset", "sqlite")
+LOOKUPS = 100_000
+
+
+class _StaticPlanner:
+    """Отдаёт заранее сгенерированные листы вместо запроса к Sheets API."""
+
+    def __init__(self, access: List[List[str]], chat_name_to_id: Dict[str, str]) -> None:
+        self.access = access
+        self.chat_name_to_id = chat_name_to_id
+
+    def fetch(self) -> tuple[list[list[str]], dict[str, str]]:
+        return self.access, self.chat_name_to_id
+
+
+def _create_cache(backend: str, directory: Path) -> CacheRepository:
+    snapshot = directory / f"cache-{backend}.json"
+    if backend == "bitset":
+        return BitsetCacheRepository(snapshot)
+    if backend == "sqlite":
+        return SqliteCacheRepository(snapshot, directory / "cache.sqlite3")
+    return CacheRepository(snapshot)
+
+
+def _measure(stage: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        stage()
+        timings.append(time.perf_counter() - started)
+
+    # Память меряется отдельным прогоном: tracemalloc заметно замедляет код
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return {
+        "best_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "peak_mb": max(0, peak - baseline) / 1024 / 1024,
+    }
+
+
+def run_scenario(
+    scenario: Scenario,
+    *,
+    repeat: int,
+    backends: Sequence[str],
+    workdir: Path,
+) -> List[Dict[str, Any]]:
+    mapping = generate_mapping(scenario.chats)
+    access = generate_access(scenario)
+    updated = mutate_access(access, scenario)
+    chat_name_to_id = gsheets.validate_mapping(mapping)
+
+    records = gsheets.parse_access(access, chat_name_to_id)
+    new_records = gsheets.parse_access(updated, chat_name_to_id)
+    chat_columns = access[0][3:]
+    raw_records = [
+        {
+            "tg_id": row[0],
+            "username": row[1],
+            "fio": row[2],
+            "chats": [chat_name_to_id[name] for name, cell in zip(chat_columns, row[3:]) if cell == "+"],
+        }
+        for row in access[1:]
+    ]
+    old_state = {str(record["tg_id"]): record for record in records}
+    new_state = {str(record["tg_id"]): record for record in new_records}
+
+    rng = random.Random(scenario.users)
+    managed = [int(chat_id) for chat_id in chat_name_to_id.values()]
+    # Половина проверок — по управляемым чатам, половина — по чужим
+    lookups = [
+        rng.choice(managed) if rng.random() < 0.5 else -rng.randrange(1, 10**9)
+        for _ in range(LOOKUPS)
+    ]
+
+    stages: List[tuple[str, str | None, Callable[[], Any]]] = [
+        ("validate_table", None, lambda: gsheets.validate_table(access, mapping)),
+        ("parse_rows", None, lambda: gsheets.parse_access(access, chat_name_to_id)),
+        ("normalize_user_record", None, lambda: [normalize_user_record(r) for r in raw_records]),
+        ("detect_changes", None, lambda: detect_changes(old_state, new_state)),
+    ]
+    if importlib.util.find_spec("numpy") is not None:
+        # Как и в боте, numpy импортируется только когда он действительно нужен
+        from src.services.access_matrix import detect_changes_vectorized
+
+        stages.append(
+            ("detect_changes_vectorized", None, lambda: detect_changes_vectorized(old_state, new_state))
+        )
+
+    # Инкрементальная загрузка новой версии листа относительно дайджестов старой
+    gsheets._planner = _StaticPlanner(access, chat_name_to_id)
+    digests = gsheets.load_table_delta({}).digests
+    gsheets._planner = _StaticPlanner(updated, chat_name_to_id)
+    stages.append(("load_table_delta", None, lambda: gsheets.load_table_delta(digests)))
+
+    for backend in backends:
+        cache = _create_cache(backend, workdir)
+        cache.replace(records)
+        stages += [
+            ("cache.replace", backend, lambda cache=cache: cache.replace(records)),
+            ("cache.snapshot", backend, cache.snapshot),
+            ("cache.save_snapshot", backend, cache.save_snapshot),
+            (
+                "chat_is_managed",
+                backend,
+                lambda cache=cache: [cache.chat_is_managed(chat_id) for chat_id in lookups],
+            ),
+        ]
+
+    results = []
+    for name, backend, stage in stages:
+        measured = _measure(stage, repeat)
+        results.append(
+            {
+                "scenario": scenario.name,
+                "users": scenario.users,
+                "chats": scenario.chats,
+                "density": scenario.density,
+                "change_rate": scenario.change_rate,
+                "stage": name,
+                "backend": backend,
+                **measured,
+            }
+        )
+        label = f"{name}[{backend}]" if backend else name
+        print(
+            f"{scenario.name:<28} {label:<34} "
+            f"{measured['best_seconds'] * 1000:10.2f} ms  {measured['peak_mb']:8.2f} MB",
+            flush=True,
+        )
+    return results
+
+
+def _git_revision() -> str | None:
+    with suppress(Exception):
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    return None
+
+
+def _ints(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def _floats(value: str) -> List[float]:
+    return [float(item) for item in value.split(",") if item]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера синхронизации таблицы")
+    parser.add_argument("--users", type=_ints, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--chats", type=_ints, default=[50, 500])
+    parser.add_argument("--density", type=_floats, default=[0.05])
+    parser.add_argument("--change-rate", type=_floats, default=[0.01])
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="файл результатов (по умолчанию benchmarks/results/)")
+    args = parser.parse_args()
+
+    backends = [backend for backend in args.backends.split(",") if backend]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"неизвестные бэкенды кэша: {', '.join(sorted(unknown))}")
+
+    # Логи валидации и разбора на каждой итерации исказили бы замеры
+    logger.disable("src")
+
+    results: List[Dict[str, Any]] = []
+    original_planner = gsheets._planner
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for users in args.users:
+            for chats in args.chats:
+                for density in args.density:
+                    for change_rate in args.change_rate:
+                        scenario = Scenario(users, chats, density, change_rate)
+                        results += run_scenario(
+                            scenario, repeat=args.repeat, backends=backends, workdir=Path(workdir)
+                        )
+    gsheets._planner = original_planner
+
+    started = datetime.now(timezone.utc)
+    output = args.output or RESULTS_DIR / f"{started:%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "meta": {
+            "created_at": started.isoformat(),
+            "revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "chat_is_managed_lookups": LOOKUPS,
+        },
+        "results": results,
+    }
+    output.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Результаты: {output}")
+
+
+if __name__ == "__main__":
+    main()
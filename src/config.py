@@ -6,3 +6,100 @@ load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 GOOGLE_SHEETS_URL = os.getenv("GOOGLE_SHEETS_URL")
 GOOGLE_CREDS_PATH = os.getenv("GOOGLE_CREDS_PATH", "service_account.json")
+
+# Адреса API для локальных прогонов с фейковыми серверами (tools/load_driver.py).
+# С GOOGLE_API_URL запросы к Google уходят без авторизации.
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+GOOGLE_API_URL = os.getenv("GOOGLE_API_URL")
+
+# Каталог состояния бота (кэш, планы исключений, ссылки); по умолчанию src/storage
+STORAGE_DIR = os.getenv("STORAGE_DIR")
+
+# Таймаут одного запроса к Google Sheets API (секунды)
+SHEETS_REQUEST_TIMEOUT = float(os.getenv("SHEETS_REQUEST_TIMEOUT", "30"))
+
+# Адаптивный опрос таблицы: быстро после изменений, медленнее в простое
+SHEETS_POLL_MIN_INTERVAL = float(os.getenv("SHEETS_POLL_MIN_INTERVAL", "2"))
+SHEETS_POLL_MAX_INTERVAL = float(os.getenv("SHEETS_POLL_MAX_INTERVAL", "30"))
+# Собственный лимит запросов на чтение в минуту (квота Google — 60 на пользователя)
+SHEETS_READ_QUOTA_PER_MINUTE = int(os.getenv("SHEETS_READ_QUOTA_PER_MINUTE", "50"))
+
+# Хранилище кэша пользователей: memory (словари), bitset (компактные битовые маски)
+# или sqlite (storage/cache.sqlite3 с индексами)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+
+# Поиск изменений доступа при синхронизации: python (множества по каждому
+# пользователю) или numpy (матрица пользователи × чаты, нужен пакет numpy)
+CHANGE_DETECTION = os.getenv("CHANGE_DETECTION", "python").strip().lower()
+
+# Время жизни кэша метаданных чатов (название, invite_link), секунды
+CHAT_METADATA_TTL = float(os.getenv("CHAT_METADATA_TTL", "600"))
+
+# Сколько чатов пользователя обрабатывать параллельно при /start
+ACCESS_RESOLVE_CONCURRENCY = int(os.getenv("ACCESS_RESOLVE_CONCURRENCY", "5"))
+
+# Общие лимиты запросов к Bot API (запросов в секунду): сообщения и остальные методы
+# (кики, getChatMember, инвайты) — раздельно; и число повторов после RetryAfter
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+TELEGRAM_API_RATE = float(os.getenv("TELEGRAM_API_RATE", "25"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
+
+# Число воркеров, доставляющих уведомления об изменениях доступа
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "4"))
+
+# Сколько исключений из чатов выполнять параллельно
+REMOVAL_CONCURRENCY = int(os.getenv("REMOVAL_CONCURRENCY", "5"))
+
+# Общий пул HTTP-соединений к Bot API и Google API
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "30"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+
+# Получение апдейтов Telegram: polling (по умолчанию) или webhook
+TELEGRAM_MODE = os.getenv("TELEGRAM_MODE", "polling").strip().lower()
+TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL")  # публичный https-адрес webhook
+TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+TELEGRAM_WEBHOOK_HOST = os.getenv("TELEGRAM_WEBHOOK_HOST", "0.0.0.0")
+TELEGRAM_WEBHOOK_PORT = int(os.getenv("TELEGRAM_WEBHOOK_PORT", "8080"))
+TELEGRAM_WEBHOOK_PATH = os.getenv("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook")
+TELEGRAM_WEBHOOK_QUEUE_SIZE = int(os.getenv("TELEGRAM_WEBHOOK_QUEUE_SIZE", "1000"))
+TELEGRAM_WEBHOOK_WORKERS = int(os.getenv("TELEGRAM_WEBHOOK_WORKERS", "8"))
+
+# Пул личных одноразовых ссылок-приглашений: сколько держать про запас на чат (0 — выключен)
+INVITE_POOL_SIZE = int(os.getenv("INVITE_POOL_SIZE", "0"))
+INVITE_POOL_REFILL_INTERVAL = float(os.getenv("INVITE_POOL_REFILL_INTERVAL", "300"))
+
+# Вступление в чаты через заявки: бот сам одобряет или отклоняет их по таблице
+JOIN_REQUESTS_ENABLED = os.getenv("JOIN_REQUESTS_ENABLED", "").strip().lower() in {"1", "true", "yes"}
+JOIN_REQUEST_BATCH_SIZE = int(os.getenv("JOIN_REQUEST_BATCH_SIZE", "50"))
+JOIN_REQUEST_CONCURRENCY = int(os.getenv("JOIN_REQUEST_CONCURRENCY", "5"))
+
+# Фоновая сверка состава чатов с таблицей (RECONCILE_PASS_INTERVAL=0 — выключена)
+RECONCILE_PASS_INTERVAL = float(os.getenv("RECONCILE_PASS_INTERVAL", "0"))
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "20"))
+RECONCILE_BATCH_PAUSE = float(os.getenv("RECONCILE_BATCH_PAUSE", "5"))
+RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", "2"))
+
+# Метрики в формате Prometheus (METRICS_PORT=0 — эндпоинт выключен)
+# Эндпоинт без авторизации: по умолчанию слушает только localhost
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+
+# Профилирование по запросу: SIGUSR1/SIGUSR2 или команда /profile от администраторов
+ADMIN_IDS = {int(item) for item in os.getenv("ADMIN_IDS", "").replace(",", " ").split()}
+PROFILE_DIR = os.getenv("PROFILE_DIR")  # по умолчанию storage/profiles
+PROFILE_CPU_SECONDS = float(os.getenv("PROFILE_CPU_SECONDS", "30"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "30"))
+
+# Push-режим: уведомления Drive files.watch будят воркер синхронизации,
+# а опрос таблицы остаётся редкой страховкой
+SHEETS_PUSH_ENABLED = os.getenv("SHEETS_PUSH_ENABLED", "").strip().lower() in {"1", "true", "yes"}
+SHEETS_PUSH_ADDRESS = os.getenv("SHEETS_PUSH_ADDRESS")  # публичный https-адрес приёмника
+SHEETS_PUSH_TOKEN = os.getenv("SHEETS_PUSH_TOKEN")
+SHEETS_PUSH_HOST = os.getenv("SHEETS_PUSH_HOST", "0.0.0.0")
+SHEETS_PUSH_PORT = int(os.getenv("SHEETS_PUSH_PORT", "8081"))
+SHEETS_PUSH_PATH = os.getenv("SHEETS_PUSH_PATH", "/drive/notifications")
+SHEETS_PUSH_FALLBACK_INTERVAL = float(os.getenv("SHEETS_PUSH_FALLBACK_INTERVAL", "300"))
@@ -0,0 +1,80 @@
+import math
+from functools import partial
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from aiogram import F, Router, types
+from aiogram.enums import ChatType
+from aiogram.filters import Command, CommandObject
+from aiogram.types import FSInputFile
+
+from src.config import ADMIN_IDS
+from src.services.container import get_container
+
+router = Router()
+
+_USAGE = (
+    "Профилирование:\n"
+    "/profile mem — снимок памяти (первый вызов включает tracemalloc)\n"
+    "/profile mem_stop — выключить tracemalloc\n"
+    "/profile cpu [сек] — сэмплирующий CPU-профиль (1–300 сек)"
+)
+
+# Границы длительности CPU-профиля по команде, секунды
+_CPU_MIN_DURATION = 1.0
+_CPU_MAX_DURATION = 300.0
+
+
+@router.message(Command("profile"), F.chat.type == ChatType.PRIVATE)
+async def profile_handler(message: types.Message, command: CommandObject) -> None:
+    """
+    Профилирование по команде администратора (только в личном чате).
+
+    Профиль снимается в фоне, чтобы не занимать обработчик апдейтов;
+    отчёт присылается файлом по готовности.
+    """
+    if message.from_user is None or message.from_user.id not in ADMIN_IDS:
+        return
+
+    profiler = get_container().profiler
+    action, _, argument = (command.args or "").strip().partition(" ")
+
+    job: Callable[[], Awaitable[Optional[Path]]]
+    if action == "mem":
+        job = profiler.memory_snapshot
+    elif action == "mem_stop":
+        profiler.memory.stop()
+        await message.answer("🧠 tracemalloc выключен")
+        return
+    elif action == "cpu":
+        try:
+            duration = float(argument) if argument else profiler.cpu_duration
+        except ValueError:
+            await message.answer(_USAGE)
+            return
+        if not math.isfinite(duration):
+            await message.answer(_USAGE)
+            return
+        duration = min(max(duration, _CPU_MIN_DURATION), _CPU_MAX_DURATION)
+        if profiler.cpu.running:
+            await message.answer("⏳ CPU-профилирование уже идёт")
+            return
+        await message.answer(f"🔥 Профилирую {duration:.0f} сек…")
+        job = partial(profiler.cpu_profile, duration)
+    else:
+        await message.answer(_USAGE)
+        return
+
+    async def run_and_reply() -> None:
+        try:
+            path = await job()
+        except RuntimeError as exc:
+            # Вторая команда успела проскочить проверку, пока первая не стартовала
+            await message.answer(f"⏳ {exc}")
+            return
+        if path is None:
+            await message.answer("🧠 tracemalloc включён. Повторите команду, чтобы получить разницу снимков.")
+            return
+        await message.answer_document(FSInputFile(path), caption=str(path))
+
+    profiler.spawn(run_and_reply)
@@ -0,0 +1,29 @@
+from aiogram import F, Router, types
+
+from src.services.container import get_container
+from src.utils.logger import logger
+
+router = Router()
+
+
+@router.my_chat_member()
+async def on_bot_membership_changed(event: types.ChatMemberUpdated) -> None:
+    """Права или статус бота в чате изменились — метаданные чата могли устареть."""
+    get_container().chat_metadata.invalidate(event.chat.id)
+    logger.info(
+        f"[chat_events] Статус бота в чате {event.chat.id}: {event.new_chat_member.status}"
+    )
+
+
+@router.message(F.new_chat_title)
+async def on_chat_title_changed(message: types.Message) -> None:
+    """Обновляет название чата в кэше без лишнего getChat."""
+    get_container().chat_metadata.update_title(message.chat.id, message.new_chat_title)
+
+
+@router.message(F.migrate_to_chat_id)
+async def on_chat_migrated(message: types.Message) -> None:
+    """Группа стала супергруппой — старый и новый chat_id нужно перечитать."""
+    chat_metadata = get_container().chat_metadata
+    chat_metadata.invalidate(message.chat.id)
+    chat_metadata.invalidate(message.migrate_to_chat_id)
@@ -3,6 +3,7 @@ from aiogram.enums import ChatMemberStatus
 
 from src.services.chat_utils import kick_user_from_chat
 from src.services.container import get_container
+from src.services.telegram_scheduler import Lane, telegram_lane
 from src.utils.logger import logger
 
 router = Router()
@@ -25,13 +26,20 @@ async def guard_chat_member(event: types.ChatMemberUpdated, bot: Bot) -> None:
     if not access_service.is_managed_chat(chat_id):
         return
 
+    if services.reconciler:
+        services.reconciler.observe(user.id)
+
+    if services.invite_pool and event.invite_link:
+        await services.invite_pool.mark_used(chat_id, user.id, event.invite_link.invite_link)
+
     if access_service.user_has_access_to_chat(user.id, chat_id):
         logger.info(
             f"[chat_guard] {user.full_name} ({user.id}) присоединился к {chat_id} — доступ подтверждён"
         )
         return
 
-    kicked = await kick_user_from_chat(bot, chat_id, user.id)
+    with telegram_lane(Lane.BACKGROUND):
+        kicked = await kick_user_from_chat(bot, chat_id, user.id)
     if kicked:
         logger.info(
             f"[chat_guard] {user.full_name} ({user.id}) исключён из {chat_id} — пользователя нет в таблице"
@@ -0,0 +1,19 @@
+from aiogram import Router, types
+
+from src.services.container import get_container
+
+router = Router()
+
+
+@router.chat_join_request()
+async def on_join_request(event: types.ChatJoinRequest) -> None:
+    """Передаёт заявку на вступление в управляемый чат на пакетный разбор."""
+    services = get_container()
+    if services.join_admission is None:
+        return
+    if not services.access.is_managed_chat(event.chat.id):
+        # Чужие чаты разбирают их администраторы
+        return
+    if services.reconciler:
+        services.reconciler.observe(event.from_user.id)
+    services.join_admission.submit(event.chat.id, event.from_user.id, event.from_user.full_name)
@@ -1,28 +1,123 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import asyncio
 import signal
 from contextlib import suppress
+from typing import TYPE_CHECKING
 
 from .bot import bot, dp
+from .config import (
+    METRICS_HOST,
+    METRICS_PATH,
+    METRICS_PORT,
+    TELEGRAM_MODE,
+    TELEGRAM_WEBHOOK_HOST,
+    TELEGRAM_WEBHOOK_PATH,
+    TELEGRAM_WEBHOOK_PORT,
+    TELEGRAM_WEBHOOK_QUEUE_SIZE,
+    TELEGRAM_WEBHOOK_SECRET,
+    TELEGRAM_WEBHOOK_URL,
+    TELEGRAM_WEBHOOK_WORKERS,
+)
+from .handlers.admin import router as admin_router
+from .handlers.chat_events import router as chat_events_router
 from .handlers.chat_member_guard import router as chat_guard_router
+from .handlers.join_requests import router as join_requests_router
 from .handlers.start import router as start_router
 from .services.bot_runner import BotLifecycleManager
-from .services.container import init_services
+from .services.container import ServiceContainer, init_services
+from .services.instrumentation import (
+    HandlerMetricsMiddleware,
+    MetricsServer,
+    TelegramMetricsMiddleware,
+    register_service_gauges,
+)
 from .utils.logger import logger
 from .utils.memory_monitor import log_memory_usage
+from .utils.startup_timer import StartupTimer
+
+if TYPE_CHECKING:
+    from .services.webhook_runner import WebhookRunner
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+
+async def _warm_up_sheets(services: ServiceContainer, timer: StartupTimer) -> None:
+    """Готовит клиент Google в фоне, пока бот уже отвечает, и печатает сводку запуска."""
+    started = time.perf_counter()
+    try:
+        await services.sheets.warm_up()
+    except Exception as exc:
+        logger.error(f"Не удалось подготовить клиент Google Sheets: {exc}")
+    timer.mark("клиент Google Sheets (в фоне)", time.perf_counter() - started)
+    timer.report()
 
 
 async def main() -> None:
+    timer = StartupTimer(started_at=_IMPORT_STARTED)
+    timer.mark("импорт модулей", _IMPORT_SECONDS)
     logger.info("🚀 Запуск бота")
     log_memory_usage("Старт")
 
-    services = init_services(bot)
-    services.cache.load_from_disk()
+    with timer.phase("инициализация сервисов"):
+        services = init_services(bot)
+    with timer.phase("загрузка кэша"):
+        services.cache.load_from_disk()
+    warm_up_task = asyncio.create_task(_warm_up_sheets(services, timer))
     dp.include_router(chat_guard_router)
+    dp.include_router(chat_events_router)
+    dp.include_router(join_requests_router)
     dp.include_router(start_router)
+    dp.include_router(admin_router)
+    HandlerMetricsMiddleware().install(dp)
 
     stop_event = asyncio.Event()
-    lifecycle = BotLifecycleManager(bot, dp)
+    # Метрики запросов — после планировщика: меряем сам запрос, а не очередь
+    request_middlewares = [services.telegram_scheduler, TelegramMetricsMiddleware()]
+    lifecycle: BotLifecycleManager | WebhookRunner
+    if TELEGRAM_MODE == "webhook":
+        # aiohttp.web нужен только в webhook-режиме — не тянем его при polling
+        from .services.webhook_runner import WebhookRunner
+
+        lifecycle = WebhookRunner(
+            bot,
+            dp,
+            host=TELEGRAM_WEBHOOK_HOST,
+            port=TELEGRAM_WEBHOOK_PORT,
+            path=TELEGRAM_WEBHOOK_PATH,
+            url=TELEGRAM_WEBHOOK_URL,
+            secret_token=TELEGRAM_WEBHOOK_SECRET,
+            queue_size=TELEGRAM_WEBHOOK_QUEUE_SIZE,
+            workers=TELEGRAM_WEBHOOK_WORKERS,
+            request_middlewares=request_middlewares,
+            transport=services.transport,
+        )
+        register_service_gauges(services, lifecycle)
+    else:
+        lifecycle = BotLifecycleManager(
+            bot,
+            dp,
+            request_middlewares=request_middlewares,
+            transport=services.transport,
+        )
+        register_service_gauges(services)
     updater_task = asyncio.create_task(services.sync_worker.run(stop_event))
+    delivery_task = asyncio.create_task(services.delivery.run(stop_event))
+    removals_task = asyncio.create_task(services.removals.run(stop_event))
+    background_tasks = [updater_task, delivery_task, removals_task]
+    if services.sheet_push:
+        background_tasks.append(asyncio.create_task(services.sheet_push.run(stop_event)))
+    if services.invite_pool:
+        background_tasks.append(asyncio.create_task(services.invite_pool.run(stop_event)))
+    if services.join_admission:
+        background_tasks.append(asyncio.create_task(services.join_admission.run(stop_event)))
+    if services.reconciler:
+        background_tasks.append(asyncio.create_task(services.reconciler.run(stop_event)))
+    if METRICS_PORT > 0:
+        metrics = MetricsServer(host=METRICS_HOST, port=METRICS_PORT, path=METRICS_PATH)
+        background_tasks.append(asyncio.create_task(metrics.run(stop_event)))
 
     loop = asyncio.get_running_loop()
 
@@ -35,6 +130,7 @@ async def main() -> None:
     for signame in (signal.SIGINT, signal.SIGTERM):
         with suppress(NotImplementedError):
             loop.add_signal_handler(signame, _shutdown)
+    services.profiler.install_signal_handlers(loop)
 
     try:
         await lifecycle.run()
@@ -42,12 +138,19 @@ async def main() -> None:
         stop_event.set()
         lifecycle.stop()
         updater_task.cancel()
+        for task in background_tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        warm_up_task.cancel()
         with suppress(asyncio.CancelledError):
-            await updater_task
+            await warm_up_task
+        services.sheets.close()
+        services.cache.close()
 
         with suppress(Exception):
             if bot.session:
                 await bot.session.close()
+        await services.transport.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Векторизованное сравнение доступов на NumPy (необязательная зависимость).
+
+Состояние таблицы — это булева матрица пользователи × чаты с выровненными
+векторами tg_id и chat_id. Добавленные и снятые доступы всех пользователей
+считаются разом: `changed = old ^ new`, `added = changed & new`,
+`removed = changed & ~new`, а события строятся только по ненулевым строкам.
+Результат совпадает с `detect_changes`, включая порядок событий.
+
+Матрица строится из уже разобранных записей кэша (словарей), а не из
+колонок листа: на вход детектора приходят записи, затронутые дельтой.
+Этот перевод в массивы — основная цена пути, поэтому он окупается только
+на больших дельтах. По `benchmarks.run` точка безубыточности — порядка
+тысяч записей (в зависимости от машины — от ~1 до ~4 тыс. записей старой
+и новой версии вместе); ниже `_MIN_VECTORIZED_RECORDS` используется
+обычный `detect_changes`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping
+
+from src.services.notifier import UserChangeEvent, detect_changes
+
+try:
+    import numpy as np
+except ImportError:  # numpy не входит в обязательные зависимости
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+# Ниже этого числа записей (старых и новых вместе) перевод записей в массивы
+# дороже, чем выигрыш от XOR: 1000 пользователей × 50 чатов (2000 записей) в
+# бенчмарке бывает медленнее pure Python — берём порог с запасом
+_MIN_VECTORIZED_RECORDS = 5000
+
+
+@dataclass(slots=True)
+class AccessMatrix:
+    """
+    Доступы набора записей в виде матрицы.
+
+    tg_ids   — int64[users] в порядке записей;
+    chat_ids — int64[chats], отсортированы по возрастанию;
+    marks    — bool[users, chats], marks[i, j] — у пользователя i есть чат j;
+    roles    — непустые роли (tg_id → роль), роли в таблице бывают редко.
+    """
+    tg_ids: Any
+    chat_ids: Any
+    marks: Any
+    roles: Dict[int, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Mapping[str, Mapping[str, Any]],
+        chat_ids: Any | None = None,
+    ) -> "AccessMatrix":
+        """
+        Строит матрицу по записям кэша/таблицы.
+
+        chat_ids задаёт колонки (отсортированный вектор); по умолчанию —
+        все чаты из записей. Некорректные tg_id/chat_id приводят к
+        ValueError/TypeError — вызывающий откатывается на detect_changes.
+        """
+        return _Columns(records).to_matrix(chat_ids)
+
+
+class _Columns:
+    """Записи, разложенные в плоские векторы: (строка, chat_id) на каждую отметку."""
+
+    __slots__ = ("tg_ids", "owners", "chats", "distinct_chats", "roles")
+
+    def __init__(self, records: Mapping[str, Mapping[str, Any]]) -> None:
+        tg_ids: List[Any] = []
+        counts: List[int] = []
+        flat_chats: List[Any] = []
+        roles: Dict[int, str] = {}
+
+        for record in records.values():
+            tg_id = int(record["tg_id"])
+            tg_ids.append(tg_id)
+            chats = record.get("chats") or ()
+            if isinstance(chats, str):
+                raise ValueError("chats задан строкой")
+            flat_chats.extend(chats)
+            counts.append(len(chats))
+            role = record.get("role")
+            if role and str(role).strip():
+                roles[tg_id] = str(role).strip()
+
+        self.tg_ids = np.array(tg_ids, dtype=np.int64)
+        if len(np.unique(self.tg_ids)) != len(self.tg_ids):
+            raise ValueError("повторяющиеся tg_id")
+        self.owners = np.repeat(np.arange(len(counts), dtype=np.intp), counts)
+        self.chats = np.array(flat_chats, dtype=np.int64)
+        # Различных чатов на порядки меньше, чем отметок: set вместо сортировки всех отметок
+        self.distinct_chats = np.unique(np.array(list(set(flat_chats)), dtype=np.int64))
+        self.roles = roles
+
+    def to_matrix(self, chat_ids: Any | None = None) -> AccessMatrix:
+        if chat_ids is None:
+            chat_ids = self.distinct_chats
+        marks = np.zeros((len(self.tg_ids), len(chat_ids)), dtype=bool)
+        if len(self.chats):
+            marks[self.owners, np.searchsorted(chat_ids, self.chats)] = True
+        return AccessMatrix(self.tg_ids, chat_ids, marks, self.roles)
+
+
+def diff_access(old: AccessMatrix, new: AccessMatrix) -> List[UserChangeEvent]:
+    """
+    События изменений доступа между двумя матрицами с общими колонками
+    (одинаковый вектор chat_ids).
+
+    Сначала пользователи из `new` (новые, с изменёнными чатами или ролью),
+    затем пропавшие из `new` пользователи, у которых были чаты.
+    """
+    chat_ids = new.chat_ids
+
+    # Выравниваем строки старой матрицы по пользователям новой
+    order = np.argsort(old.tg_ids, kind="stable")
+    sorted_old = old.tg_ids[order]
+    positions = np.searchsorted(sorted_old, new.tg_ids)
+    positions[positions == len(sorted_old)] = 0
+    if len(sorted_old):
+        matched = sorted_old[positions] == new.tg_ids
+    else:
+        matched = np.zeros(len(new.tg_ids), dtype=bool)
+
+    # changed = previous ^ new считается на месте, без лишних матриц размера users × chats
+    changed = np.zeros_like(new.marks)
+    if len(sorted_old):
+        np.take(old.marks, order[positions], axis=0, out=changed)
+        changed[~matched] = False
+    np.bitwise_xor(changed, new.marks, out=changed)
+
+    role_changed = np.zeros(len(new.tg_ids), dtype=bool)
+    if old.roles or new.roles:
+        role_changed = np.fromiter(
+            (old.roles.get(tg_id, "") != new.roles.get(tg_id, "") for tg_id in new.tg_ids.tolist()),
+            dtype=bool,
+            count=len(new.tg_ids),
+        )
+
+    rows = np.flatnonzero(changed.any(axis=1) | ~matched | role_changed)
+    # Дальше — только строки с событиями: previous = changed ^ new
+    changed = changed[rows]
+    current = new.marks[rows]
+    added = changed & current
+    removed = changed & ~current
+
+    events: List[UserChangeEvent] = []
+    added_by_row = _chats_by_row(added, chat_ids)
+    removed_by_row = _chats_by_row(removed, chat_ids)
+    for row, tg_id in enumerate(new.tg_ids[rows].tolist()):
+        old_role, new_role = old.roles.get(tg_id, ""), new.roles.get(tg_id, "")
+        events.append(
+            UserChangeEvent(
+                tg_id=tg_id,
+                changed_role=(old_role, new_role) if old_role != new_role else None,
+                new_chats=added_by_row.get(row, []),
+                removed_chats=removed_by_row.get(row, []),
+            )
+        )
+
+    # Пропавшие из таблицы теряют все свои чаты
+    gone = ~np.isin(old.tg_ids, new.tg_ids) & old.marks.any(axis=1)
+    gone_rows = np.flatnonzero(gone)
+    gone_chats = _chats_by_row(old.marks[gone_rows], chat_ids)
+    for row, tg_id in enumerate(old.tg_ids[gone_rows].tolist()):
+        events.append(UserChangeEvent(tg_id=tg_id, removed_chats=gone_chats[row]))
+
+    return events
+
+
+def _chats_by_row(marks: Any, chat_ids: Any) -> Dict[int, List[int]]:
+    """Ненулевые ячейки матрицы → {номер строки: отсортированные chat_id}."""
+    row_index, column_index = np.nonzero(marks)
+    if not len(row_index):
+        return {}
+    chats = chat_ids[column_index].tolist()
+    bounds = np.flatnonzero(np.diff(row_index)) + 1
+    starts = [0, *bounds.tolist()]
+    ends = [*bounds.tolist(), len(chats)]
+    owners = row_index[starts].tolist()
+    return {owner: chats[start:end] for owner, start, end in zip(owners, starts, ends)}
+
+
+def detect_changes_vectorized(
+    old_data: Mapping[str, Mapping[str, Any]],
+    new_data: Mapping[str, Mapping[str, Any]],
+) -> List[UserChangeEvent]:
+    """
+    Замена `detect_changes` для больших дельт (первая синхронизация после
+    запуска, смена заголовков или листа "Чаты").
+
+    Маленькие дельты и записи нестандартного вида (chats строкой,
+    нечисловые id) обрабатываются обычным `detect_changes`.
+    """
+    if len(old_data) + len(new_data) < _MIN_VECTORIZED_RECORDS:
+        return detect_changes(old_data, new_data)
+
+    try:
+        old_columns, new_columns = _Columns(old_data), _Columns(new_data)
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return detect_changes(old_data, new_data)
+
+    chat_ids = np.union1d(old_columns.distinct_chats, new_columns.distinct_chats)
+    old, new = old_columns.to_matrix(chat_ids), new_columns.to_matrix(chat_ids)
+    return diff_access(old, new)
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 
 from aiogram import Bot
 
-from src.services.chat_utils import ensure_invite_link, get_chat
+from src.services.chat_metadata import ChatMetadataCache
+from src.services.chat_utils import ensure_invite_link
 from src.services.ensure_user_can_join import ensure_user_can_join
 from src.storage.cache import CacheRepository
 from src.utils.logger import logger
 
+if TYPE_CHECKING:
+    from src.services.invite_pool import InviteLinkPool
+
 
 @dataclass(slots=True)
 class ChatAccess:
@@ -21,8 +26,18 @@ class ChatAccess:
 class AccessService:
     """Сервис доменной логики работы с доступами пользователей."""
 
-    def __init__(self, cache: CacheRepository) -> None:
+    def __init__(
+        self,
+        cache: CacheRepository,
+        chat_metadata: ChatMetadataCache,
+        *,
+        concurrency: int = 5,
+        invite_pool: InviteLinkPool | None = None,
+    ) -> None:
         self._cache = cache
+        self._chat_metadata = chat_metadata
+        self._concurrency = max(1, concurrency)
+        self._invite_pool = invite_pool
 
     def get_user(self, tg_id: int):
         return self._cache.get_user(tg_id)
@@ -39,23 +54,40 @@ class AccessService:
         return self._cache.chat_is_managed(chat_id)
 
     async def resolve_chat_access(self, bot: Bot, tg_id: int) -> List[ChatAccess]:
-        """Возвращает список чатов с готовыми инвайтами для пользователя."""
-        result: List[ChatAccess] = []
-        for chat_id in self.list_chat_ids(tg_id):
-            await ensure_user_can_join(bot, tg_id, chat_id)
-
-            chat = await get_chat(bot, chat_id)
-            if not chat:
-                logger.warning(f"[access_service] Не удалось получить чат {chat_id}")
-                continue
-
-            invite_link = await ensure_invite_link(bot, chat_id, chat)
-            if not invite_link:
-                logger.warning(
-                    f"[access_service] Не удалось получить ссылку-приглашение {chat_id}"
-                )
-                continue
-
-            title = chat.title or f"Чат {chat_id}"
-            result.append(ChatAccess(chat_id=chat_id, title=title, invite_link=invite_link))
-        return result
\ No newline at end of file
+        """
+        Возвращает список чатов с готовыми инвайтами для пользователя.
+
+        Чаты обрабатываются параллельно (не более `concurrency` одновременно),
+        порядок результата совпадает с порядком чатов в таблице.
+        """
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def _resolve(chat_id: int) -> Optional[ChatAccess]:
+            async with semaphore:
+                return await self._resolve_one(bot, tg_id, chat_id)
+
+        resolved = await asyncio.gather(*(_resolve(chat_id) for chat_id in self.list_chat_ids(tg_id)))
+        return [access for access in resolved if access is not None]
+
+    async def _resolve_one(self, bot: Bot, tg_id: int, chat_id: int) -> Optional[ChatAccess]:
+        await ensure_user_can_join(bot, tg_id, chat_id)
+
+        chat = await self._chat_metadata.get(bot, chat_id)
+        if not chat:
+            logger.warning(f"[access_service] Не удалось получить чат {chat_id}")
+            return None
+
+        if self._invite_pool:
+            invite_link = await self._invite_pool.take(chat_id, tg_id)
+        else:
+            invite_link = await ensure_invite_link(
+                bot, chat_id, chat, metadata=self._chat_metadata
+            )
+        if not invite_link:
+            logger.warning(
+                f"[access_service] Не удалось получить ссылку-приглашение {chat_id}"
+            )
+            return None
+
+        title = chat.title or f"Чат {chat_id}"
+        return ChatAccess(chat_id=chat_id, title=title, invite_link=invite_link)
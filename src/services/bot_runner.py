@@ -1,27 +1,56 @@
 from __future__ import annotations
 
 import asyncio
+from typing import Sequence
 
 import aiohttp
 from aiogram import Bot, Dispatcher
 from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
 from aiogram.exceptions import TelegramNetworkError
 
+from src.config import TELEGRAM_API_URL
+from src.services.http_transport import HttpTransport, PooledAiohttpSession
 from src.utils.logger import logger
 
 
+def create_session(
+    request_middlewares: Sequence[BaseRequestMiddleware] = (),
+    transport: HttpTransport | None = None,
+) -> AiohttpSession:
+    """HTTP-сессия Bot API (поверх общего пула, если он задан) с request-middleware."""
+    api = TelegramAPIServer.from_base(TELEGRAM_API_URL) if TELEGRAM_API_URL else PRODUCTION
+    session = PooledAiohttpSession(transport, api=api) if transport else AiohttpSession(api=api)
+    for middleware in request_middlewares:
+        session.middleware(middleware)
+    return session
+
+
 class BotLifecycleManager:
     """
     Управляет жизненным циклом polling:
     • автоматически перезапускает polling при сетевых ошибках
     • аккуратно завершает работу по сигналу stop()
-    • создаёт новую HTTP-сессию при каждом перезапуске
+    • без общего HTTP-пула создаёт новую сессию при каждом перезапуске;
+      с пулом (`transport`) переиспользует его keep-alive соединения
+    • подключает к сессии request-middleware (планировщик запросов)
     """
 
-    def __init__(self, bot: Bot, dispatcher: Dispatcher, reconnect_delay: float = 5.0) -> None:
+    def __init__(
+        self,
+        bot: Bot,
+        dispatcher: Dispatcher,
+        reconnect_delay: float = 5.0,
+        *,
+        request_middlewares: Sequence[BaseRequestMiddleware] = (),
+        transport: HttpTransport | None = None,
+    ) -> None:
         self._bot = bot
         self._dispatcher = dispatcher
         self._reconnect_delay = reconnect_delay
+        self._request_middlewares = tuple(request_middlewares)
+        self._transport = transport
         self._stop_event = asyncio.Event()
 
     async def run(self) -> None:
@@ -35,7 +64,7 @@ class BotLifecycleManager:
         logger.info("▶ Готов к запуску polling")
 
         while not self._stop_event.is_set():
-            session = AiohttpSession()
+            session = create_session(self._request_middlewares, self._transport)
             self._bot.session = session
 
             try:
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from aiogram import Bot
+
+from src.services.chat_utils import get_chat
+from src.utils.logger import logger
+
+
+@dataclass(slots=True, frozen=True)
+class ChatMetadata:
+    """То немногое из getChat, что нужно боту: название и ссылка-приглашение."""
+    chat_id: int
+    title: Optional[str]
+    invite_link: Optional[str]
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: ChatMetadata
+    expires_at: float
+
+
+# Мемоизация успешных ответов в пределах одного цикла синхронизации
+_cycle_memo: ContextVar[Dict[int, ChatMetadata] | None] = ContextVar(
+    "chat_metadata_cycle", default=None
+)
+
+
+class ChatMetadataCache:
+    """
+    Ограниченный по размеру кэш метаданных чатов с TTL.
+
+    • Успешные ответы getChat живут `ttl` секунд (LRU на `max_size` чатов).
+    • Параллельные запросы одного и того же чата склеиваются в один getChat.
+    • Внутри `cycle()` успешный результат запоминается до конца цикла
+      синхронизации — 500 уведомлений про один чат дают один запрос.
+      Неудачный (None) не запоминается: следующее обращение повторит getChat.
+    • Ссылка-приглашение, созданная ботом, создаётся один раз на чат:
+      параллельные запросы ждут одно создание (`shared_invite_link`), а
+      результат виден и в кэше, и в мемоизации текущего цикла.
+    • Записи сбрасываются по событиям my_chat_member и смене названия чата.
+    """
+
+    def __init__(self, *, ttl: float = 600.0, max_size: int = 1000) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._inflight: Dict[int, asyncio.Future[Optional[ChatMetadata]]] = {}
+        # Ссылки-заявки создаются ботом и не приходят в getChat — храним их без TTL
+        self._join_request_links: Dict[int, str] = {}
+        # Создание ссылки в процессе: (chat_id, join_request) → будущий результат
+        self._link_inflight: Dict[Tuple[int, bool], asyncio.Future[Optional[str]]] = {}
+
+    @contextmanager
+    def cycle(self) -> Iterator[None]:
+        """Область мемоизации на один цикл синхронизации."""
+        token = _cycle_memo.set({})
+        try:
+            yield
+        finally:
+            _cycle_memo.reset(token)
+
+    async def get(self, bot: Bot, chat_id: int) -> Optional[ChatMetadata]:
+        memo = _cycle_memo.get()
+        if memo is not None:
+            cached = memo.get(chat_id)
+            if cached is not None:
+                return cached
+
+        entry = self._entries.get(chat_id)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._entries.move_to_end(chat_id)
+            result: Optional[ChatMetadata] = entry.value
+        else:
+            result = await self._fetch(bot, chat_id)
+
+        if memo is not None and result is not None:
+            memo[chat_id] = result
+        return result
+
+    def remember_invite_link(self, chat_id: int, invite_link: str, *, join_request: bool = False) -> None:
+        """Запоминает созданную ботом ссылку, чтобы не создавать новую на каждый запрос."""
+        if join_request:
+            self._join_request_links[chat_id] = invite_link
+            return
+        entry = self._entries.get(chat_id)
+        if entry is not None:
+            entry.value = replace(entry.value, invite_link=invite_link)
+        memo = _cycle_memo.get()
+        if memo is not None and chat_id in memo:
+            memo[chat_id] = replace(memo[chat_id], invite_link=invite_link)
+
+    def known_invite_link(self, chat_id: int, *, join_request: bool = False) -> Optional[str]:
+        """Уже известная ссылка чата (из мемоизации цикла или кэша) без запросов к API."""
+        if join_request:
+            return self._join_request_links.get(chat_id)
+        memo = _cycle_memo.get()
+        cached = memo.get(chat_id) if memo is not None else None
+        if cached is not None and cached.invite_link:
+            return cached.invite_link
+        entry = self._entries.get(chat_id)
+        return entry.value.invite_link if entry is not None else None
+
+    async def shared_invite_link(
+        self,
+        chat_id: int,
+        create: Callable[[], Awaitable[Optional[str]]],
+        *,
+        join_request: bool = False,
+    ) -> Optional[str]:
+        """
+        Возвращает известную ссылку чата или создаёт её через `create`.
+
+        Параллельные вызовы для одного чата ждут одно создание, поэтому
+        волна выдач доступа в новый чат создаёт одну ссылку, а не по ссылке
+        на пользователя. Неудачное создание (None) не запоминается.
+        """
+        known = self.known_invite_link(chat_id, join_request=join_request)
+        if known:
+            return known
+
+        key = (chat_id, join_request)
+        inflight = self._link_inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future[Optional[str]] = asyncio.get_running_loop().create_future()
+        self._link_inflight[key] = future
+        try:
+            link = await create()
+            if link:
+                self.remember_invite_link(chat_id, link, join_request=join_request)
+            future.set_result(link)
+            return link
+        except BaseException:
+            if not future.done():
+                future.set_result(None)
+            raise
+        finally:
+            self._link_inflight.pop(key, None)
+
+    def update_title(self, chat_id: int, title: str) -> None:
+        entry = self._entries.get(chat_id)
+        if entry is not None:
+            entry.value = replace(entry.value, title=title)
+
+    def invalidate(self, chat_id: int) -> None:
+        self._join_request_links.pop(chat_id, None)
+        if self._entries.pop(chat_id, None) is not None:
+            logger.debug(f"[chat_metadata] Сброшен кэш чата {chat_id}")
+
+    async def _fetch(self, bot: Bot, chat_id: int) -> Optional[ChatMetadata]:
+        inflight = self._inflight.get(chat_id)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future[Optional[ChatMetadata]] = asyncio.get_running_loop().create_future()
+        self._inflight[chat_id] = future
+        try:
+            chat = await get_chat(bot, chat_id)
+            result = (
+                ChatMetadata(chat_id=chat_id, title=chat.title, invite_link=chat.invite_link)
+                if chat
+                else None
+            )
+            if result is not None:
+                self._store(result)
+            future.set_result(result)
+            return result
+        except BaseException:
+            # Ожидающие получают None — как при любой ошибке get_chat
+            if not future.done():
+                future.set_result(None)
+            raise
+        finally:
+            self._inflight.pop(chat_id, None)
+
+    def _store(self, value: ChatMetadata) -> None:
+        self._entries[value.chat_id] = _Entry(value=value, expires_at=time.monotonic() + self._ttl)
+        self._entries.move_to_end(value.chat_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
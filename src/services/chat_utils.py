@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 from contextlib import suppress
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from aiogram import Bot, types
 from aiogram.exceptions import TelegramAPIError
 
+from src.config import JOIN_REQUESTS_ENABLED
 from src.utils.logger import logger
 
+if TYPE_CHECKING:
+    from src.services.chat_metadata import ChatMetadata, ChatMetadataCache
+
 
 async def get_chat(bot: Bot, chat_id: int) -> Optional[types.Chat]:
     """
@@ -31,41 +35,59 @@ async def get_chat(bot: Bot, chat_id: int) -> Optional[types.Chat]:
 async def ensure_invite_link(
     bot: Bot,
     chat_id: int,
-    chat: types.Chat | None = None,
+    chat: types.Chat | ChatMetadata | None = None,
+    *,
+    metadata: ChatMetadataCache | None = None,
+    join_request: bool = JOIN_REQUESTS_ENABLED,
 ) -> Optional[str]:
     """
     Гарантированно возвращает рабочую ссылку-приглашение для чата.
 
     Логика:
-    1. Если объект чата не передан — пытаемся получить его через get_chat().
+    1. Если объект чата не передан — пытаемся получить его через кэш
+       метаданных (если он передан) или get_chat().
     2. Если у чата уже есть постоянная invite_link — просто возвращаем её.
-    3. Если ссылки нет — создаём новую через create_chat_invite_link().
+    3. Если ссылки нет — создаём новую через create_chat_invite_link()
+       и запоминаем её в кэше метаданных; параллельные вызовы для одного
+       чата при этом ждут одно создание.
     4. При ошибках API возвращается None, а ошибка логируется.
 
+    В режиме заявок (`join_request`) постоянная ссылка чата не выдаётся:
+    бот создаёт ссылку с creates_join_request=True и запоминает её отдельно.
+
     Аргументы:
         bot (Bot): экземпляр aiogram бота.
         chat_id (int): ID чата.
-        chat (types.Chat | None): опционально, уже полученный объект чата.
+        chat (types.Chat | ChatMetadata | None): опционально, уже полученный чат.
+        metadata (ChatMetadataCache | None): общий кэш метаданных чатов.
+        join_request (bool): выдавать ссылку, создающую заявку на вступление.
 
     Возвращает:
         str — invite-ссылка  
         None — если получить или создать ссылку не удалось
     """
-    if chat is None:
-        chat = await get_chat(bot, chat_id)
+    if not join_request:
         if chat is None:
+            chat = await metadata.get(bot, chat_id) if metadata else await get_chat(bot, chat_id)
+            if chat is None:
+                return None
+        if chat.invite_link:
+            return chat.invite_link
+
+    async def _create() -> Optional[str]:
+        try:
+            invite = await bot.create_chat_invite_link(chat_id, creates_join_request=join_request or None)
+        except TelegramAPIError as exc:
+            logger.error(
+                f"[chat_utils] Не удалось создать ссылку-приглашение для чата {chat_id}: {exc}"
+            )
             return None
-    if chat.invite_link:
-        return chat.invite_link
-    try:
-        invite = await bot.create_chat_invite_link(chat_id)
-    except TelegramAPIError as exc:
-        logger.error(
-            f"[chat_utils] Не удалось создать ссылку-приглашение для чата {chat_id}: {exc}"
-        )
-        return None
+        return invite.invite_link
 
-    return invite.invite_link
+    if metadata is None:
+        return await _create()
+    # Переданный chat мог устареть: ссылку уже создал параллельный вызов
+    return await metadata.shared_invite_link(chat_id, _create, join_request=join_request)
 
 
 async def kick_user_from_chat(bot: Bot, chat_id: int, user_id: int) -> bool:
@@ -5,18 +5,81 @@ from pathlib import Path
 
 from aiogram import Bot
 
+from src.config import (
+    ACCESS_RESOLVE_CONCURRENCY,
+    CACHE_BACKEND,
+    CHANGE_DETECTION,
+    CHAT_METADATA_TTL,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    INVITE_POOL_REFILL_INTERVAL,
+    INVITE_POOL_SIZE,
+    JOIN_REQUEST_BATCH_SIZE,
+    JOIN_REQUEST_CONCURRENCY,
+    JOIN_REQUESTS_ENABLED,
+    NOTIFY_WORKERS,
+    PROFILE_CPU_SECONDS,
+    PROFILE_DIR,
+    PROFILE_SAMPLE_INTERVAL,
+    PROFILE_TOP_N,
+    RECONCILE_BATCH_PAUSE,
+    RECONCILE_BATCH_SIZE,
+    RECONCILE_CONCURRENCY,
+    RECONCILE_PASS_INTERVAL,
+    REMOVAL_CONCURRENCY,
+    SHEETS_POLL_MAX_INTERVAL,
+    SHEETS_POLL_MIN_INTERVAL,
+    SHEETS_PUSH_ADDRESS,
+    SHEETS_PUSH_ENABLED,
+    SHEETS_PUSH_FALLBACK_INTERVAL,
+    SHEETS_PUSH_HOST,
+    SHEETS_PUSH_PATH,
+    SHEETS_PUSH_PORT,
+    SHEETS_PUSH_TOKEN,
+    STORAGE_DIR,
+    TELEGRAM_API_RATE,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_MAX_RETRIES,
+)
 from src.services.access_service import AccessService
-from src.services.notifier import NotificationService
-from src.services.updater import SheetSyncWorker
+from src.services.chat_metadata import ChatMetadataCache
+from src.services.delivery import NotificationQueue
+from src.services.gsheets import AsyncSheetsClient
+from src.services.http_transport import HttpTransport
+from src.services.invite_pool import InviteLinkPool
+from src.services.join_admission import JoinRequestAdmission
+from src.services.notifier import NotificationService, detect_changes
+from src.services.poll_policy import AdaptivePollPolicy
+from src.services.reconciler import MembershipReconciler
+from src.services.removal_executor import RemovalExecutor
+from src.services.sheet_push import SheetPushService
+from src.services.telegram_scheduler import TelegramScheduler
+from src.services.updater import ChangeDetector, SheetSyncWorker
+from src.storage.bitset_cache import BitsetCacheRepository
 from src.storage.cache import CacheRepository
+from src.storage.sqlite_cache import SqliteCacheRepository
+from src.utils.profiling import Profiler
 
 
 @dataclass
 class ServiceContainer:
     cache: CacheRepository
+    chat_metadata: ChatMetadataCache
     access: AccessService
     notifier: NotificationService
+    delivery: NotificationQueue
+    sheets: AsyncSheetsClient
+    removals: RemovalExecutor
     sync_worker: SheetSyncWorker
+    telegram_scheduler: TelegramScheduler
+    transport: HttpTransport
+    profiler: Profiler
+    sheet_push: SheetPushService | None = None
+    invite_pool: InviteLinkPool | None = None
+    join_admission: JoinRequestAdmission | None = None
+    reconciler: MembershipReconciler | None = None
 
 
 _container: ServiceContainer | None = None
@@ -24,15 +87,154 @@ _container: ServiceContainer | None = None
 
 def init_services(bot: Bot) -> ServiceContainer:
     global _container
-    cache_path = (Path(__file__).resolve().parent / "../storage/cache.json").resolve()
-    cache = CacheRepository(cache_path)
-    access = AccessService(cache)
-    notifier = NotificationService(bot)
-    sync_worker = SheetSyncWorker(cache, notifier)
-    _container = ServiceContainer(cache=cache, access=access, notifier=notifier, sync_worker=sync_worker)
+    if STORAGE_DIR:
+        storage_dir = Path(STORAGE_DIR)
+    else:
+        storage_dir = (Path(__file__).resolve().parent / "../storage").resolve()
+    cache = _create_cache(storage_dir)
+    chat_metadata = ChatMetadataCache(ttl=CHAT_METADATA_TTL)
+    invite_pool = (
+        InviteLinkPool(
+            bot,
+            cache,
+            storage_dir / "invite_links.json",
+            size=INVITE_POOL_SIZE,
+            refill_interval=INVITE_POOL_REFILL_INTERVAL,
+            join_request=JOIN_REQUESTS_ENABLED,
+        )
+        if INVITE_POOL_SIZE > 0
+        else None
+    )
+    access = AccessService(
+        cache,
+        chat_metadata,
+        concurrency=ACCESS_RESOLVE_CONCURRENCY,
+        invite_pool=invite_pool,
+    )
+    notifier = NotificationService(bot, chat_metadata, invite_pool=invite_pool)
+    # Один пул keep-alive соединений на Bot API и Google API
+    transport = HttpTransport(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        dns_ttl=HTTP_DNS_CACHE_TTL,
+    )
+    sheets = AsyncSheetsClient(transport=transport)
+    delivery = NotificationQueue(notifier, chat_metadata, workers=NOTIFY_WORKERS)
+    removals = RemovalExecutor(
+        bot,
+        cache,
+        storage_dir / "removals.json",
+        concurrency=REMOVAL_CONCURRENCY,
+        invite_pool=invite_pool,
+    )
+    poll_policy = AdaptivePollPolicy(
+        min_interval=SHEETS_POLL_MIN_INTERVAL,
+        max_interval=SHEETS_POLL_MAX_INTERVAL,
+    )
+    sync_worker = SheetSyncWorker(
+        cache,
+        delivery,
+        sheets,
+        removals,
+        poll_policy=poll_policy,
+        detect_changes=_create_change_detector(),
+    )
+    if SHEETS_PUSH_ENABLED:
+        sheet_push = SheetPushService(
+            sheets,
+            sync_worker.wake,
+            host=SHEETS_PUSH_HOST,
+            port=SHEETS_PUSH_PORT,
+            path=SHEETS_PUSH_PATH,
+            address=SHEETS_PUSH_ADDRESS,
+            token=SHEETS_PUSH_TOKEN,
+            # Пока подписка действует, в простое опрос замедляется до страховочной проверки
+            poll_policy=poll_policy,
+            fallback_interval=SHEETS_PUSH_FALLBACK_INTERVAL,
+        )
+    else:
+        sheet_push = None
+    join_admission = (
+        JoinRequestAdmission(
+            bot,
+            cache,
+            storage_dir / "join_requests.json",
+            batch_size=JOIN_REQUEST_BATCH_SIZE,
+            concurrency=JOIN_REQUEST_CONCURRENCY,
+        )
+        if JOIN_REQUESTS_ENABLED
+        else None
+    )
+    reconciler = (
+        MembershipReconciler(
+            bot,
+            cache,
+            removals,
+            storage_dir / "reconcile.json",
+            batch_size=RECONCILE_BATCH_SIZE,
+            concurrency=RECONCILE_CONCURRENCY,
+            batch_pause=RECONCILE_BATCH_PAUSE,
+            pass_interval=RECONCILE_PASS_INTERVAL,
+        )
+        if RECONCILE_PASS_INTERVAL > 0
+        else None
+    )
+    telegram_scheduler = TelegramScheduler(
+        global_rate=TELEGRAM_GLOBAL_RATE,
+        api_rate=TELEGRAM_API_RATE,
+        max_retries=TELEGRAM_MAX_RETRIES,
+    )
+    profiler = Profiler(
+        Path(PROFILE_DIR) if PROFILE_DIR else storage_dir / "profiles",
+        cpu_duration=PROFILE_CPU_SECONDS,
+        sample_interval=PROFILE_SAMPLE_INTERVAL,
+        top_n=PROFILE_TOP_N,
+    )
+    _container = ServiceContainer(
+        cache=cache,
+        chat_metadata=chat_metadata,
+        access=access,
+        notifier=notifier,
+        delivery=delivery,
+        sheets=sheets,
+        removals=removals,
+        sync_worker=sync_worker,
+        telegram_scheduler=telegram_scheduler,
+        transport=transport,
+        profiler=profiler,
+        sheet_push=sheet_push,
+        invite_pool=invite_pool,
+        join_admission=join_admission,
+        reconciler=reconciler,
+    )
     return _container
 
 
+def _create_cache(storage_dir: Path) -> CacheRepository:
+    cache_path = storage_dir / "cache.json"
+    if CACHE_BACKEND == "bitset":
+        return BitsetCacheRepository(cache_path)
+    if CACHE_BACKEND == "sqlite":
+        return SqliteCacheRepository(cache_path, storage_dir / "cache.sqlite3")
+    if CACHE_BACKEND != "memory":
+        raise RuntimeError(f"Неизвестное значение CACHE_BACKEND: {CACHE_BACKEND}")
+    return CacheRepository(cache_path)
+
+
+def _create_change_detector() -> ChangeDetector:
+    if CHANGE_DETECTION == "numpy":
+        # numpy загружается только если выбран — без него старт бота заметно быстрее
+        from src.services.access_matrix import NUMPY_AVAILABLE, detect_changes_vectorized
+
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("CHANGE_DETECTION=numpy требует пакет numpy (pip install numpy)")
+        return detect_changes_vectorized
+    if CHANGE_DETECTION != "python":
+        raise RuntimeError(f"Неизвестное значение CHANGE_DETECTION: {CHANGE_DETECTION}")
+    return detect_changes
+
+
 def get_container() -> ServiceContainer:
     if _container is None:
         raise RuntimeError("Сервисы не инициализированы: вызовите init_services() в main")
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import suppress
+from typing import Dict, List, Optional, Set
+
+from src.services.chat_metadata import ChatMetadataCache
+from src.services.notifier import NotificationService, UserChangeEvent
+from src.services.telegram_scheduler import Lane, telegram_lane
+from src.utils.logger import logger
+
+
+# Область мемоизации метаданных чатов живёт не дольше пачки: при непрерывной
+# очереди названия и ссылки всё равно периодически перечитываются
+_MEMO_BATCH_SIZE = 200
+_MEMO_BATCH_SECONDS = 30.0
+
+
+def merge_events(pending: UserChangeEvent, newer: UserChangeEvent) -> UserChangeEvent:
+    """
+    Склеивает ещё не доставленное событие с более новым для того же пользователя.
+
+    Итог описывает переход от состояния до `pending` к состоянию после `newer`:
+    чат, который выдали и тут же отозвали (или наоборот), взаимно сокращается.
+    """
+    added = (set(pending.new_chats) - set(newer.removed_chats)) | (
+        set(newer.new_chats) - set(pending.removed_chats)
+    )
+    removed = (set(pending.removed_chats) - set(newer.new_chats)) | (
+        set(newer.removed_chats) - set(pending.new_chats)
+    )
+
+    changed_role: Optional[tuple[str, str]]
+    if pending.changed_role and newer.changed_role:
+        old_role, new_role = pending.changed_role[0], newer.changed_role[1]
+        changed_role = (old_role, new_role) if old_role != new_role else None
+    else:
+        changed_role = newer.changed_role or pending.changed_role
+
+    return UserChangeEvent(
+        tg_id=newer.tg_id,
+        changed_role=changed_role,
+        new_chats=sorted(added),
+        removed_chats=sorted(removed),
+    )
+
+
+class NotificationQueue:
+    """
+    Очередь доставки уведомлений, отвязанная от цикла синхронизации.
+
+    `submit()` не ждёт отправки: события складываются по tg_id, и если
+    новая синхронизация успела раньше доставки, события сливаются через
+    `merge_events`. Пул воркеров доставляет уведомления, следя, чтобы
+    одному пользователю одновременно отправлялось не больше одного.
+    """
+
+    def __init__(
+        self,
+        notifier: NotificationService,
+        chat_metadata: ChatMetadataCache,
+        *,
+        workers: int = 4,
+    ) -> None:
+        self._notifier = notifier
+        self._chat_metadata = chat_metadata
+        self._workers = max(1, workers)
+        self._pending: Dict[int, UserChangeEvent] = {}
+        self._in_flight: Set[int] = set()
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+
+    @property
+    def depth(self) -> int:
+        """Сколько пользователей ждут доставки."""
+        return len(self._pending)
+
+    def submit(self, event: UserChangeEvent) -> None:
+        pending = self._pending.get(event.tg_id)
+        if pending is not None:
+            self._pending[event.tg_id] = merge_events(pending, event)
+            return
+
+        self._pending[event.tg_id] = event
+        if event.tg_id not in self._in_flight:
+            self._queue.put_nowait(event.tg_id)
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        logger.info(f"▶ Запускаю доставку уведомлений ({self._workers} воркеров)")
+        tasks: List[asyncio.Task[None]] = [
+            asyncio.create_task(self._worker(), name=f"notify-worker-{index}")
+            for index in range(self._workers)
+        ]
+        try:
+            await stop_event.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            for task in tasks:
+                with suppress(asyncio.CancelledError):
+                    await task
+            if self._pending:
+                logger.warning(f"⚠️ Не доставлено уведомлений: {len(self._pending)}")
+            logger.info("✔ Доставка уведомлений остановлена")
+
+    async def _worker(self) -> None:
+        with telegram_lane(Lane.BACKGROUND):
+            while True:
+                tg_id = await self._queue.get()
+                # Одна область мемоизации метаданных чатов на пачку уведомлений
+                with self._chat_metadata.cycle():
+                    deadline = time.monotonic() + _MEMO_BATCH_SECONDS
+                    delivered = 0
+                    while True:
+                        await self._deliver(tg_id)
+                        delivered += 1
+                        # Остаток очереди заберёт следующая пачка со свежей мемоизацией
+                        if delivered >= _MEMO_BATCH_SIZE or time.monotonic() >= deadline:
+                            break
+                        try:
+                            tg_id = self._queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            break
+
+    async def _deliver(self, tg_id: int) -> None:
+        event = self._pending.pop(tg_id, None)
+        if event is None:
+            return
+
+        self._in_flight.add(tg_id)
+        try:
+            await self._notifier.notify(event)
+        except Exception as exc:
+            logger.error(f"[delivery] Ошибка доставки уведомления {tg_id}: {exc}")
+        finally:
+            self._in_flight.discard(tg_id)
+            # За время отправки пришло новое событие — ставим пользователя в очередь снова
+            if tg_id in self._pending:
+                self._queue.put_nowait(tg_id)
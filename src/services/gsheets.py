@@ -1,25 +1,82 @@
+import asyncio
+import bisect
 import json
 import hashlib
+import random
 import re
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable, Mapping, TypeVar
+
+from src.config import (
+    GOOGLE_API_URL,
+    GOOGLE_CREDS_PATH,
+    GOOGLE_SHEETS_URL,
+    SHEETS_PUSH_ENABLED,
+    SHEETS_READ_QUOTA_PER_MINUTE,
+    SHEETS_REQUEST_TIMEOUT,
+)
+from src.services.poll_policy import QuotaBudget, SheetsQuotaError
+from src.utils.logger import logger
+from src.utils.metrics import REGISTRY
 
-from google.auth.exceptions import RefreshError
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+# Библиотеки Google тяжёлые: импортируются лениво, в потоке executor'а,
+# при первом обращении к API, а не при старте бота.
+if TYPE_CHECKING:
+    from google.auth.exceptions import RefreshError
 
-from src.config import GOOGLE_CREDS_PATH, GOOGLE_SHEETS_URL
-from src.utils.logger import logger
-from src.services.user_data import normalize_user_record, UserDataError
+    from src.services.http_transport import HttpTransport
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+if SHEETS_PUSH_ENABLED:
+    # Нужен только для push-уведомлений Drive (files.watch)
+    SCOPES.append("https://www.googleapis.com/auth/drive.metadata.readonly")
+
+ACCESS_SHEET = "Доступы"
+MAPPING_SHEET = "Чаты"
+# Обязательные колонки "Доступы"; остальные — колонки чатов
+_FIXED_COLUMNS = ("tg_id", "username", "fio")
+
+T = TypeVar("T")
 
 last_modified: datetime | None = None
 last_hash: str | None = None
 last_hash_time = 0.0      # для debounce хэша
+# Версия, найденная sheet_changed(), но ещё не загруженная: last_modified/last_hash
+# сдвигаются на неё только в mark_synced(), после успешной загрузки таблицы
+_pending_modified: datetime | None = None
+_pending_hash: str | None = None
+
+# Учёт запросов к Sheets API; общий для всех вызовов процесса
+_quota = QuotaBudget(SHEETS_READ_QUOTA_PER_MINUTE)
+
+# Наихудшее число запросов Sheets API за один вызов (для резервирования бюджета)
+_CHECK_COST = 2   # metadata + fallback-хэш
+_LOAD_COST = 1    # один batchGet: "Доступы" и "Чаты" вместе
+
+# Повторы запросов к Google API (как num_retries у googleapiclient)
+_SEND_RETRIES = 2
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+SHEETS_LATENCY = REGISTRY.histogram(
+    "sheets_call_duration_seconds",
+    "Длительность вызовов Google API (включая ожидание executor'а)",
+    ["call"],
+)
+SHEETS_ERRORS = REGISTRY.counter(
+    "sheets_call_errors_total",
+    "Ошибки вызовов Google API",
+    ["call", "error"],
+)
+
+# Общий HTTP-пул и event loop, в котором он живёт (задаёт AsyncSheetsClient)
+_transport: "HttpTransport | None" = None
+_transport_loop: asyncio.AbstractEventLoop | None = None
 
 
 def _require_config(value: str | None, name: str) -> str:
@@ -37,17 +94,66 @@ def _get_spreadsheet_id() -> str:
     return match.group(1)
 
 
+def _load_discovery_document(service_name: str = "sheets", version: str = "v4") -> str:
+    """
+    Документ discovery из статической копии, поставляемой вместе
+    с googleapiclient, — без сетевого запроса и без discovery-кэша.
+    """
+    from googleapiclient.discovery_cache import get_static_doc
+
+    document = get_static_doc(service_name, version)
+    if document is None:
+        raise RuntimeError(
+            f"В googleapiclient нет статического discovery-документа {service_name} {version}"
+        )
+    return document
+
+
 @lru_cache(maxsize=1)
-def _get_service():
+def _get_credentials():
+    if GOOGLE_API_URL:
+        # Локальный фейковый сервер (tools/fake_sheets_api.py) авторизации не требует
+        from google.auth.credentials import AnonymousCredentials
+
+        return AnonymousCredentials()
+
+    from google.oauth2.service_account import Credentials
+
     creds_path = Path(_require_config(GOOGLE_CREDS_PATH, "GOOGLE_CREDS_PATH"))
     if not creds_path.exists():
         raise RuntimeError(f"Файл с учетными данными не найден: {creds_path}")
 
-    creds = Credentials.from_service_account_file(str(creds_path), scopes=SCOPES)
-    return build("sheets", "v4", credentials=creds)
+    return Credentials.from_service_account_file(str(creds_path), scopes=SCOPES)
 
 
-def _raise_refresh_error(exc: RefreshError) -> None:
+def _build(service_name: str, version: str):
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.discovery import build_from_document
+
+    # Таймаут на уровне сокета: поток executor'а не зависнет навсегда,
+    # даже если ожидание на стороне asyncio уже отменено.
+    http = AuthorizedHttp(_get_credentials(), http=httplib2.Http(timeout=SHEETS_REQUEST_TIMEOUT))
+    document = _load_discovery_document(service_name, version)
+    client_options = None
+    if GOOGLE_API_URL:
+        # api_endpoint заменяет rootUrl вместе с servicePath ("drive/v3/" у Drive)
+        service_path = json.loads(document).get("servicePath", "")
+        client_options = {"api_endpoint": GOOGLE_API_URL.rstrip("/") + "/" + service_path}
+    return build_from_document(document, http=http, client_options=client_options)
+
+
+@lru_cache(maxsize=1)
+def _get_service():
+    return _build("sheets", "v4")
+
+
+@lru_cache(maxsize=1)
+def _get_drive_service():
+    return _build("drive", "v3")
+
+
+def _raise_refresh_error(exc: "RefreshError") -> None:
     logger.error(
         "Ошибка авторизации Google API: %s. Проверьте файл сервисного аккаунта по пути %s",
         exc,
@@ -58,51 +164,224 @@ def _raise_refresh_error(exc: RefreshError) -> None:
     ) from exc
 
 
-def load_raw_values(sheet_name: str) -> list[list[str]]:
-    """Загружает указанный лист полностью (все колонки A:Z)."""
-    service = _get_service()
-    spreadsheet_id = _get_spreadsheet_id()
+def _use_transport(transport: "HttpTransport", loop: asyncio.AbstractEventLoop) -> None:
+    global _transport, _transport_loop
+    _transport, _transport_loop = transport, loop
 
-    try:
-        result = service.spreadsheets().values().batchGet(
-            spreadsheetId=spreadsheet_id,
-            ranges=[f"{sheet_name}!A1:Z9999"]
-        ).execute()
-    except RefreshError as exc:
-        _raise_refresh_error(exc)
 
-    return result["valueRanges"][0].get("values", [])
+def _access_token() -> str:
+    creds = _get_credentials()
+    if not creds.valid:
+        import httplib2
+        from google_auth_httplib2 import Request
+
+        creds.refresh(Request(httplib2.Http(timeout=SHEETS_REQUEST_TIMEOUT)))
+    return creds.token
+
+
+def _send(request: Any) -> Any:
+    """
+    Отправляет подготовленный запрос googleapiclient.
+
+    Если задан общий HTTP-пул, запрос уходит через его aiohttp-соединения в
+    event loop бота, а поток executor'а ждёт ответа; googleapiclient лишь
+    собирает URL и тело и разбирает ответ. Без пула — обычный httplib2.
+
+    В обоих случаях поведение `HttpRequest.execute` сохраняется: слишком
+    длинный GET уходит POST'ом с X-HTTP-Method-Override, а ответы 5xx/429
+    и обрывы соединения повторяются `_SEND_RETRIES` раз с экспоненциальной
+    паузой. Повторы через пул учитываются в бюджете квоты.
+    """
+    if _transport is None or _transport_loop is None:
+        return request.execute(num_retries=_SEND_RETRIES)
+
+    import aiohttp
+    import httplib2
+    from googleapiclient.http import MAX_URI_LENGTH
+
+    method, uri, body = request.method, request.uri, request.body
+    headers = dict(request.headers)
+    if len(uri) > MAX_URI_LENGTH and method == "GET":
+        parsed = urllib.parse.urlparse(uri)
+        method, body = "POST", parsed.query
+        uri = urllib.parse.urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, None, None))
+        headers["x-http-method-override"] = "GET"
+        headers["content-type"] = "application/x-www-form-urlencoded"
+        headers["content-length"] = str(len(body))
+
+    for attempt in range(_SEND_RETRIES + 1):
+        if attempt:
+            time.sleep(random.random() * 2 ** attempt)
+            _quota.record()
+        token = _access_token()
+        if token:
+            headers["authorization"] = f"Bearer {token}"
+        future = asyncio.run_coroutine_threadsafe(
+            _transport.request(method, uri, headers=headers, data=body, timeout=SHEETS_REQUEST_TIMEOUT),
+            _transport_loop,
+        )
+        try:
+            status, response_headers, content = future.result(timeout=SHEETS_REQUEST_TIMEOUT + 5)
+        except (aiohttp.ClientConnectionError, ConnectionError):
+            if attempt == _SEND_RETRIES:
+                raise
+            continue
+        if status in _RETRY_STATUSES and attempt < _SEND_RETRIES:
+            continue
+        break
+
+    response = httplib2.Response({**response_headers, "status": status})
+    # postproc разбирает JSON и бросает HttpError на статусы >= 300
+    return request.postproc(response, content)
+
+
+def _execute(request: Any) -> Any:
+    """Выполняет запрос Sheets API, учитывая его в бюджете квоты."""
+    from googleapiclient.errors import HttpError
+
+    _quota.record()
+    try:
+        return _send(request)
+    except HttpError as exc:
+        if exc.resp.status != 429:
+            raise
+        try:
+            retry_after = float(exc.resp.get("retry-after", 60))
+        except (TypeError, ValueError):
+            retry_after = 60.0
+        _quota.exhaust(retry_after)
+        raise SheetsQuotaError(
+            f"Квота Google Sheets API исчерпана, повтор через {retry_after:.0f} сек", retry_after
+        ) from exc
 
 
 # ===========================
-#        ВАЛИДАЦИЯ
+#      ПЛАНИРОВЩИК ЗАПРОСОВ
 # ===========================
 
-def validate_table(access_raw: list[list[str]], mapping_raw: list[list[str]]):
-    logger.info("🔍 Проверяю таблицу...")
+# Диапазон по умолчанию, пока размеры листов неизвестны (метаданные ещё не получены)
+_FALLBACK_GRID = (9999, 26)
 
-    if not access_raw:
-        raise RuntimeError("Лист 'Доступы' пуст")
 
-    if not mapping_raw:
-        raise RuntimeError("Лист 'Чаты' пуст")
+def _column_letter(index: int) -> str:
+    """1 → A, 26 → Z, 27 → AA."""
+    letters = ""
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
 
-    headers = access_raw[0]
 
-    required_cols = {"tg_id", "username", "fio"}
-    missing = required_cols - set(headers)
-    if missing:
-        raise RuntimeError(f"В листе 'Доступы' отсутствуют обязательные колонки: {missing}")
+def _cell_to_str(value: Any) -> str:
+    """
+    Приводит значение ячейки к строке.
 
-    chat_columns = [h for h in headers if h not in required_cols]
-    if not chat_columns:
-        raise RuntimeError("В листе 'Доступы' нет колонок чатов")
+    При UNFORMATTED_VALUE числа приходят числами, а чекбоксы — булевыми
+    значениями; дальше по коду ожидаются строки.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
 
-    # ────────────────────────
-    #  ВАЛИДАЦИЯ ЛИСТА "ЧАТЫ"
-    # ────────────────────────
 
-    chat_name_to_id = {}
+class SheetFetchPlanner:
+    """
+    Планирует загрузку листов так, чтобы за цикл синхронизации уходил
+    минимум запросов и байт:
+
+    • оба листа запрашиваются одним batchGet;
+    • диапазоны ограничены реальными размерами листов (gridProperties),
+      которые приходят вместе с modifiedTime в `sheet_changed()`;
+    • значения запрашиваются неформатированными, ответ урезан маской `fields`;
+    • лист "Чаты" маленький и приходит в том же batchGet, а разбирается
+      и валидируется заново, только если изменились его значения.
+    """
+
+    def __init__(self) -> None:
+        self._grids: dict[str, tuple[int, int]] = {}
+        self._mapping: dict[str, str] | None = None
+        self._mapping_raw: list[list[str]] | None = None
+
+    def update_grids(self, sheets: list[dict[str, Any]]) -> None:
+        """Запоминает размеры листов из ответа spreadsheets.get."""
+        grids: dict[str, tuple[int, int]] = {}
+        for sheet in sheets:
+            props = sheet.get("properties", {})
+            grid = props.get("gridProperties", {})
+            title = props.get("title")
+            if title:
+                grids[title] = (int(grid.get("rowCount", 0)), int(grid.get("columnCount", 0)))
+        self._grids = grids
+
+    def range_for(self, sheet_name: str) -> str:
+        rows, columns = self._grids.get(sheet_name) or _FALLBACK_GRID
+        quoted = sheet_name.replace("'", "''")
+        return f"'{quoted}'!A1:{_column_letter(max(columns, 1))}{max(rows, 1)}"
+
+    def fetch(self) -> tuple[list[list[str]], dict[str, str]]:
+        """
+        Возвращает сырые строки листа "Доступы" и провалидированное
+        соответствие chat_name → chat_id.
+        """
+        values = self.batch_get([ACCESS_SHEET, MAPPING_SHEET])
+        return values[ACCESS_SHEET], self._remember_mapping(values[MAPPING_SHEET])
+
+    def _remember_mapping(self, mapping_raw: list[list[str]]) -> dict[str, str]:
+        # Правка chat_id не меняет размеров листа — сравниваем сами значения
+        if self._mapping is not None and mapping_raw == self._mapping_raw:
+            return self._mapping
+        mapping = validate_mapping(mapping_raw)
+        self._mapping = mapping
+        self._mapping_raw = mapping_raw
+        return mapping
+
+    def batch_get(self, sheets: list[str]) -> dict[str, list[list[str]]]:
+        """Значения листов одним batchGet: имя листа → строки."""
+        from google.auth.exceptions import RefreshError
+
+        service = _get_service()
+        spreadsheet_id = _get_spreadsheet_id()
+
+        try:
+            result = _execute(service.spreadsheets().values().batchGet(
+                spreadsheetId=spreadsheet_id,
+                ranges=[self.range_for(name) for name in sheets],
+                valueRenderOption="UNFORMATTED_VALUE",
+                dateTimeRenderOption="FORMATTED_STRING",
+                fields="valueRanges.values",
+            ))
+        except RefreshError as exc:
+            _raise_refresh_error(exc)
+
+        value_ranges = result.get("valueRanges", [])
+        return {
+            name: [[_cell_to_str(cell) for cell in row] for row in value_range.get("values", [])]
+            for name, value_range in zip(sheets, value_ranges)
+        }
+
+
+_planner = SheetFetchPlanner()
+
+
+def load_raw_values(sheet_name: str) -> list[list[str]]:
+    """Загружает указанный лист в границах его реального размера."""
+    return _planner.batch_get([sheet_name]).get(sheet_name, [])
+
+
+# ===========================
+#        ВАЛИДАЦИЯ
+# ===========================
+
+def validate_mapping(mapping_raw: list[list[str]]) -> dict[str, str]:
+    """Проверяет лист "Чаты" и возвращает соответствие chat_name → chat_id."""
+    if not mapping_raw:
+        raise RuntimeError("Лист 'Чаты' пуст")
+
+    chat_name_to_id: dict[str, str] = {}
 
     for row in mapping_raw[1:]:
         # Пустая строка → пропускаем
@@ -123,14 +402,40 @@ def validate_table(access_raw: list[list[str]], mapping_raw: list[list[str]]):
             logger.warning(f"⚠️ Чат '{chat_name}' не имеет chat_id — пропускаю")
             continue  # важно: просто пропускаем
 
-        if not chat_id.startswith("-100"):
-            logger.warning(f"⚠️ Возможно некорректный chat_id '{chat_id}' для чата '{chat_name}'")
+        try:
+            int(chat_id)
+        except ValueError:
+            logger.warning(
+                f"⚠️ chat_id '{chat_id}' для чата '{chat_name}' не число — доступ в этот чат не выдаётся"
+            )
+        else:
+            if not chat_id.startswith("-100"):
+                logger.warning(f"⚠️ Возможно некорректный chat_id '{chat_id}' для чата '{chat_name}'")
 
         chat_name_to_id[chat_name] = chat_id
 
     if not chat_name_to_id:
         raise RuntimeError("В листе 'Чаты' нет ни одного корректного чата")
 
+    return chat_name_to_id
+
+
+def validate_access_headers(access_raw: list[list[str]], chat_name_to_id: dict[str, str]) -> None:
+    """Проверяет заголовки листа "Доступы" относительно листа "Чаты"."""
+    if not access_raw:
+        raise RuntimeError("Лист 'Доступы' пуст")
+
+    headers = access_raw[0]
+
+    required_cols = {"tg_id", "username", "fio"}
+    missing = required_cols - set(headers)
+    if missing:
+        raise RuntimeError(f"В листе 'Доступы' отсутствуют обязательные колонки: {missing}")
+
+    chat_columns = [h for h in headers if h not in required_cols]
+    if not chat_columns:
+        raise RuntimeError("В листе 'Доступы' нет колонок чатов")
+
     # Проверяем соответствие заголовков чатов
     for col in chat_columns:
         if col not in chat_name_to_id:
@@ -139,6 +444,11 @@ def validate_table(access_raw: list[list[str]], mapping_raw: list[list[str]]):
                 f"но отсутствует в листе 'Чаты' — пользователи не получат этот чат"
             )
 
+
+def validate_access(access_raw: list[list[str]], chat_name_to_id: dict[str, str]) -> None:
+    """Проверяет лист "Доступы" относительно уже провалидированного листа "Чаты"."""
+    validate_access_headers(access_raw, chat_name_to_id)
+
     # ────────────────────────
     #  ПРОВЕРКА tg_id
     # ────────────────────────
@@ -158,7 +468,13 @@ def validate_table(access_raw: list[list[str]], mapping_raw: list[list[str]]):
 
         seen.add(tg)
 
+
+def validate_table(access_raw: list[list[str]], mapping_raw: list[list[str]]) -> dict[str, str]:
+    logger.info("🔍 Проверяю таблицу...")
+    chat_name_to_id = validate_mapping(mapping_raw)
+    validate_access(access_raw, chat_name_to_id)
     logger.info("✔ Валидация успешно пройдена")
+    return chat_name_to_id
 
 
 # ===========================
@@ -168,29 +484,30 @@ def validate_table(access_raw: list[list[str]], mapping_raw: list[list[str]]):
 def sheet_changed():
     """
     Определение изменений:
-    1) modifiedTime (мгновенно)
+    1) modifiedTime (мгновенно) — тем же запросом приходят размеры листов
     2) fallback-хэш с debounce (1 раз в 10 сек)
     """
-    global last_modified, last_hash, last_hash_time
+    global last_hash_time, _pending_modified, _pending_hash
+
+    from google.auth.exceptions import RefreshError
+    from googleapiclient.errors import HttpError
 
     service = _get_service()
     spreadsheet_id = _get_spreadsheet_id()
 
     try:
-        meta = service.spreadsheets().get(
+        meta = _execute(service.spreadsheets().get(
             spreadsheetId=spreadsheet_id,
-            fields="properties.modifiedTime"
-        ).execute()
+            fields="properties.modifiedTime,sheets.properties(title,gridProperties(rowCount,columnCount))"
+        ))
+
+        _planner.update_grids(meta.get("sheets", []))
 
         modified = meta["properties"]["modifiedTime"]
         new_time = datetime.fromisoformat(modified.replace("Z", "+00:00"))
 
-        if last_modified is None:
-            last_modified = new_time
-            return True
-
         if new_time != last_modified:
-            last_modified = new_time
+            _pending_modified = new_time
             return True
 
         return False
@@ -200,7 +517,6 @@ def sheet_changed():
     except HttpError:
         pass
 
-    import time
     now = time.time()
 
     if now - last_hash_time < 10:
@@ -208,83 +524,357 @@ def sheet_changed():
 
     last_hash_time = now
 
-    rows = load_raw_values("Доступы")
+    rows = load_raw_values(ACCESS_SHEET)
     new_hash = hashlib.md5(json.dumps(rows, sort_keys=True).encode()).hexdigest()
 
-    if last_hash is None:
-        last_hash = new_hash
-        return True
-
     if new_hash != last_hash:
-        last_hash = new_hash
+        _pending_hash = new_hash
         return True
 
     return False
 
 
+def mark_synced() -> None:
+    """Изменение, найденное sheet_changed(), загружено — запоминаем его версию."""
+    global last_modified, last_hash, _pending_modified, _pending_hash
+    if _pending_modified is not None:
+        last_modified = _pending_modified
+    if _pending_hash is not None:
+        last_hash = _pending_hash
+    _pending_modified = _pending_hash = None
+
+
 # ===========================
 #      ЗАГРУЗКА ТАБЛИЦЫ
 # ===========================
 
+class AccessSheetLayout:
+    """
+    Разметка листа "Доступы", вычисленная один раз по заголовкам.
+
+    Позиции tg_id/username/fio и колонок чатов (вместе с уже разобранным
+    chat_id) находятся заранее, поэтому строка разбирается обращением к
+    ячейкам по индексам — без словаря на строку, без сравнения имён колонок
+    и без повторной нормализации: запись сразу получается в том виде,
+    который даёт `normalize_user_record`.
+    """
+
+    __slots__ = (
+        "tg_index", "username_index", "fio_index",
+        "_chat_indexes", "_chat_ids", "_unknown", "unknown_marks",
+    )
+
+    def __init__(self, headers: list[str], chat_name_to_id: Mapping[str, str]) -> None:
+        # Как у dict(zip(headers, row)): при повторе имени берётся последняя колонка
+        positions: dict[str, int] = {}
+        for index, name in enumerate(headers):
+            positions[name] = index
+
+        self.tg_index = positions["tg_id"]
+        self.username_index = positions.get("username")
+        self.fio_index = positions.get("fio")
+
+        chat_columns: list[tuple[int, int | None]] = []
+        unknown: dict[int, str] = {}
+        for name, index in positions.items():
+            if name in _FIXED_COLUMNS:
+                continue
+            raw_id = chat_name_to_id.get(name)
+            if not raw_id:
+                unknown[index] = name
+                chat_columns.append((index, None))
+                continue
+            try:
+                chat_columns.append((index, int(raw_id.strip())))
+            except ValueError:
+                # Некорректный chat_id в "Чаты" уже отмечен валидацией — доступ не выдаём
+                continue
+
+        chat_columns.sort()
+        self._chat_indexes = [index for index, _ in chat_columns]
+        self._chat_ids = [chat_id for _, chat_id in chat_columns]
+        self._unknown = unknown
+        # Сколько "+" стоит в колонках, которых нет в листе "Чаты" (по названию колонки)
+        self.unknown_marks: dict[str, int] = {}
+
+    def tg_cell(self, row: list[str]) -> str:
+        return row[self.tg_index].strip() if len(row) > self.tg_index else ""
+
+    def parse_row(self, row: list[str], tg_id: int) -> dict[str, Any]:
+        """Нормализованная запись пользователя по строке с уже проверенным tg_id."""
+        size = len(row)
+        # Sheets API обрезает хвостовые пустые ячейки — дальше длины строки не смотрим
+        limit = bisect.bisect_left(self._chat_indexes, size)
+
+        chats: list[int] = []
+        chat_ids = self._chat_ids
+        for position in range(limit):
+            cell = row[self._chat_indexes[position]]
+            if not cell or (cell != "+" and cell.strip() != "+"):
+                continue
+            chat_id = chat_ids[position]
+            if chat_id is None:
+                name = self._unknown[self._chat_indexes[position]]
+                self.unknown_marks[name] = self.unknown_marks.get(name, 0) + 1
+            elif chat_id not in chats:
+                chats.append(chat_id)
+
+        username_index, fio_index = self.username_index, self.fio_index
+        return {
+            "tg_id": tg_id,
+            "username": row[username_index].strip() if username_index is not None and username_index < size else "",
+            "fio": row[fio_index].strip() if fio_index is not None and fio_index < size else "",
+            "role": "",
+            "chats": chats,
+        }
+
+    def report_unknown_marks(self) -> None:
+        """Одно предупреждение на колонку вместо предупреждения на каждую строку."""
+        for name, count in self.unknown_marks.items():
+            logger.warning(
+                f"⚠️ В таблице 'Доступы' указано '+' ({count} шт.), "
+                f"но чат '{name}' отсутствует в листе 'Чаты' – пропускаю"
+            )
+        self.unknown_marks.clear()
+
+
+def _checked_tg_id(tg: str, seen: set[int]) -> int:
+    """Проверяет формат и уникальность tg_id (как validate_access) и возвращает его."""
+    if not tg.isdigit():
+        raise RuntimeError(f"Некорректный tg_id: '{tg}'")
+    tg_id = int(tg)
+    if tg_id in seen:
+        raise RuntimeError(f"Дублирующийся tg_id: {tg}")
+    seen.add(tg_id)
+    return tg_id
+
+
+def parse_access(access_raw: list[list[str]], chat_name_to_id: Mapping[str, str]) -> list[dict[str, Any]]:
+    """
+    Проверяет и разбирает лист "Доступы" за один проход.
+
+    Заголовки проверяются и раскладываются по позициям один раз, затем
+    каждая строка валидируется (tg_id) и сразу превращается в
+    нормализованную запись.
+    """
+    validate_access_headers(access_raw, chat_name_to_id)
+    layout = AccessSheetLayout(access_raw[0], chat_name_to_id)
+
+    seen: set[int] = set()
+    data = []
+    for row in access_raw[1:]:
+        tg = layout.tg_cell(row)
+        if not tg:
+            continue
+        data.append(layout.parse_row(row, _checked_tg_id(tg, seen)))
+
+    layout.report_unknown_marks()
+    return data
+
+
 def load_table() -> list[dict[str, Any]]:
     logger.info("📄 Загружаю Google Sheet...")
 
-    access_raw = load_raw_values("Доступы")
-    mapping_raw = load_raw_values("Чаты")
+    access_raw, chat_name_to_id = _planner.fetch()
+    data = parse_access(access_raw, chat_name_to_id)
 
-    # ---- ВАЛИДАЦИЯ ----
-    validate_table(access_raw, mapping_raw)
+    logger.info(f"✔ Загружено {len(data)} строк")
+    return data
 
-    headers = access_raw[0]
-    rows = access_raw[1:]
 
-    # Собираем соответствие чатов
-    chat_name_to_id = {
-        row[0].strip(): row[1].strip()
-        for row in mapping_raw[1:]
-        if len(row) >= 2 and row[0].strip()
-    }
+# ===========================
+#   ИНКРЕМЕНТАЛЬНАЯ ЗАГРУЗКА
+# ===========================
 
-    data = []
+@dataclass(slots=True)
+class TableDelta:
+    """
+    Результат инкрементальной загрузки листа "Доступы".
 
-    for row in rows:
-        if not row or not row[0].strip():
+    changed — только строки, чей дайджест изменился (ключ — tg_id).
+              None означает, что строка есть в таблице, но не прошла нормализацию.
+    digests — дайджесты всех строк текущей версии таблицы.
+    """
+    changed: dict[str, dict[str, Any] | None]
+    digests: dict[str, str]
+
+
+def _digest_seed(headers: list[str], chat_name_to_id: dict[str, str]) -> Any:
+    """
+    Хэш контекста разбора строк. Если поменялись заголовки или лист "Чаты",
+    меняются дайджесты всех строк — и все они будут разобраны заново.
+    """
+    seed = hashlib.blake2b(digest_size=16)
+    context = [headers, sorted(chat_name_to_id.items())]
+    seed.update(json.dumps(context, ensure_ascii=False).encode())
+    return seed
+
+
+def load_table_delta(previous_digests: Mapping[str, str]) -> TableDelta:
+    """
+    Загружает таблицу и разбирает только добавленные и изменённые строки.
+
+    Для каждой строки считается дайджест содержимого; строки с тем же
+    дайджестом, что и в прошлой синхронизации, не разбираются и не
+    нормализуются повторно. Проверка tg_id (формат и уникальность)
+    по-прежнему выполняется для всех строк — это дёшево и защищает
+    от дубликатов между старыми и новыми строками.
+    """
+    logger.info("📄 Загружаю Google Sheet...")
+
+    access_raw, chat_name_to_id = _planner.fetch()
+    validate_access_headers(access_raw, chat_name_to_id)
+
+    headers = access_raw[0]
+    seed = _digest_seed(headers, chat_name_to_id)
+    layout = AccessSheetLayout(headers, chat_name_to_id)
+
+    changed: dict[str, dict[str, Any] | None] = {}
+    digests: dict[str, str] = {}
+
+    for row in access_raw[1:]:
+        tg = layout.tg_cell(row)
+        if not tg:
             continue
 
-        row_dict = dict(zip(headers, row))
+        if not tg.isdigit():
+            raise RuntimeError(f"Некорректный tg_id: '{tg}'")
+
+        tg_id = int(tg)
+        key = str(tg_id)
+        # Уникальность проверяется по дайджестам — отдельное множество не нужно
+        if key in digests:
+            raise RuntimeError(f"Дублирующийся tg_id: {tg}")
+
+        hasher = seed.copy()
+        hasher.update("\x1f".join(row).encode())
+        digest = hasher.hexdigest()
+        digests[key] = digest
 
-        tg_id = row_dict.get("tg_id", "").strip()
-        if not tg_id:
+        if previous_digests.get(key) == digest:
             continue
 
-        # доступные чаты
-        user_chats = []
-        for col_name, value in row_dict.items():
-            if col_name in ("tg_id", "username", "fio"):
-                continue
-            if value.strip() == "+":
-                chat_id = chat_name_to_id.get(col_name)
-                if chat_id:
-                    user_chats.append(chat_id)
-                else:
-                    logger.warning(
-                        f"⚠️ В таблице 'Доступы' указано '+', "
-                        f"но чат '{col_name}' отсутствует в листе 'Чаты' – пропускаю"
-            )
+        changed[key] = layout.parse_row(row, tg_id)
 
+    layout.report_unknown_marks()
+    logger.info(f"✔ Строк в таблице: {len(digests)}, изменилось: {len(changed)}")
+    return TableDelta(changed=changed, digests=digests)
 
 
-        record = {
-            "tg_id": tg_id,
-            "username": row_dict.get("username", ""),
-            "fio": row_dict.get("fio", ""),
-            "chats": user_chats,
-        }
+# ===========================
+#   PUSH-УВЕДОМЛЕНИЯ DRIVE
+# ===========================
 
-        try:
-            data.append(normalize_user_record(record))
-        except UserDataError as exc:
-            logger.warning("Пропускаю строку tg_id=%s: %s", tg_id, exc)
+def watch_spreadsheet(channel_id: str, address: str, token: str, ttl: float) -> dict[str, Any]:
+    """
+    Подписывает webhook `address` на изменения файла таблицы (Drive files.watch).
 
-    logger.info(f"✔ Загружено {len(data)} строк")
-    return data
+    Возвращает описание канала: id, resourceId и expiration (мс с эпохи).
+    """
+    service = _get_drive_service()
+    body = {
+        "id": channel_id,
+        "type": "web_hook",
+        "address": address,
+        "token": token,
+        "expiration": int((time.time() + ttl) * 1000),
+    }
+    return _send(service.files().watch(
+        fileId=_get_spreadsheet_id(),
+        body=body,
+        supportsAllDrives=True,
+    ))
+
+
+def stop_watch(channel_id: str, resource_id: str) -> None:
+    """Отписывает канал уведомлений Drive."""
+    service = _get_drive_service()
+    _send(service.channels().stop(body={"id": channel_id, "resourceId": resource_id}))
+
+
+# ===========================
+#    АСИНХРОННЫЙ КЛИЕНТ
+# ===========================
+
+class SheetsTimeoutError(RuntimeError):
+    """Запрос к Google Sheets не уложился в отведённое время."""
+
+
+class AsyncSheetsClient:
+    """
+    Асинхронная обёртка над синхронным стеком googleapiclient/httplib2.
+
+    Все обращения к Google выполняются в отдельном однопоточном executor'е:
+    клиент googleapiclient не потокобезопасен, а глобальное состояние
+    `sheet_changed()` не рассчитано на параллельные вызовы. Event loop aiogram
+    при этом никогда не блокируется сетевым I/O. Перед отправкой вызов
+    резервирует в бюджете квоты место под наихудшее число своих запросов.
+    С `transport` сами HTTP-запросы идут через общий пул соединений бота.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float = SHEETS_REQUEST_TIMEOUT,
+        transport: "HttpTransport | None" = None,
+    ) -> None:
+        self._timeout = timeout
+        self._transport = transport
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gsheets")
+
+    @property
+    def quota(self) -> QuotaBudget:
+        return _quota
+
+    async def warm_up(self) -> None:
+        """Заранее импортирует библиотеки Google и строит клиент (вне event loop)."""
+        await self._call(_get_service)
+
+    async def sheet_changed(self) -> bool:
+        return await self._call(sheet_changed, cost=_CHECK_COST)
+
+    def mark_synced(self) -> None:
+        mark_synced()
+
+    async def load_table(self) -> list[dict[str, Any]]:
+        return await self._call(load_table, cost=_LOAD_COST)
+
+    async def load_table_delta(self, previous_digests: Mapping[str, str]) -> TableDelta:
+        return await self._call(load_table_delta, previous_digests, cost=_LOAD_COST)
+
+    async def load_raw_values(self, sheet_name: str) -> list[list[str]]:
+        return await self._call(load_raw_values, sheet_name, cost=1)
+
+    async def watch_spreadsheet(
+        self, channel_id: str, address: str, token: str, ttl: float
+    ) -> dict[str, Any]:
+        return await self._call(watch_spreadsheet, channel_id, address, token, ttl)
+
+    async def stop_watch(self, channel_id: str, resource_id: str) -> None:
+        await self._call(stop_watch, channel_id, resource_id)
+
+    async def _call(self, func: Callable[..., T], *args: Any, cost: int = 0) -> T:
+        if cost:
+            await _quota.reserve(cost)
+        loop = asyncio.get_running_loop()
+        if self._transport is not None and _transport_loop is not loop:
+            _use_transport(self._transport, loop)
+        future = loop.run_in_executor(self._executor, func, *args)
+        name = func.__name__
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(future, timeout=self._timeout)
+        except asyncio.TimeoutError as exc:
+            SHEETS_ERRORS.inc(call=name, error="timeout")
+            raise SheetsTimeoutError(
+                f"Google Sheets не ответил за {self._timeout:.0f} сек ({name})"
+            ) from exc
+        except Exception as exc:
+            SHEETS_ERRORS.inc(call=name, error=type(exc).__name__)
+            raise
+        finally:
+            SHEETS_LATENCY.observe(time.perf_counter() - started, call=name)
+
+    def close(self) -> None:
+        """Останавливает executor, отменяя ещё не начатые запросы."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import ssl
+import time
+from types import SimpleNamespace
+from typing import Any, Mapping
+
+import aiohttp
+import certifi
+from aiogram.client.session.aiohttp import AiohttpSession
+
+from src.utils.logger import logger
+
+
+class HttpTransport:
+    """
+    Общий пул HTTP-соединений для Bot API и Google API.
+
+    Владеет одним долгоживущим `aiohttp.ClientSession` с keep-alive
+    коннектором: общий лимит соединений, лимит на хост и кэш DNS. Через
+    `TraceConfig` считает, сколько запросов ушло по уже открытому
+    соединению (попадания в пул), сколько соединений пришлось открыть и
+    сколько раз запрос ждал свободного слота пула.
+    """
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 30,
+        keepalive_timeout: float = 60.0,
+        dns_ttl: int = 300,
+    ) -> None:
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_ttl = dns_ttl
+        self._session: aiohttp.ClientSession | None = None
+        self._counters = {
+            "requests": 0,
+            "pool_hits": 0,
+            "connections_created": 0,
+            "pool_waits": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+        self._wait_seconds = 0.0
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Общая сессия; создаётся при первом обращении внутри event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+                ttl_dns_cache=self._dns_ttl,
+                use_dns_cache=True,
+                ssl=ssl.create_default_context(cafile=certifi.where()),
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[self._trace_config()],
+            )
+        return self._session
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Mapping[str, str] | None = None,
+        data: Any = None,
+        timeout: float | None = None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Выполняет запрос и возвращает статус, заголовки и тело ответа."""
+        session = await self.session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        async with session.request(
+            method, url, headers=headers, data=data, timeout=client_timeout
+        ) as response:
+            content = await response.read()
+            return response.status, dict(response.headers), content
+
+    def stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = dict(self._counters)
+        stats["pool_wait_seconds"] = round(self._wait_seconds, 3)
+        connector = self._session.connector if self._session else None
+        if isinstance(connector, aiohttp.TCPConnector):
+            stats["limit"] = connector.limit
+            stats["limit_per_host"] = connector.limit_per_host
+        return stats
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            # Даём SSL-соединениям закрыться до остановки event loop
+            await asyncio.sleep(0)
+        logger.info(f"✔ HTTP-пул закрыт: {self.stats()}")
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+        counters = self._counters
+
+        async def _on_request_start(_session: Any, _context: Any, _params: Any) -> None:
+            counters["requests"] += 1
+
+        async def _on_reuse(_session: Any, _context: Any, _params: Any) -> None:
+            counters["pool_hits"] += 1
+
+        async def _on_create(_session: Any, _context: Any, _params: Any) -> None:
+            counters["connections_created"] += 1
+
+        async def _on_queued_start(_session: Any, context: SimpleNamespace, _params: Any) -> None:
+            counters["pool_waits"] += 1
+            context.queued_at = time.perf_counter()
+
+        async def _on_queued_end(_session: Any, context: SimpleNamespace, _params: Any) -> None:
+            queued_at = getattr(context, "queued_at", None)
+            if queued_at is not None:
+                self._wait_seconds += time.perf_counter() - queued_at
+
+        async def _on_dns_hit(_session: Any, _context: Any, _params: Any) -> None:
+            counters["dns_cache_hits"] += 1
+
+        async def _on_dns_miss(_session: Any, _context: Any, _params: Any) -> None:
+            counters["dns_cache_misses"] += 1
+
+        trace.on_request_start.append(_on_request_start)
+        trace.on_connection_reuseconn.append(_on_reuse)
+        trace.on_connection_create_end.append(_on_create)
+        trace.on_connection_queued_start.append(_on_queued_start)
+        trace.on_connection_queued_end.append(_on_queued_end)
+        trace.on_dns_cache_hit.append(_on_dns_hit)
+        trace.on_dns_cache_miss.append(_on_dns_miss)
+        return trace
+
+
+class PooledAiohttpSession(AiohttpSession):
+    """
+    Сессия aiogram поверх общего `HttpTransport`.
+
+    Соединения принадлежат транспорту, поэтому `close()` сессии их не
+    закрывает: перезапуск polling продолжает пользоваться тем же пулом.
+    """
+
+    def __init__(self, transport: HttpTransport, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._transport = transport
+
+    async def create_session(self) -> aiohttp.ClientSession:
+        return await self._transport.session()
+
+    async def close(self) -> None:
+        return None
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import GetUpdates, Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from src.utils.logger import logger
+from src.utils.metrics import REGISTRY, MetricsRegistry
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.types import TelegramObject
+    from aiohttp import web
+
+    from src.services.container import ServiceContainer
+    from src.services.webhook_runner import WebhookRunner
+
+HANDLER_LATENCY = REGISTRY.histogram(
+    "bot_handler_duration_seconds",
+    "Время выполнения обработчиков апдейтов",
+    ["handler"],
+)
+HANDLER_ERRORS = REGISTRY.counter(
+    "bot_handler_errors_total",
+    "Необработанные исключения в обработчиках апдейтов",
+    ["handler"],
+)
+TELEGRAM_LATENCY = REGISTRY.histogram(
+    "telegram_request_duration_seconds",
+    "Длительность запросов к Bot API (без ожидания в планировщике)",
+    ["method"],
+)
+TELEGRAM_REQUESTS = REGISTRY.counter(
+    "telegram_requests_total",
+    "Запросы к Bot API по методам и результату",
+    ["method", "result"],
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "queue_depth",
+    "Длина внутренних очередей бота",
+    ["queue"],
+)
+SHEETS_QUOTA_USED = REGISTRY.gauge(
+    "sheets_quota_used",
+    "Запросы к Sheets API в текущем окне квоты",
+)
+SHEETS_POLL_INTERVAL = REGISTRY.gauge(
+    "sheets_poll_interval_seconds",
+    "Текущий интервал опроса таблицы",
+)
+
+
+def register_service_gauges(
+    services: "ServiceContainer", webhook: "WebhookRunner | None" = None
+) -> None:
+    """Привязывает gauge к очередям сервисов: значения считаются при каждом scrape."""
+    QUEUE_DEPTH.set_function(lambda: services.delivery.depth, queue="delivery")
+    QUEUE_DEPTH.set_function(lambda: services.removals.pending, queue="removals")
+    QUEUE_DEPTH.set_function(
+        lambda: services.telegram_scheduler.stats()["interactive_waiting"], queue="telegram_interactive"
+    )
+    QUEUE_DEPTH.set_function(
+        lambda: services.telegram_scheduler.stats()["background_waiting"], queue="telegram_background"
+    )
+    if services.join_admission:
+        admission = services.join_admission
+        QUEUE_DEPTH.set_function(lambda: admission.pending, queue="join_requests")
+    if webhook is not None:
+        QUEUE_DEPTH.set_function(lambda: webhook.depth, queue="webhook_updates")
+    SHEETS_QUOTA_USED.set_function(lambda: services.sheets.quota.stats()["used"])
+    SHEETS_POLL_INTERVAL.set_function(lambda: services.sync_worker.poll_state()["interval"])
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner-middleware: латентность и ошибки каждого обработчика по имени функции."""
+
+    async def __call__(
+        self,
+        handler: Callable[["TelegramObject", Dict[str, Any]], Awaitable[Any]],
+        event: "TelegramObject",
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        name = getattr(callback, "__name__", "unknown")
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=name)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, handler=name)
+
+    def install(self, dispatcher: Dispatcher) -> None:
+        """Подключает middleware ко всем типам апдейтов диспетчера."""
+        for event_name, observer in dispatcher.observers.items():
+            if event_name in {"update", "error"}:
+                continue
+            observer.middleware(self)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Session-middleware: время и исход каждого запроса к Bot API по методу.
+
+    Подключается после планировщика, поэтому измеряет сам HTTP-запрос,
+    а не время ожидания в очереди лимитов.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if isinstance(method, GetUpdates):
+            # Long polling висит до таймаута — его длительность ничего не говорит
+            return await make_request(bot, method)
+
+        name = method.__api_method__
+        started = time.perf_counter()
+        result = "ok"
+        try:
+            return await make_request(bot, method)
+        except TelegramAPIError as exc:
+            result = type(exc).__name__
+            raise
+        except Exception:
+            result = "network_error"
+            raise
+        finally:
+            TELEGRAM_LATENCY.observe(time.perf_counter() - started, method=name)
+            TELEGRAM_REQUESTS.inc(method=name, result=result)
+
+
+class MetricsServer:
+    """HTTP-эндпоинт с метриками в текстовом формате Prometheus."""
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        port: int,
+        path: str = "/metrics",
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._path = path
+        self._registry = registry
+
+    def build_app(self) -> web.Application:
+        # aiohttp.web импортируется только при включённом эндпоинте
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get(self._path, self._handle)
+        return app
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        from aiohttp import web
+
+        runner = web.AppRunner(self.build_app())
+        await runner.setup()
+        site = web.TCPSite(runner, self._host, self._port)
+        await site.start()
+        logger.info(f"▶ Метрики доступны на {self._host}:{self._port}{self._path}")
+        try:
+            await stop_event.wait()
+        finally:
+            await runner.cleanup()
+            logger.info("✔ Сервер метрик остановлен")
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        from aiohttp import web
+
+        return web.Response(text=self._registry.render(), content_type="text/plain", charset="utf-8")
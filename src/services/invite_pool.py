@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import suppress
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+from src.services.telegram_scheduler import Lane, telegram_lane
+from src.storage.cache import CacheRepository
+from src.utils.json_store import JsonKeyValueStore
+from src.utils.logger import logger
+
+Assignment = Tuple[int, int]  # (chat_id, tg_id)
+
+# Старый формат: пул и все выдачи под одним ключом
+_LEGACY_POOL_KEY = "pool"
+# Запас ссылок чата и выдачи хранятся отдельными записями журнала
+_AVAILABLE_PREFIX = "p:"
+_ASSIGNED_PREFIX = "a:"
+_LINK_NAME = "AutoControlBot"
+
+
+class InviteLinkPool:
+    """
+    Пул одноразовых ссылок-приглашений (member_limit=1) для управляемых чатов.
+
+    Ссылки выпускаются заранее фоновым пополнением, а на /start и в
+    уведомлениях выдаются за O(1): пользователь получает личную ссылку,
+    закреплённую за парой (чат, пользователь), и при повторном запросе —
+    ту же самую, пока по ней никто не вошёл. Общая ссылка чата больше не
+    раздаётся. Вход по ссылке отмечается (`mark_used`), а при отзыве доступа
+    неиспользованная ссылка отзывается (`revoke`). Пул и выдачи
+    сохраняются на диск отдельными записями журнала — выдача ссылки
+    дописывает только изменившиеся записи — и переживают перезапуск.
+
+    Апдейт chat_member о входе по ссылке может потеряться (бот был
+    остановлен, Telegram его не доставил), и тогда уже использованная
+    ссылка выглядела бы свободной. Поэтому выданная ссылка старше
+    `refill_interval` при повторном запросе не возвращается как есть:
+    она отзывается, и пользователь получает свежую.
+
+    В режиме заявок (`join_request`) ссылки создаются с
+    creates_join_request=True: Telegram не позволяет совмещать его с
+    member_limit, поэтому ссылки не одноразовые, но каждый вход всё равно
+    проходит через одобрение заявки, а личная ссылка по-прежнему отзывается.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        cache: CacheRepository,
+        store_path: Path,
+        *,
+        size: int = 3,
+        refill_interval: float = 300.0,
+        join_request: bool = False,
+    ) -> None:
+        self._bot = bot
+        self._cache = cache
+        self._store = JsonKeyValueStore(store_path)
+        self._size = max(1, size)
+        self._refill_interval = refill_interval
+        self._join_request = join_request
+        self._available: Dict[int, Deque[str]] = {}
+        self._assigned: Dict[Assignment, str] = {}
+        self._owners: Dict[str, Assignment] = {}
+        self._issued_at: Dict[Assignment, float] = {}
+        self._used: Set[str] = set()
+        self._inflight: Dict[Assignment, asyncio.Future[Optional[str]]] = {}
+        self._loaded = False
+        self._wakeup = asyncio.Event()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "available": sum(len(links) for links in self._available.values()),
+            "assigned": len(self._assigned),
+            "used": len(self._used),
+        }
+
+    async def take(self, chat_id: int, tg_id: int) -> Optional[str]:
+        """Личная одноразовая ссылка пользователя в чат (из пула или выпущенная сразу)."""
+        await self._ensure_loaded()
+        key = (chat_id, tg_id)
+        # Параллельные запросы одной пары (двойной /start, /start и уведомление)
+        # ждут одну выдачу — иначе каждый выпустил бы свою ссылку, и лишняя
+        # осталась бы неотозванной
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future[Optional[str]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            link = await self._take(key)
+            future.set_result(link)
+            return link
+        except BaseException:
+            if not future.done():
+                future.set_result(None)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _take(self, key: Assignment) -> Optional[str]:
+        chat_id = key[0]
+        previous = self._assigned.get(key)
+        if previous is not None and previous not in self._used:
+            if time.time() - self._issued_at.get(key, 0.0) < self._refill_interval:
+                return previous
+        else:
+            previous = None
+
+        available = self._available.get(chat_id)
+        if available:
+            link = available.popleft()
+        else:
+            # Пул чата пуст (новый чат или всё раздали) — выпускаем ссылку сразу
+            link = await self._mint(chat_id)
+            if link is None:
+                # Новую выпустить не удалось — старая ссылка лучше, чем никакой
+                return previous
+
+        self._forget(key)
+        self._assigned[key] = link
+        self._owners[link] = key
+        self._issued_at[key] = time.time()
+        if not available or len(available) < self._size:
+            self._wakeup.set()
+        await self._store.update(set_items=[self._assignment_item(key), self._available_item(chat_id)])
+
+        if previous is not None:
+            # Ссылка могла быть использована без апдейта chat_member — меняем её на свежую
+            with suppress(TelegramAPIError):
+                await self._bot.revoke_chat_invite_link(chat_id, previous)
+        return link
+
+    async def mark_used(self, chat_id: int, tg_id: int, link: str) -> None:
+        """Отмечает вход по ссылке из пула: одноразовая ссылка больше не действует."""
+        if self._join_request:
+            # Ссылка-заявка многоразовая и остаётся за пользователем
+            return
+        await self._ensure_loaded()
+        owner = self._owners.get(link)
+        if owner is None:
+            # Ссылка не из пула или ещё не выдана
+            for chat_links in self._available.values():
+                with suppress(ValueError):
+                    chat_links.remove(link)
+            return
+
+        self._used.add(link)
+        if owner != (chat_id, tg_id):
+            logger.warning(
+                f"[invite_pool] Ссылкой пользователя {owner[1]} в чат {chat_id} "
+                f"воспользовался {tg_id}"
+            )
+        await self._store.update(set_items=[self._assignment_item(owner)])
+
+    async def revoke(self, chat_id: int, tg_id: int) -> None:
+        """Доступ отозван — неиспользованная ссылка пользователя отзывается."""
+        await self._ensure_loaded()
+        link = self._assigned.get((chat_id, tg_id))
+        if link is None:
+            return
+
+        used = link in self._used
+        self._forget((chat_id, tg_id))
+        await self._store.update(delete_keys=[_assignment_key((chat_id, tg_id))])
+        if used:
+            return
+        try:
+            await self._bot.revoke_chat_invite_link(chat_id, link)
+        except TelegramAPIError as exc:
+            logger.warning(f"[invite_pool] Не удалось отозвать ссылку {tg_id} в чат {chat_id}: {exc}")
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        await self._ensure_loaded()
+        logger.info(f"▶ Запускаю пополнение пула ссылок-приглашений ({self._size} на чат)")
+
+        with telegram_lane(Lane.BACKGROUND):
+            while not stop_event.is_set():
+                try:
+                    await self._refill(stop_event)
+                except Exception as exc:
+                    logger.error(f"[invite_pool] Ошибка пополнения пула: {exc}")
+
+                self._wakeup.clear()
+                waiters = [
+                    asyncio.create_task(self._wakeup.wait()),
+                    asyncio.create_task(stop_event.wait()),
+                ]
+                try:
+                    await asyncio.wait(
+                        waiters, timeout=self._refill_interval, return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    for waiter in waiters:
+                        waiter.cancel()
+
+        logger.info(f"✔ Пул ссылок-приглашений остановлен: {self.stats()}")
+
+    async def _refill(self, stop_event: asyncio.Event) -> None:
+        managed = set(self._cache.managed_chats())
+
+        for chat_id in [chat_id for chat_id in self._available if chat_id not in managed]:
+            # Чат больше не управляется — его запас ссылок не нужен
+            for link in self._available.pop(chat_id):
+                with suppress(TelegramAPIError):
+                    await self._bot.revoke_chat_invite_link(chat_id, link)
+            await self._store.update(delete_keys=[_available_key(chat_id)])
+
+        for chat_id in managed:
+            available = self._available.setdefault(chat_id, deque())
+            minted = 0
+            while len(available) < self._size and not stop_event.is_set():
+                link = await self._mint(chat_id)
+                if link is None:
+                    break
+                available.append(link)
+                minted += 1
+            if minted:
+                await self._store.update(set_items=[self._available_item(chat_id)])
+                logger.info(f"[invite_pool] Чат {chat_id}: выпущено ссылок {minted}")
+
+    async def _mint(self, chat_id: int) -> Optional[str]:
+        try:
+            if self._join_request:
+                invite = await self._bot.create_chat_invite_link(
+                    chat_id, name=_LINK_NAME, creates_join_request=True
+                )
+            else:
+                invite = await self._bot.create_chat_invite_link(
+                    chat_id, name=_LINK_NAME, member_limit=1
+                )
+        except TelegramAPIError as exc:
+            logger.warning(f"[invite_pool] Не удалось создать ссылку в чат {chat_id}: {exc}")
+            return None
+        return invite.invite_link
+
+    def _forget(self, key: Assignment) -> None:
+        link = self._assigned.pop(key, None)
+        self._issued_at.pop(key, None)
+        if link is not None:
+            self._owners.pop(link, None)
+            self._used.discard(link)
+
+    def _assignment_item(self, key: Assignment) -> Tuple[str, list]:
+        link = self._assigned[key]
+        return _assignment_key(key), [link, link in self._used, self._issued_at.get(key, 0.0)]
+
+    def _available_item(self, chat_id: int) -> Tuple[str, List[str]]:
+        return _available_key(chat_id), list(self._available.get(chat_id) or ())
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        legacy = await self._store.get(_LEGACY_POOL_KEY)
+        if legacy is not None:
+            await self._migrate(legacy)
+
+        for key, value in await self._store.items():
+            try:
+                if key.startswith(_AVAILABLE_PREFIX):
+                    chat_id = int(key[len(_AVAILABLE_PREFIX):])
+                    self._available[chat_id] = deque(str(link) for link in value)
+                    continue
+                chat_id, tg_id = (int(part) for part in key[len(_ASSIGNED_PREFIX):].split(":"))
+                link, used, issued_at = value
+            except (TypeError, ValueError):
+                logger.warning(f"[invite_pool] Пропускаю некорректную запись: {key}")
+                continue
+            assignment = (chat_id, tg_id)
+            self._assigned[assignment] = link
+            self._owners[link] = assignment
+            self._issued_at[assignment] = float(issued_at)
+            if used:
+                self._used.add(link)
+        self._loaded = True
+
+    async def _migrate(self, legacy: object) -> None:
+        """Переносит пул из прежнего формата (один ключ) в отдельные записи."""
+        raw = legacy if isinstance(legacy, dict) else {}
+        items: List[Tuple[str, object]] = []
+        for chat_id, links in (raw.get("available") or {}).items():
+            with suppress(TypeError, ValueError):
+                items.append((_available_key(int(chat_id)), list(links)))
+        for item in raw.get("assigned") or []:
+            try:
+                chat_id, tg_id, link, used = item
+                key = (int(chat_id), int(tg_id))
+            except (TypeError, ValueError):
+                logger.warning(f"[invite_pool] Пропускаю некорректную запись: {item}")
+                continue
+            # Время выдачи неизвестно — такая ссылка при повторном запросе будет заменена
+            items.append((_assignment_key(key), [link, bool(used), 0.0]))
+        await self._store.update(set_items=items, delete_keys=[_LEGACY_POOL_KEY])
+
+
+def _assignment_key(key: Assignment) -> str:
+    chat_id, tg_id = key
+    return f"{_ASSIGNED_PREFIX}{chat_id}:{tg_id}"
+
+
+def _available_key(chat_id: int) -> str:
+    return f"{_AVAILABLE_PREFIX}{chat_id}"
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+from src.storage.cache import CacheRepository
+from src.utils.json_store import JsonKeyValueStore
+from src.utils.logger import logger
+
+JoinRequest = Tuple[int, int]  # (chat_id, user_id)
+
+
+class JoinRequestAdmission:
+    """
+    Пропуск в чаты через заявки на вступление (chat_join_request).
+
+    Заявки не обрабатываются по одной в хендлере: они копятся и разбираются
+    пачками — до `batch_size` заявок или через `flush_delay` секунд после
+    первой. Решение принимается по кэшу доступов в памяти, а approve/decline
+    выполняются не более `concurrency` одновременно. Повторная заявка того
+    же пользователя в тот же чат, пока первая ждёт, не дублируется. Так
+    посторонний не попадает в чат даже на мгновение, а волна заявок не
+    упирается в лимиты Bot API.
+
+    Очередь сохраняется на диск (каждая заявка — отдельная запись журнала):
+    заявки, не разобранные к остановке, разбираются после перезапуска.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        cache: CacheRepository,
+        queue_path: Path,
+        *,
+        batch_size: int = 50,
+        concurrency: int = 5,
+        flush_delay: float = 0.5,
+    ) -> None:
+        self._bot = bot
+        self._cache = cache
+        self._store = JsonKeyValueStore(queue_path)
+        self._batch_size = max(1, batch_size)
+        self._concurrency = max(1, concurrency)
+        self._flush_delay = flush_delay
+        # Порядок вставки = порядок разбора; значение — имя для логов
+        self._pending: Dict[JoinRequest, str] = {}
+        # Заявки, ещё не записанные на диск
+        self._unsaved: Dict[JoinRequest, str] = {}
+        self._wakeup = asyncio.Event()
+        self.approved = 0
+        self.declined = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, chat_id: int, user_id: int, name: str = "") -> None:
+        """Ставит заявку в очередь на разбор, не дожидаясь решения."""
+        request = (chat_id, user_id)
+        if request not in self._pending:
+            self._pending[request] = self._unsaved[request] = name or str(user_id)
+        self._wakeup.set()
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        await self._restore()
+        logger.info("▶ Запускаю разбор заявок на вступление")
+        while not stop_event.is_set():
+            await self._save_new()
+            if not self._pending:
+                self._wakeup.clear()
+                waiters = [
+                    asyncio.create_task(self._wakeup.wait()),
+                    asyncio.create_task(stop_event.wait()),
+                ]
+                try:
+                    await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for waiter in waiters:
+                        waiter.cancel()
+                continue
+
+            # Даём волне заявок накопиться, чтобы разобрать её одной пачкой
+            if len(self._pending) < self._batch_size:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop_event.wait(), timeout=self._flush_delay)
+
+            await self._run_batch()
+
+        await self._save_new()
+        if self._pending:
+            logger.info(f"⏸ Заявок на вступление отложено до перезапуска: {len(self._pending)}")
+        logger.info("✔ Разбор заявок на вступление остановлен")
+
+    async def _run_batch(self) -> None:
+        batch: List[Tuple[JoinRequest, str]] = list(self._pending.items())[: self._batch_size]
+        for request, _ in batch:
+            self._pending.pop(request, None)
+
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def _decide(request: JoinRequest, name: str) -> None:
+            chat_id, user_id = request
+            allowed = self._cache.user_has_access(user_id, chat_id)
+            async with semaphore:
+                try:
+                    if allowed:
+                        await self._bot.approve_chat_join_request(chat_id, user_id)
+                        self.approved += 1
+                    else:
+                        await self._bot.decline_chat_join_request(chat_id, user_id)
+                        self.declined += 1
+                except TelegramAPIError as exc:
+                    # Заявку мог уже разобрать администратор — это не ошибка бота
+                    logger.warning(f"[join_requests] Заявка {name} ({user_id}) в {chat_id}: {exc}")
+                    return
+            verdict = "одобрена" if allowed else "отклонена — пользователя нет в таблице"
+            logger.info(f"[join_requests] Заявка {name} ({user_id}) в {chat_id} {verdict}")
+
+        await asyncio.gather(*(_decide(request, name) for request, name in batch))
+        # Повторная заявка, пришедшая во время разбора, удаляется и тут же записывается снова
+        await self._save_new(done=[request for request, _ in batch])
+
+    async def _save_new(self, done: List[JoinRequest] | None = None) -> None:
+        done = done or []
+        if not self._unsaved and not done:
+            return
+        items = [(_store_key(request), name) for request, name in self._unsaved.items()]
+        self._unsaved.clear()
+        await self._store.update(set_items=items, delete_keys=[_store_key(request) for request in done])
+
+    async def _restore(self) -> None:
+        restored = 0
+        for key, name in await self._store.items():
+            try:
+                chat_id, user_id = (int(value) for value in key.split(":"))
+            except (TypeError, ValueError):
+                logger.warning(f"[join_requests] Пропускаю некорректную запись очереди: {key}")
+                continue
+            if (chat_id, user_id) not in self._pending:
+                self._pending[(chat_id, user_id)] = str(name)
+                restored += 1
+        if restored:
+            logger.info(f"[join_requests] Восстановлено заявок из очереди: {restored}")
+
+
+def _store_key(request: JoinRequest) -> str:
+    chat_id, user_id = request
+    return f"{chat_id}:{user_id}"
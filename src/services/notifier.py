@@ -4,14 +4,18 @@ import asyncio
 import html
 from contextlib import suppress
 from dataclasses import dataclass, field
-from typing import Any, Iterable, List, Mapping, Optional
+from typing import TYPE_CHECKING, Any, Iterable, List, Mapping, Optional
 
-from aiogram import Bot, types
+from aiogram import Bot
 
-from src.services.chat_utils import ensure_invite_link, get_chat, kick_user_from_chat
+from src.services.chat_metadata import ChatMetadata, ChatMetadataCache
+from src.services.chat_utils import ensure_invite_link
 from src.services.user_data import parse_chat_ids
 from src.utils.logger import logger
 
+if TYPE_CHECKING:
+    from src.services.invite_pool import InviteLinkPool
+
 
 # ============================
 #   МОДЕЛЬ СОБЫТИЯ ИЗМЕНЕНИЙ
@@ -39,6 +43,14 @@ class UserChangeEvent:
 class NotificationBuilder:
     """Собирает HTML-сообщение о том, что изменилось у пользователя."""
 
+    def __init__(
+        self,
+        chat_metadata: ChatMetadataCache,
+        invite_pool: InviteLinkPool | None = None,
+    ) -> None:
+        self._chat_metadata = chat_metadata
+        self._invite_pool = invite_pool
+
     async def build(self, bot: Bot, event: UserChangeEvent) -> Optional[str]:
         """
         Формирует готовое HTML-уведомление.
@@ -47,9 +59,9 @@ class NotificationBuilder:
 
         lines: List[str] = ["<b>🔔 Обновление доступа</b>"]
 
-        async def _chat(chat_id: int) -> Optional[types.Chat]:
-            """Получает объект чата без кеширования для экономии памяти."""
-            return await get_chat(bot, chat_id)
+        async def _chat(chat_id: int) -> Optional[ChatMetadata]:
+            """Метаданные чата из общего кэша (с TTL и мемоизацией на цикл синхронизации)."""
+            return await self._chat_metadata.get(bot, chat_id)
 
         async def _title(chat_id: int) -> Optional[str]:
             """Имя чата или None."""
@@ -58,8 +70,12 @@ class NotificationBuilder:
 
         async def _invite(chat_id: int) -> Optional[str]:
             """Гарантированно возвращает рабочий инвайт в чат."""
+            if self._invite_pool:
+                return await self._invite_pool.take(chat_id, event.tg_id)
             chat = await _chat(chat_id)
-            return await ensure_invite_link(bot, chat_id, chat)
+            if chat is None:
+                return None
+            return await ensure_invite_link(bot, chat_id, chat, metadata=self._chat_metadata)
 
         # ---- 1. Изменение роли ----
         if event.changed_role:
@@ -93,9 +109,7 @@ class NotificationBuilder:
                 title = await _title(chat_id)
                 name = html.escape(title or str(chat_id))
                 lines.append(f"• {name}")
-
-                # Исключаем пользователя из чата
-                await kick_user_from_chat(bot, chat_id, event.tg_id)
+                # Само исключение из чата выполняет RemovalExecutor
 
         return "\n".join(lines) if len(lines) > 1 else None
 
@@ -113,10 +127,17 @@ class NotificationService:
     чтобы разгрузить систему, если изменений много.
     """
 
-    def __init__(self, bot: Bot, *, delay: float = 0.0) -> None:
+    def __init__(
+        self,
+        bot: Bot,
+        chat_metadata: ChatMetadataCache,
+        *,
+        delay: float = 0.0,
+        invite_pool: InviteLinkPool | None = None,
+    ) -> None:
         self._bot = bot
         self._delay = max(0.0, delay)
-        self._builder = NotificationBuilder()
+        self._builder = NotificationBuilder(chat_metadata, invite_pool)
 
     async def notify(self, event: UserChangeEvent) -> None:
         """Собирает и отправляет уведомление пользователю."""
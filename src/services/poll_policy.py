@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque
+
+from src.utils.logger import logger
+
+
+class SheetsQuotaError(RuntimeError):
+    """Google ответил 429: квота запросов на чтение исчерпана."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaBudget:
+    """
+    Скользящее окно запросов к Sheets API (по умолчанию — минута).
+
+    Каждый фактически отправленный запрос отмечается через `record()` (из
+    потока executor'а), а перед вызовом `reserve()` дожидается, пока в окне
+    освободится место под его наихудшую стоимость. Так бот упирается в
+    собственный лимит раньше, чем Google начнёт отвечать 429.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window: float = 60.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limit = max(1, limit)
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sent: Deque[float] = deque()
+        self._blocked_until = 0.0
+        self._total = 0
+        self._waited = 0.0
+
+    def record(self, cost: int = 1) -> None:
+        now = self._clock()
+        with self._lock:
+            self._sent.extend([now] * cost)
+            self._total += cost
+
+    def exhaust(self, retry_after: float) -> None:
+        """Google всё-таки ответил 429 — не тратим бюджет до `retry_after`."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + retry_after)
+
+    def delay_for(self, cost: int = 1) -> float:
+        """Сколько секунд ждать, пока в окне появится место под `cost` запросов."""
+        now = self._clock()
+        with self._lock:
+            self._prune(now)
+            delay = max(0.0, self._blocked_until - now)
+            overflow = len(self._sent) + min(cost, self.limit) - self.limit
+            if overflow > 0:
+                delay = max(delay, self._sent[overflow - 1] + self.window - now)
+            return delay
+
+    async def reserve(self, cost: int = 1) -> None:
+        while True:
+            delay = self.delay_for(cost)
+            if delay <= 0:
+                return
+            logger.debug(f"[quota] Бюджет Sheets API исчерпан — жду {delay:.1f} сек")
+            self._waited += delay
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            self._prune(now)
+            used = len(self._sent)
+            blocked_for = max(0.0, self._blocked_until - now)
+        return {
+            "limit": self.limit,
+            "used": used,
+            "available": max(0, self.limit - used),
+            "blocked_for": round(blocked_for, 1),
+            "total_requests": self._total,
+            "waited_seconds": round(self._waited, 1),
+        }
+
+    def _prune(self, now: float) -> None:
+        horizon = now - self.window
+        while self._sent and self._sent[0] <= horizon:
+            self._sent.popleft()
+
+
+class AdaptivePollPolicy:
+    """
+    Интервал опроса таблицы, подстраивающийся под активность.
+
+    Правки в таблице идут сериями, поэтому сразу после найденного изменения
+    опрос ускоряется до `min_interval` и держится на нём `burst_polls`
+    проверок. Дальше, пока таблица не меняется, интервал растёт в `factor`
+    раз до `max_interval`. Ошибки и 429 дают отдельный экспоненциальный
+    backoff. Ко всем паузам добавляется случайный разброс ±`jitter`.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_interval: float = 2.0,
+        max_interval: float = 30.0,
+        factor: float = 1.5,
+        burst_polls: int = 3,
+        jitter: float = 0.2,
+        max_error_backoff: float = 300.0,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self._factor = max(1.0, factor)
+        self._burst_polls = max(0, burst_polls)
+        self._jitter = min(max(jitter, 0.0), 1.0)
+        self._max_error_backoff = max_error_backoff
+        self._rng = rng or random.Random()
+        self._interval = min_interval
+        self._idle_polls = 0
+        self._errors = 0
+        self._last_delay = min_interval
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def set_max_interval(self, max_interval: float) -> None:
+        """Меняет потолок интервала (например, при появлении push-подписки)."""
+        self.max_interval = max(self.min_interval, max_interval)
+        self._interval = min(self._interval, self.max_interval)
+
+    def on_poll(self, changed: bool) -> float:
+        """Учитывает результат успешной проверки и возвращает паузу до следующей."""
+        self._errors = 0
+        if changed:
+            self._interval = self.min_interval
+            self._idle_polls = 0
+        else:
+            self._idle_polls += 1
+            if self._idle_polls > self._burst_polls:
+                self._interval = min(self.max_interval, self._interval * self._factor)
+        return self._delay(self._interval)
+
+    def on_error(self) -> float:
+        self._errors += 1
+        return self._delay(self._error_backoff(self.min_interval))
+
+    def on_quota_exceeded(self, retry_after: float) -> float:
+        """После 429 ждём не меньше `retry_after` и уходим на медленный опрос."""
+        self._errors += 1
+        self._interval = self.max_interval
+        self._idle_polls = self._burst_polls
+        return max(retry_after, self._delay(self._error_backoff(retry_after or self.min_interval)))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "interval": round(self._interval, 2),
+            "last_delay": round(self._last_delay, 2),
+            "idle_polls": self._idle_polls,
+            "error_streak": self._errors,
+        }
+
+    def _error_backoff(self, base: float) -> float:
+        return min(self._max_error_backoff, base * 2 ** (self._errors - 1))
+
+    def _delay(self, base: float) -> float:
+        spread = base * self._jitter
+        self._last_delay = max(0.0, base + self._rng.uniform(-spread, spread))
+        return self._last_delay
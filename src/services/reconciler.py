@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+from contextlib import suppress
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.enums import ChatMemberStatus
+from aiogram.exceptions import TelegramAPIError
+
+from src.services.removal_executor import Removal, RemovalExecutor
+from src.services.telegram_scheduler import Lane, telegram_lane
+from src.storage.cache import CacheRepository
+from src.utils.json_store import JsonKeyValueStore
+from src.utils.logger import logger
+
+Pair = Tuple[int, int]  # (chat_id, tg_id)
+
+# Старый формат: пользователи и курсор под одним ключом
+_LEGACY_STATE_KEY = "state"
+# Списки пользователей переписываются только при изменении, курсор — после каждой пачки
+_USERS_KEY = "known_users"
+# Присутствие в текущем проходе — отдельная запись на пользователя: пачка дописывает только новых
+_PRESENT_PREFIX = "present:"
+_CURSOR_KEY = "cursor"
+# Сколько пар с доступом можно пропустить за одну пачку (ограничивает работу шага)
+_MAX_SKIPPED_PER_BATCH = 100_000
+
+
+class MembershipReconciler:
+    """
+    Фоновая сверка фактического состава управляемых чатов с кэшем доступов.
+
+    Bot API не отдаёт список участников, поэтому сверяются известные боту
+    пользователи: те, кто есть в таблице или попадался в событиях чатов.
+    getChatMember запрашивается только для пар (чат, пользователь), где
+    доступа по кэшу нет, — лишним может быть только такой участник. Пары
+    обходятся по возрастанию небольшими пачками от курсора по
+    отсортированным спискам чатов и пользователей, без построения всего
+    произведения. Курсор сохраняется на диск после каждой пачки, поэтому
+    проход продолжается после перезапуска.
+
+    Участник без доступа ставится в план исключений `RemovalExecutor`
+    (тот перед киком перепроверяет доступ — поэтому в статистике считаются
+    поставленные в план исключения). Пользователь, которого нет в таблице
+    и которого за весь проход не нашли ни в одном чате, забывается —
+    список известных пользователей не растёт бесконечно. Запросы идут в
+    фоновой полосе планировщика, с паузой между пачками и ограниченной
+    параллельностью, и не конкурируют с ответами на /start.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        cache: CacheRepository,
+        removals: RemovalExecutor,
+        state_path: Path,
+        *,
+        batch_size: int = 20,
+        concurrency: int = 2,
+        batch_pause: float = 5.0,
+        pass_interval: float = 3600.0,
+    ) -> None:
+        self._bot = bot
+        self._cache = cache
+        self._removals = removals
+        self._store = JsonKeyValueStore(state_path)
+        self._batch_size = max(1, batch_size)
+        self._concurrency = max(1, concurrency)
+        self._batch_pause = batch_pause
+        self._pass_interval = pass_interval
+        self._known_users: Set[int] = set()
+        # Те же пользователи по возрастанию — для обхода пар от курсора
+        self._users: List[int] = []
+        self._users_dirty = False
+        # Кого в текущем проходе нашли в чате (или не смогли проверить, или заметили в событиях)
+        self._present: Set[int] = set()
+        self._present_new: List[int] = []
+        self._present_cleared: List[int] = []
+        self._cursor: Optional[Pair] = None
+        self._loaded = False
+        self.checked = 0
+        self.kicks_scheduled = 0
+        self.forgotten = 0
+
+    def observe(self, tg_id: int) -> None:
+        """Запоминает пользователя, замеченного в событиях чатов."""
+        tg_id = int(tg_id)
+        self._add_users([tg_id])
+        self._mark_present([tg_id])
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "known_users": len(self._known_users),
+            "cursor": self._cursor,
+            "checked": self.checked,
+            "kicks_scheduled": self.kicks_scheduled,
+            "forgotten": self.forgotten,
+        }
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        await self._ensure_loaded()
+        logger.info("▶ Запускаю сверку состава чатов")
+
+        with telegram_lane(Lane.BACKGROUND):
+            while not stop_event.is_set():
+                try:
+                    finished = await self._step()
+                except Exception as exc:
+                    logger.error(f"[reconciler] Ошибка сверки: {exc}")
+                    finished = False
+
+                pause = self._pass_interval if finished else self._batch_pause
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop_event.wait(), timeout=pause)
+
+        logger.info(f"✔ Сверка состава чатов остановлена: {self.stats()}")
+
+    async def _step(self) -> bool:
+        """Проверяет очередную пачку пар; True — проход по всем парам завершён."""
+        if self._cursor is None:
+            # Новый проход: добавляем всех, кто сейчас есть в таблице
+            self._add_users(self._table_users())
+
+        batch, cursor = self._next_pairs()
+        if cursor is None:
+            if self._cursor is not None:
+                self._forget_absent()
+                logger.info(f"✔ Проход сверки завершён: {self.stats()}")
+            self._cursor = None
+            self._present_cleared.extend(self._present)
+            self._present, self._present_new = set(), []
+            await self._checkpoint()
+            return True
+
+        if batch:
+            kicks = await self._check(batch)
+            if kicks:
+                logger.info(f"[reconciler] План сверки: исключить {len(kicks)}")
+                await self._removals.schedule(kicks)
+                self.kicks_scheduled += len(kicks)
+        self._cursor = cursor
+        await self._checkpoint()
+        return False
+
+    def _table_users(self) -> List[int]:
+        users: List[int] = []
+        for key in self._cache.as_mapping():
+            with suppress(ValueError):
+                users.append(int(key))
+        return users
+
+    def _add_users(self, tg_ids: List[int]) -> None:
+        new = [tg_id for tg_id in tg_ids if tg_id not in self._known_users]
+        if not new:
+            return
+        self._known_users.update(new)
+        if len(new) == 1:
+            bisect.insort(self._users, new[0])
+        else:
+            self._users = sorted(self._known_users)
+        self._users_dirty = True
+
+    def _mark_present(self, tg_ids: Iterable[int]) -> None:
+        for tg_id in tg_ids:
+            if tg_id not in self._present:
+                self._present.add(tg_id)
+                self._present_new.append(tg_id)
+
+    def _forget_absent(self) -> None:
+        """Забывает тех, кого нет в таблице и кого за проход не нашли ни в одном чате."""
+        keep = set(self._table_users()) | self._present
+        absent = self._known_users - keep
+        if not absent:
+            return
+        self._known_users -= absent
+        self._users = sorted(self._known_users)
+        self._users_dirty = True
+        self.forgotten += len(absent)
+        logger.info(f"[reconciler] Забыто пользователей вне таблицы и чатов: {len(absent)}")
+
+    def _next_pairs(self) -> Tuple[List[Pair], Optional[Pair]]:
+        """
+        Следующие `batch_size` пар без доступа после курсора в порядке
+        (чат, пользователь) и новый курсор; курсор None — проход завершён.
+
+        Пары с доступом пропускаются, но не больше `_MAX_SKIPPED_PER_BATCH`
+        за шаг: тогда пачка может быть короче, а курсор всё равно сдвигается.
+        """
+        chats = sorted(self._cache.managed_chats())
+        users = self._users
+        if not users:
+            return [], None
+        if self._cursor is None:
+            chat_index, user_index = 0, 0
+        else:
+            cursor_chat, cursor_user = self._cursor
+            chat_index = bisect.bisect_left(chats, cursor_chat)
+            if chat_index < len(chats) and chats[chat_index] == cursor_chat:
+                user_index = bisect.bisect_right(users, cursor_user)
+            else:
+                # Чат курсора больше не управляется — продолжаем со следующего
+                user_index = 0
+
+        batch: List[Pair] = []
+        last: Optional[Pair] = None
+        skipped = 0
+        while chat_index < len(chats) and len(batch) < self._batch_size:
+            chat_id = chats[chat_index]
+            while user_index < len(users) and len(batch) < self._batch_size:
+                tg_id = users[user_index]
+                user_index += 1
+                last = (chat_id, tg_id)
+                if not self._cache.user_has_access(tg_id, chat_id):
+                    batch.append(last)
+                    continue
+                skipped += 1
+                if skipped >= _MAX_SKIPPED_PER_BATCH:
+                    return batch, last
+            if user_index >= len(users):
+                chat_index, user_index = chat_index + 1, 0
+        return batch, last
+
+    async def _check(self, batch: List[Pair]) -> List[Removal]:
+        kicks: List[Removal] = []
+        present: Set[int] = set()
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def _inspect(pair: Pair) -> None:
+            chat_id, tg_id = pair
+            async with semaphore:
+                try:
+                    member = await self._bot.get_chat_member(chat_id, tg_id)
+                except TelegramAPIError as exc:
+                    # Не удалось проверить — считаем, что пользователь может быть в чате
+                    present.add(tg_id)
+                    logger.debug(f"[reconciler] getChatMember {tg_id} в {chat_id}: {exc}")
+                    return
+            self.checked += 1
+
+            status = member.status
+            if status in {ChatMemberStatus.CREATOR, ChatMemberStatus.ADMINISTRATOR}:
+                present.add(tg_id)
+                return
+            in_chat = status == ChatMemberStatus.MEMBER or (
+                status == ChatMemberStatus.RESTRICTED and getattr(member, "is_member", False)
+            )
+            if in_chat:
+                present.add(tg_id)
+                # Доступ перепроверяем: его могли выдать, пока шёл запрос
+                if not self._cache.user_has_access(tg_id, chat_id):
+                    kicks.append((chat_id, tg_id))
+
+        await asyncio.gather(*(_inspect(pair) for pair in batch))
+        self._mark_present(present)
+        return kicks
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        legacy = await self._store.get(_LEGACY_STATE_KEY) or {}
+        raw_users = await self._store.get(_USERS_KEY, legacy.get("known_users")) or []
+        cursor = await self._store.get(_CURSOR_KEY, legacy.get("cursor"))
+
+        users: List[int] = []
+        for tg_id in raw_users:
+            with suppress(TypeError, ValueError):
+                users.append(int(tg_id))
+        self._add_users(users)
+        self._users_dirty = bool(legacy)
+        for key, _ in await self._store.items():
+            if key.startswith(_PRESENT_PREFIX):
+                with suppress(ValueError):
+                    self._present.add(int(key[len(_PRESENT_PREFIX):]))
+        if cursor:
+            with suppress(TypeError, ValueError):
+                chat_id, tg_id = cursor
+                self._cursor = (int(chat_id), int(tg_id))
+        if legacy and self._cursor is not None:
+            # Проход в старом формате шёл без учёта присутствия — никого из него не забываем
+            self._mark_present(self._known_users)
+        self._loaded = True
+        if legacy:
+            await self._checkpoint()
+
+    async def _checkpoint(self) -> None:
+        items = [(_CURSOR_KEY, list(self._cursor) if self._cursor else None)]
+        if self._users_dirty:
+            items.append((_USERS_KEY, list(self._users)))
+            self._users_dirty = False
+        items.extend((f"{_PRESENT_PREFIX}{tg_id}", 1) for tg_id in self._present_new)
+        self._present_new = []
+        deleted = [_LEGACY_STATE_KEY, *(f"{_PRESENT_PREFIX}{tg_id}" for tg_id in self._present_cleared)]
+        self._present_cleared = []
+        await self._store.update(set_items=items, delete_keys=deleted)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+from aiogram import Bot
+
+from src.services.chat_utils import kick_user_from_chat
+from src.services.telegram_scheduler import Lane, telegram_lane
+from src.storage.cache import CacheRepository
+from src.utils.json_store import JsonKeyValueStore
+from src.utils.logger import logger
+
+if TYPE_CHECKING:
+    from src.services.invite_pool import InviteLinkPool
+
+Removal = Tuple[int, int]  # (chat_id, tg_id)
+
+# Старый формат плана: весь список под одним ключом
+_LEGACY_PLAN_KEY = "pending"
+
+
+class RemovalExecutor:
+    """
+    Исполнитель массовых исключений пользователей из чатов.
+
+    План исключений (chat_id, tg_id) сохраняется на диск до того, как
+    обновлённый кэш попадёт в снапшот, и обрабатывается пачками с
+    ограниченной параллельностью. Каждое исключение — отдельная запись
+    журнала, после пачки дописываются только её изменения, поэтому после
+    перезапуска бот продолжает с того же места.
+    Перед исключением доступ перепроверяется по кэшу: если его успели
+    вернуть, пользователь остаётся в чате. Личная ссылка-приглашение
+    пользователя из пула при исключении отзывается.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        cache: CacheRepository,
+        plan_path: Path,
+        *,
+        batch_size: int = 50,
+        concurrency: int = 5,
+        max_attempts: int = 3,
+        invite_pool: InviteLinkPool | None = None,
+    ) -> None:
+        self._bot = bot
+        self._cache = cache
+        self._store = JsonKeyValueStore(plan_path)
+        self._batch_size = max(1, batch_size)
+        self._concurrency = max(1, concurrency)
+        self._max_attempts = max(1, max_attempts)
+        self._invite_pool = invite_pool
+        # Порядок вставки = порядок исполнения; значение — число неудачных попыток
+        self._plan: Dict[Removal, int] = {}
+        self._loaded = False
+        self._wakeup = asyncio.Event()
+
+    @property
+    def pending(self) -> int:
+        return len(self._plan)
+
+    async def schedule(self, removals: Iterable[Removal]) -> None:
+        """Добавляет исключения в план и сразу сохраняет его на диск."""
+        await self._ensure_loaded()
+        added: List[Removal] = []
+        for chat_id, tg_id in removals:
+            key = (int(chat_id), int(tg_id))
+            if key not in self._plan:
+                self._plan[key] = 0
+                added.append(key)
+        if not added:
+            return
+
+        try:
+            await self._store.update(set_items=[(_store_key(removal), 0) for removal in added])
+        except BaseException:
+            # Не сохранённое на диск не должно числиться в плане: вызывающий повторит
+            for removal in added:
+                self._plan.pop(removal, None)
+            raise
+        logger.info(f"🧹 В план исключений добавлено {len(added)}, всего в плане: {len(self._plan)}")
+        self._wakeup.set()
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        await self._ensure_loaded()
+        if self._plan:
+            logger.info(f"▶ Продолжаю исключения после перезапуска: в плане {len(self._plan)}")
+
+        with telegram_lane(Lane.BACKGROUND):
+            while not stop_event.is_set():
+                if not self._plan:
+                    self._wakeup.clear()
+                    waiters = [
+                        asyncio.create_task(self._wakeup.wait()),
+                        asyncio.create_task(stop_event.wait()),
+                    ]
+                    try:
+                        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        for waiter in waiters:
+                            waiter.cancel()
+                    continue
+
+                await self._run_batch()
+
+        logger.info(f"✔ Исполнитель исключений остановлен, в плане осталось: {len(self._plan)}")
+
+    async def _run_batch(self) -> None:
+        batch: List[Removal] = list(self._plan)[: self._batch_size]
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def _remove(removal: Removal) -> bool:
+            chat_id, tg_id = removal
+            if self._cache.user_has_access(tg_id, chat_id):
+                logger.info(f"[removals] Доступ {tg_id} к {chat_id} вернули — исключение отменено")
+                return True
+            async with semaphore:
+                if self._invite_pool:
+                    await self._invite_pool.revoke(chat_id, tg_id)
+                return await kick_user_from_chat(self._bot, chat_id, tg_id)
+
+        results = await asyncio.gather(*(_remove(removal) for removal in batch))
+
+        retries: List[Tuple[str, int]] = []
+        for removal, done in zip(batch, results):
+            attempts = self._plan.pop(removal, 0) + 1
+            if done:
+                continue
+            if attempts >= self._max_attempts:
+                logger.warning(
+                    f"[removals] Не удалось исключить {removal[1]} из {removal[0]} "
+                    f"за {attempts} попыток — убираю из плана"
+                )
+            else:
+                # В конец очереди, чтобы не блокировать остальных
+                self._plan[removal] = attempts
+                retries.append((_store_key(removal), attempts))
+
+        await self._store.update(
+            set_items=retries,
+            delete_keys=[_store_key(removal) for removal in batch],
+        )
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        legacy = await self._store.get(_LEGACY_PLAN_KEY)
+        if legacy is not None:
+            await self._migrate(legacy)
+
+        for key, attempts in await self._store.items():
+            try:
+                chat_id, tg_id = (int(value) for value in key.split(":"))
+                self._plan.setdefault((chat_id, tg_id), int(attempts))
+            except (TypeError, ValueError):
+                logger.warning(f"[removals] Пропускаю некорректную запись плана: {key}")
+        self._loaded = True
+
+    async def _migrate(self, legacy: object) -> None:
+        """Переносит план из прежнего формата (один список) в отдельные записи."""
+        items: List[Tuple[str, int]] = []
+        for item in legacy if isinstance(legacy, list) else []:
+            try:
+                chat_id, tg_id, attempts = (int(value) for value in item)
+            except (TypeError, ValueError):
+                logger.warning(f"[removals] Пропускаю некорректную запись плана: {item}")
+                continue
+            items.append((_store_key((chat_id, tg_id)), attempts))
+        await self._store.update(set_items=items, delete_keys=[_LEGACY_PLAN_KEY])
+
+
+def _store_key(removal: Removal) -> str:
+    chat_id, tg_id = removal
+    return f"{chat_id}:{tg_id}"
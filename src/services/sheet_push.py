@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import secrets
+import time
+import uuid
+from contextlib import suppress
+from typing import Callable, Optional
+
+from aiohttp import web
+
+from src.services.gsheets import AsyncSheetsClient
+from src.services.poll_policy import AdaptivePollPolicy
+from src.utils.logger import logger
+
+# Состояния ресурса Drive, означающие изменение файла (sync — рукопожатие при подписке)
+_CHANGE_STATES = {"update", "change", "add"}
+
+
+class SheetPushReceiver:
+    """
+    Небольшой aiohttp-приёмник push-уведомлений Drive.
+
+    Проверяет X-Goog-Channel-ID и X-Goog-Channel-Token и на каждое
+    уведомление об изменении вызывает `on_change` — обычно это
+    `SheetSyncWorker.wake`. Тело запроса Drive не передаёт.
+    """
+
+    def __init__(self, on_change: Callable[[], None], *, token: str, path: str) -> None:
+        self._on_change = on_change
+        self.token = token
+        self._path = path
+        self.channel_id: Optional[str] = None
+        self.received = 0
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self._path, self._handle)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        channel_id = request.headers.get("X-Goog-Channel-ID", "")
+        token = request.headers.get("X-Goog-Channel-Token", "")
+        state = request.headers.get("X-Goog-Resource-State", "")
+
+        if not hmac.compare_digest(token, self.token):
+            logger.warning(f"[sheet_push] Уведомление с неверным токеном (канал {channel_id!r})")
+            return web.Response(status=403)
+
+        if self.channel_id is not None and channel_id != self.channel_id:
+            # Уведомление от старого канала после продления — просто подтверждаем
+            return web.Response(status=200)
+
+        if state in _CHANGE_STATES:
+            self.received += 1
+            logger.info(f"📬 Push-уведомление Drive ({state}) — проверяю таблицу")
+            self._on_change()
+
+        return web.Response(status=200)
+
+
+class SheetPushService:
+    """
+    Push-режим обнаружения изменений таблицы.
+
+    Поднимает `SheetPushReceiver`, подписывает его адрес на изменения файла
+    через Drive `files.watch` и продлевает канал до истечения срока. Если
+    публичный адрес не задан, работает только приёмник — этого достаточно
+    для локальной проверки через `tools/fake_drive_push.py`.
+
+    Пока канал Drive действует, потолок опроса `poll_policy` поднимается до
+    `fallback_interval`; без подписки опрос идёт с обычным интервалом.
+    """
+
+    def __init__(
+        self,
+        sheets: AsyncSheetsClient,
+        on_change: Callable[[], None],
+        *,
+        host: str,
+        port: int,
+        path: str,
+        address: str | None,
+        token: str | None = None,
+        channel_ttl: float = 24 * 3600,
+        renew_margin: float = 600.0,
+        poll_policy: AdaptivePollPolicy | None = None,
+        fallback_interval: float | None = None,
+    ) -> None:
+        self._sheets = sheets
+        self._poll_policy = poll_policy
+        self._poll_max_interval = poll_policy.max_interval if poll_policy else None
+        self._fallback_interval = fallback_interval
+        self._host = host
+        self._port = port
+        self._address = address
+        self._channel_ttl = channel_ttl
+        self._renew_margin = renew_margin
+        self._receiver = SheetPushReceiver(
+            on_change,
+            token=token or secrets.token_urlsafe(24),
+            path=path,
+        )
+        self._resource_id: Optional[str] = None
+
+    @property
+    def receiver(self) -> SheetPushReceiver:
+        return self._receiver
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        runner = web.AppRunner(self._receiver.build_app())
+        await runner.setup()
+        site = web.TCPSite(runner, self._host, self._port)
+        await site.start()
+        logger.info(f"▶ Приёмник push-уведомлений Drive слушает {self._host}:{self._port}")
+
+        try:
+            if not self._address:
+                logger.warning("⚠️ SHEETS_PUSH_ADDRESS не задан — подписка Drive не оформлена")
+                await stop_event.wait()
+                return
+
+            while not stop_event.is_set():
+                expires_at = await self._subscribe()
+                delay = max(60.0, expires_at - time.time() - self._renew_margin)
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop_event.wait(), timeout=delay)
+        finally:
+            self._set_subscribed(False)
+            await self._unsubscribe()
+            await runner.cleanup()
+            logger.info("✔ Приёмник push-уведомлений остановлен")
+
+    async def _subscribe(self) -> float:
+        """Оформляет новый канал (старый отписывается) и возвращает время его истечения."""
+        previous = (self._receiver.channel_id, self._resource_id)
+        channel_id = str(uuid.uuid4())
+        try:
+            channel = await self._sheets.watch_spreadsheet(
+                channel_id, self._address, self._receiver.token, self._channel_ttl
+            )
+        except Exception as exc:
+            logger.error(f"[sheet_push] Не удалось подписаться на изменения таблицы: {exc}")
+            # Повторим позже; до тех пор изменения находит обычный опрос
+            self._set_subscribed(False)
+            return time.time() + self._renew_margin + 60.0
+
+        self._receiver.channel_id = channel_id
+        self._resource_id = channel.get("resourceId")
+        logger.info(f"📡 Подписка Drive оформлена: канал {channel_id}")
+        self._set_subscribed(True)
+
+        if previous[0] and previous[1]:
+            with suppress(Exception):
+                await self._sheets.stop_watch(*previous)
+
+        expiration_ms = channel.get("expiration")
+        if expiration_ms:
+            return int(expiration_ms) / 1000
+        return time.time() + self._channel_ttl
+
+    def _set_subscribed(self, subscribed: bool) -> None:
+        if self._poll_policy is None or self._fallback_interval is None:
+            return
+        self._poll_policy.set_max_interval(
+            self._fallback_interval if subscribed else self._poll_max_interval
+        )
+
+    async def _unsubscribe(self) -> None:
+        if not (self._receiver.channel_id and self._resource_id):
+            return
+        try:
+            await self._sheets.stop_watch(self._receiver.channel_id, self._resource_id)
+        except Exception as exc:
+            logger.warning(f"[sheet_push] Не удалось отписать канал Drive: {exc}")
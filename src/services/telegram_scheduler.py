@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, Iterator, List, Optional, Tuple
+
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetUpdates, Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from src.utils.logger import logger
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+class Lane(IntEnum):
+    """Полоса приоритета запроса: меньше значение — раньше обслуживается."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_lane: ContextVar[Lane] = ContextVar("telegram_lane", default=Lane.INTERACTIVE)
+
+
+@contextmanager
+def telegram_lane(lane: Lane) -> Iterator[None]:
+    """
+    Помечает все запросы к Telegram внутри блока указанной полосой.
+
+    По умолчанию запросы считаются интерактивными (ответы на /start);
+    фоновые задачи — уведомления, кики, синхронизация — оборачиваются
+    в `telegram_lane(Lane.BACKGROUND)`.
+    """
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class TokenBucket:
+    """Классический token bucket с возможностью временной блокировки (RetryAfter)."""
+
+    __slots__ = ("rate", "capacity", "_tokens", "_updated", "_blocked_until")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def delay(self, now: float) -> float:
+        """Сколько секунд ждать до появления токена (0 — токен есть)."""
+        self._refill(now)
+        if self._blocked_until > now:
+            return self._blocked_until - now
+        if self._tokens >= 1.0:
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    def consume(self) -> None:
+        self._tokens -= 1.0
+
+    def block(self, seconds: float, now: float) -> None:
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = now
+
+    @property
+    def idle(self) -> bool:
+        return self._tokens >= self.capacity and self._blocked_until <= time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+
+class _PriorityGate:
+    """Выдаёт токены общего bucket'а ожидающим строго в порядке (полоса, очередь)."""
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        self._bucket = bucket
+        self._waiters: List[Tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def bucket(self) -> TokenBucket:
+        return self._bucket
+
+    def pending(self, lane: Lane | None = None) -> int:
+        return sum(
+            1 for waiter_lane, _, future in self._waiters
+            if not future.done() and (lane is None or waiter_lane == lane)
+        )
+
+    async def acquire(self, lane: Lane) -> None:
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(lane), next(self._seq), future))
+        self._drain()
+        await future
+
+    def _drain(self) -> None:
+        self._timer = None
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.done():
+                # Ожидающий отменён
+                heapq.heappop(self._waiters)
+                continue
+
+            delay = self._bucket.delay(time.monotonic())
+            if delay > 0:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._drain)
+                return
+
+            heapq.heappop(self._waiters)
+            self._bucket.consume()
+            future.set_result(None)
+
+    def wake(self) -> None:
+        """Пересчитывает задержку (например, после блокировки bucket'а)."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._drain()
+
+
+class TelegramScheduler(BaseRequestMiddleware):
+    """
+    Центральный планировщик запросов к Bot API (middleware сессии aiogram).
+
+    • Общий token bucket на сообщения бота и отдельные bucket'ы на каждый
+      чат для отправки сообщений. Остальные методы (кики, getChatMember,
+      инвайты) расходуют свой общий bucket `api_rate` и не занимают
+      очередь сообщений.
+    • Интерактивные запросы обслуживаются раньше фоновых.
+    • TelegramRetryAfter не теряет запрос: блокируется то, к чему относится
+      ответ, — чат для запросов с chat_id (для сообщений и для остальных
+      методов — раздельно), общий bucket своего вида только для запросов
+      без чата; после паузы запрос автоматически ставится в очередь снова.
+      Поэтому 429 на массовом кике не останавливает ответы на /start.
+    """
+
+    def __init__(
+        self,
+        *,
+        global_rate: float = 25.0,
+        api_rate: float = 25.0,
+        private_chat_rate: float = 1.0,
+        group_chat_rate: float = 20 / 60,
+        max_retries: int = 3,
+        max_chat_buckets: int = 10_000,
+    ) -> None:
+        self._gate = _PriorityGate(TokenBucket(global_rate, capacity=global_rate))
+        self._api_gate = _PriorityGate(TokenBucket(api_rate, capacity=api_rate))
+        self._private_chat_rate = private_chat_rate
+        self._group_chat_rate = group_chat_rate
+        self._max_retries = max_retries
+        self._max_chat_buckets = max_chat_buckets
+        self._chat_buckets: OrderedDict[Any, TokenBucket] = OrderedDict()
+        # Блокировки по RetryAfter для не-сообщений с chat_id: чат → время окончания
+        self._chat_blocks: OrderedDict[Any, float] = OrderedDict()
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if isinstance(method, GetUpdates):
+            # Long polling не лимитируем: он висит до таймаута и не расходует квоту
+            return await make_request(bot, method)
+
+        lane = _lane.get()
+        is_message = _is_message(method)
+        chat_id = getattr(method, "chat_id", None)
+
+        attempt = 0
+        while True:
+            await self._acquire(chat_id, is_message, lane)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                attempt += 1
+                if attempt > self._max_retries:
+                    raise
+                logger.warning(
+                    f"[tg_scheduler] RetryAfter {exc.retry_after} сек для "
+                    f"{method.__api_method__} (чат {chat_id}) — повтор {attempt}/{self._max_retries}"
+                )
+                self._penalize(chat_id, is_message, exc.retry_after)
+
+    def stats(self) -> dict[str, int]:
+        """Текущая длина очередей по полосам."""
+        return {
+            "interactive_waiting": self._gate.pending(Lane.INTERACTIVE),
+            "background_waiting": self._gate.pending(Lane.BACKGROUND),
+            "api_interactive_waiting": self._api_gate.pending(Lane.INTERACTIVE),
+            "api_background_waiting": self._api_gate.pending(Lane.BACKGROUND),
+            "chat_buckets": len(self._chat_buckets),
+        }
+
+    async def _acquire(self, chat_id: Any, is_message: bool, lane: Lane) -> None:
+        if chat_id is not None and is_message:
+            bucket = self._chat_bucket(chat_id)
+            while True:
+                delay = bucket.delay(time.monotonic())
+                if delay <= 0:
+                    bucket.consume()
+                    break
+                await asyncio.sleep(delay)
+        elif chat_id is not None:
+            while True:
+                delay = self._chat_blocks.get(chat_id, 0.0) - time.monotonic()
+                if delay <= 0:
+                    self._chat_blocks.pop(chat_id, None)
+                    break
+                await asyncio.sleep(delay)
+        await (self._gate if is_message else self._api_gate).acquire(lane)
+
+    def _penalize(self, chat_id: Any, is_message: bool, retry_after: float) -> None:
+        now = time.monotonic()
+        if chat_id is None:
+            # Ответ без чата относится ко всему боту — но только к запросам того же вида
+            gate = self._gate if is_message else self._api_gate
+            gate.bucket.block(retry_after, now)
+            gate.wake()
+        elif is_message:
+            self._chat_bucket(chat_id).block(retry_after, now)
+        else:
+            self._chat_blocks[chat_id] = max(self._chat_blocks.get(chat_id, 0.0), now + retry_after)
+            self._chat_blocks.move_to_end(chat_id)
+            while len(self._chat_blocks) > self._max_chat_buckets:
+                self._chat_blocks.popitem(last=False)
+
+    def _chat_bucket(self, chat_key: Any) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_key)
+        if bucket is None:
+            rate = self._private_chat_rate if _is_private(chat_key) else self._group_chat_rate
+            bucket = TokenBucket(rate, capacity=max(1.0, rate * 3))
+            self._chat_buckets[chat_key] = bucket
+            self._prune()
+        else:
+            self._chat_buckets.move_to_end(chat_key)
+        return bucket
+
+    def _prune(self) -> None:
+        while len(self._chat_buckets) > self._max_chat_buckets:
+            key, bucket = next(iter(self._chat_buckets.items()))
+            if not bucket.idle:
+                break
+            del self._chat_buckets[key]
+
+
+_MESSAGE_METHOD_PREFIXES = ("send", "copy", "forward")
+
+
+def _is_message(method: TelegramMethod[Any]) -> bool:
+    """
+    Отправка сообщения: расходует лимит чата и общий лимит сообщений.
+
+    Лимиты Telegram на чат касаются сообщений, поэтому кики и инвайты
+    ограничиваются лишь общим bucket'ом остальных методов.
+    """
+    return method.__api_method__.startswith(_MESSAGE_METHOD_PREFIXES)
+
+
+def _is_private(chat_key: Any) -> bool:
+    try:
+        return int(chat_key) > 0
+    except (TypeError, ValueError):
+        # @username — канал или публичная группа
+        return False
@@ -2,15 +2,33 @@ from __future__ import annotations
 
 import asyncio
 import gc
+import time
 import traceback
 
-from typing import Mapping
+from typing import Any, Callable, Dict, List, Mapping
 
-from src.services.gsheets import load_table, sheet_changed
-from src.services.notifier import NotificationService, detect_changes
+from src.services.delivery import NotificationQueue
+from src.services.gsheets import AsyncSheetsClient
+from src.services.notifier import UserChangeEvent, detect_changes
+from src.services.poll_policy import AdaptivePollPolicy, SheetsQuotaError
+from src.services.removal_executor import RemovalExecutor
+from src.services.telegram_scheduler import Lane, telegram_lane
 from src.storage.cache import CacheRepository
 from src.utils.logger import logger
 from src.utils.memory_monitor import log_memory_usage
+from src.utils.metrics import REGISTRY
+
+# (старое, новое состояние затронутых записей) → события изменений доступа
+ChangeDetector = Callable[
+    [Mapping[str, Mapping[str, Any]], Mapping[str, Mapping[str, Any]]],
+    List[UserChangeEvent],
+]
+
+SYNC_CYCLE = REGISTRY.histogram(
+    "sync_cycle_duration_seconds",
+    "Длительность цикла синхронизации (проверка и, при изменениях, загрузка дельты)",
+    ["changed"],
+)
 
 
 class SheetSyncWorker:
@@ -19,20 +37,42 @@ class SheetSyncWorker:
     def __init__(
         self,
         cache: CacheRepository,
-        notifier: NotificationService,
+        delivery: NotificationQueue,
+        sheets: AsyncSheetsClient,
+        removals: RemovalExecutor,
         *,
-        interval: float = 10.0,  # Увеличен с 2 до 10 секунд для экономии квоты Google API
+        poll_policy: AdaptivePollPolicy | None = None,
+        detect_changes: ChangeDetector = detect_changes,
         memory_log_interval: int = 50,  # Логировать память каждые N итераций
     ) -> None:
         self._cache = cache
-        self._notifier = notifier
-        self._interval = interval
+        self._delivery = delivery
+        self._sheets = sheets
+        self._removals = removals
+        self._poll = poll_policy or AdaptivePollPolicy()
+        self._detect_changes = detect_changes
         self._memory_log_interval = memory_log_interval
         self._iteration_count = 0
+        self._wakeup = asyncio.Event()
+
+    def poll_state(self) -> Dict[str, Any]:
+        """Текущий интервал опроса, состояние backoff и бюджета квоты."""
+        return {**self._poll.stats(), "quota": self._sheets.quota.stats()}
+
+    def wake(self) -> None:
+        """Запускает внеочередную проверку таблицы (например, по push-уведомлению)."""
+        self._wakeup.set()
 
     async def run(self, stop_event: asyncio.Event) -> None:
         logger.info("▶ Запускаю воркер синхронизации таблицы")
 
+        # Запросы к Telegram из синхронизации уступают место ответам на /start
+        with telegram_lane(Lane.BACKGROUND):
+            await self._loop(stop_event)
+
+        logger.info("✔ Воркер синхронизации остановлен")
+
+    async def _loop(self, stop_event: asyncio.Event) -> None:
         while not stop_event.is_set():
             try:
                 self._iteration_count += 1
@@ -40,42 +80,84 @@ class SheetSyncWorker:
                 # Периодический мониторинг памяти
                 if self._iteration_count % self._memory_log_interval == 0:
                     log_memory_usage("SheetSyncWorker")
+                    logger.info(f"[updater] Состояние опроса: {self.poll_state()}")
                     gc.collect()  # Принудительная сборка мусора
                 
-                if sheet_changed():
-                    await self._handle_sheet_update()
+                started = time.perf_counter()
+                changed = False
+                try:
+                    changed = await self._sheets.sheet_changed()
+                    if changed:
+                        await self._handle_sheet_update()
+                        # Версия таблицы запоминается только после успешной загрузки:
+                        # при таймауте или 429 следующий опрос снова увидит изменение
+                        self._sheets.mark_synced()
+                finally:
+                    SYNC_CYCLE.observe(time.perf_counter() - started, changed=str(changed).lower())
+                delay = self._poll.on_poll(changed)
+            except asyncio.CancelledError:
+                logger.info("⏹ Воркер синхронизации отменён")
+                break
+            except SheetsQuotaError as exc:
+                delay = self._poll.on_quota_exceeded(exc.retry_after)
+                logger.warning(f"⚠️ {exc} — пауза {delay:.0f} сек")
+            except Exception:
+                delay = self._poll.on_error()
+                logger.error("Ошибка в SheetSyncWorker:\n{}", traceback.format_exc())
 
-                await asyncio.wait_for(stop_event.wait(), timeout=self._interval)
-            except asyncio.TimeoutError:
-                continue
+            try:
+                await self._sleep(stop_event, delay)
             except asyncio.CancelledError:
                 logger.info("⏹ Воркер синхронизации отменён")
                 break
-            except Exception as e:
-                error_msg = str(e)
-                if "429" in error_msg or "Quota exceeded" in error_msg:
-                    logger.warning(f"⚠️ Превышена квота Google API — пауза 60 секунд")
-                    await asyncio.sleep(60)
-                else:
-                    logger.error("Ошибка в SheetSyncWorker:\n{}", traceback.format_exc())
-                    await asyncio.sleep(1)
 
-        logger.info("✔ Воркер синхронизации остановлен")
+    async def _sleep(self, stop_event: asyncio.Event, delay: float) -> None:
+        """Ждёт следующего опроса, остановки или внеочередного wake()."""
+        waiters = [
+            asyncio.create_task(stop_event.wait()),
+            asyncio.create_task(self._wakeup.wait()),
+        ]
+        try:
+            await asyncio.wait(waiters, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        self._wakeup.clear()
 
     async def _handle_sheet_update(self) -> None:
         logger.info("🔄 Обнаружены изменения в таблице — обновляю кэш")
-        old_data = self._cache.as_mapping()
-        new_rows = load_table()
-        self._cache.replace(new_rows)
+        previous_digests = self._cache.row_digests()
+        delta = await self._sheets.load_table_delta(previous_digests)
+        old_data, new_data = self._cache.apply_delta(delta.changed, delta.digests)
+        if not old_data and not new_data:
+            logger.info("✔ Изменений в строках пользователей нет")
+            self._cache.save_snapshot()
+            return
+
+        # План исключений сохраняется раньше снапшота кэша: если процесс
+        # упадёт между ними, исключения не потеряются после перезапуска.
+        # Если же план сохранить не удалось, дельта откатывается целиком —
+        # следующий цикл найдёт её снова, а не сочтёт уже обработанной.
+        try:
+            events = self._detect_changes(old_data, new_data)
+            await self._removals.schedule(
+                (chat_id, event.tg_id) for event in events for chat_id in event.removed_chats
+            )
+        except BaseException:
+            self._cache.revert_delta(old_data, new_data, previous_digests)
+            raise
         self._cache.save_snapshot()
-        await self._publish_events(old_data)
-        
+        self._publish_events(events)
+
         # Принудительная сборка мусора после обработки большого объема данных
         gc.collect()
 
-    async def _publish_events(
-        self, old_data: Mapping[str, Mapping[str, object]]
-    ) -> None:
-        events = detect_changes(old_data, self._cache.as_mapping())
+    def _publish_events(self, events: List[UserChangeEvent]) -> None:
+        """Ставит события в очередь доставки, не дожидаясь отправки."""
         for event in events:
-            await self._notifier.notify(event)
+            self._delivery.submit(event)
+        if events:
+            logger.info(
+                f"📨 В очередь уведомлений добавлено {len(events)} событий, "
+                f"ожидают доставки: {self._delivery.depth}"
+            )
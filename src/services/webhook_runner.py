@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import secrets
+from contextlib import suppress
+from typing import List, Sequence
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import Update
+from aiogram.types.update import UpdateTypeLookupError
+from aiohttp import web
+from pydantic import ValidationError
+
+from src.services.bot_runner import create_session
+from src.services.http_transport import HttpTransport
+from src.utils.logger import logger
+
+_SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def _shard_key(update: Update) -> int:
+    """Ключ очереди: апдейты одного чата (или пользователя) обрабатываются по порядку."""
+    try:
+        event = update.event
+    except UpdateTypeLookupError:
+        # Тип апдейта, неизвестный этой версии aiogram
+        return update.update_id
+    chat = getattr(event, "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    return update.update_id
+
+
+class WebhookRunner:
+    """
+    Приём апдейтов Telegram через webhook — альтернатива polling.
+
+    aiohttp-сервер проверяет X-Telegram-Bot-Api-Secret-Token, разбирает
+    апдейт и кладёт его в ограниченную очередь, сразу отвечая Telegram.
+    Обработчики выполняет пул воркеров через `dp.feed_update`; очередь
+    разбита по чатам, поэтому апдейты одного чата не обгоняют друг друга.
+    Если очередь переполнена, отвечаем 503 — Telegram повторит доставку.
+
+    Интерфейс совпадает с `BotLifecycleManager`: `run()` работает до
+    вызова `stop()`, после чего сервер закрывается, а уже принятые
+    апдейты дообрабатываются (не дольше `drain_timeout`).
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        dispatcher: Dispatcher,
+        *,
+        host: str,
+        port: int,
+        path: str,
+        url: str | None = None,
+        secret_token: str | None = None,
+        queue_size: int = 1000,
+        workers: int = 8,
+        drain_timeout: float = 10.0,
+        request_middlewares: Sequence[BaseRequestMiddleware] = (),
+        transport: HttpTransport | None = None,
+    ) -> None:
+        self._bot = bot
+        self._dispatcher = dispatcher
+        self._host = host
+        self._port = port
+        self._path = path
+        self._url = url
+        self._secret_token = secret_token or secrets.token_urlsafe(32)
+        self._workers = max(1, workers)
+        self._drain_timeout = drain_timeout
+        self._request_middlewares = tuple(request_middlewares)
+        self._transport = transport
+        shard_size = max(1, queue_size // self._workers)
+        self._queues: List[asyncio.Queue[Update]] = [
+            asyncio.Queue(maxsize=shard_size) for _ in range(self._workers)
+        ]
+        self._stop_event = asyncio.Event()
+        self.received = 0
+        self.rejected = 0
+
+    @property
+    def depth(self) -> int:
+        """Сколько принятых апдейтов ждут обработки."""
+        return sum(queue.qsize() for queue in self._queues)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self._path, self._handle)
+        return app
+
+    async def run(self) -> None:
+        session = create_session(self._request_middlewares, self._transport)
+        self._bot.session = session
+
+        runner = web.AppRunner(self.build_app())
+        await runner.setup()
+        site = web.TCPSite(runner, self._host, self._port)
+
+        workers = [
+            asyncio.create_task(self._worker(queue), name=f"webhook-worker-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+        workflow_data = {"dispatcher": self._dispatcher, "bots": [self._bot]}
+        try:
+            await self._dispatcher.emit_startup(bot=self._bot, **workflow_data)
+            await site.start()
+            logger.info(f"▶ Webhook слушает {self._host}:{self._port}{self._path}")
+            await self._register()
+            await self._stop_event.wait()
+        finally:
+            # Сначала перестаём принимать апдейты, затем дообрабатываем очередь
+            await runner.cleanup()
+            await self._drain()
+            for task in workers:
+                task.cancel()
+            for task in workers:
+                with suppress(asyncio.CancelledError):
+                    await task
+            with suppress(Exception):
+                await self._dispatcher.emit_shutdown(bot=self._bot, **workflow_data)
+            await session.close()
+
+        logger.info("🛑 Webhook остановлен")
+
+    def stop(self) -> None:
+        """Посылает сигнал на завершение приёма апдейтов."""
+        self._stop_event.set()
+
+    async def _register(self) -> None:
+        if not self._url:
+            logger.warning("⚠️ TELEGRAM_WEBHOOK_URL не задан — webhook в Telegram не регистрируется")
+            return
+        await self._bot.set_webhook(
+            url=self._url,
+            secret_token=self._secret_token,
+            allowed_updates=self._dispatcher.resolve_used_update_types(),
+        )
+        logger.info("📡 Webhook зарегистрирован в Telegram")
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        token = request.headers.get(_SECRET_HEADER, "")
+        if not hmac.compare_digest(token, self._secret_token):
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self._bot})
+        except (ValueError, ValidationError) as exc:
+            logger.warning(f"[webhook] Некорректный апдейт: {exc}")
+            return web.Response(status=400)
+
+        queue = self._queues[_shard_key(update) % self._workers]
+        try:
+            queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            logger.warning(f"[webhook] Очередь апдейтов переполнена ({self.depth}) — отвечаю 503")
+            return web.Response(status=503)
+
+        self.received += 1
+        return web.Response(status=200)
+
+    async def _worker(self, queue: asyncio.Queue[Update]) -> None:
+        while True:
+            update = await queue.get()
+            try:
+                await self._dispatcher.feed_update(self._bot, update)
+            except Exception as exc:
+                logger.error(f"[webhook] Ошибка обработки апдейта {update.update_id}: {exc}")
+            finally:
+                queue.task_done()
+
+    async def _drain(self) -> None:
+        if not self.depth:
+            return
+        logger.info(f"⏳ Дообрабатываю принятые апдейты: {self.depth}")
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)),
+                timeout=self._drain_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Не обработано апдейтов при остановке: {self.depth}")
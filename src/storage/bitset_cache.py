@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Tuple
+
+from src.storage.cache import CacheRepository, parse_chats
+
+
+class _UserRecord:
+    """
+    Компактная запись пользователя: скалярные поля и битовая маска доступов.
+
+    order хранит чаты в порядке записи (порядке колонок таблицы), только если
+    он не совпадает с порядком битов; обычно это None и хватает маски.
+    """
+
+    __slots__ = ("tg_id", "username", "fio", "role", "mask", "order")
+
+    def __init__(
+        self,
+        tg_id: Any,
+        username: str,
+        fio: str,
+        role: str,
+        mask: int,
+        order: Tuple[int, ...] | None = None,
+    ) -> None:
+        self.tg_id = tg_id
+        self.username = username
+        self.fio = fio
+        self.role = role
+        self.mask = mask
+        self.order = order
+
+
+class ChatIndex:
+    """Интернирует chat_id в небольшие номера битов."""
+
+    __slots__ = ("_bits", "_chats")
+
+    def __init__(self) -> None:
+        self._bits: Dict[int, int] = {}
+        self._chats: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def bit(self, chat_id: int) -> int | None:
+        return self._bits.get(chat_id)
+
+    def intern(self, chat_id: int) -> int:
+        bit = self._bits.get(chat_id)
+        if bit is None:
+            bit = len(self._chats)
+            self._bits[chat_id] = bit
+            self._chats.append(chat_id)
+        return bit
+
+    def encode(self, chats: Iterable[int]) -> Tuple[int, Tuple[int, ...] | None]:
+        """
+        Маска чатов и их порядок — если он отличается от порядка битов
+        (иначе None: `chats_of(mask)` и так вернёт чаты в нужном порядке).
+        """
+        mask = 0
+        ordered: List[int] = []
+        in_bit_order = True
+        last_bit = -1
+        for chat_id in chats:
+            bit = self.intern(chat_id)
+            if mask >> bit & 1:
+                continue
+            mask |= 1 << bit
+            ordered.append(chat_id)
+            if bit < last_bit:
+                in_bit_order = False
+            last_bit = bit
+        return mask, None if in_bit_order else tuple(ordered)
+
+    def chats_of(self, mask: int) -> List[int]:
+        result: List[int] = []
+        chats = self._chats
+        while mask:
+            low = mask & -mask
+            result.append(chats[low.bit_length() - 1])
+            mask ^= low
+        return result
+
+
+class _RecordsView(Mapping[str, Mapping[str, Any]]):
+    """Read-only представление записей в формате обычного CacheRepository."""
+
+    def __init__(self, repo: "BitsetCacheRepository") -> None:
+        self._repo = repo
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        record = self._repo._records[key]
+        return self._repo._materialize(record)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._repo._records)
+
+    def __len__(self) -> int:
+        return len(self._repo._records)
+
+
+class BitsetCacheRepository(CacheRepository):
+    """
+    Вариант кэша для больших таблиц.
+
+    Матрица доступов почти пустая: десятки тысяч пользователей и сотни
+    колонок-чатов. Поэтому чаты интернируются в номера битов, доступы
+    пользователя хранятся одним int-маской, а скалярные поля — в записи
+    со __slots__. Проверка доступа и сравнение наборов чатов сводятся
+    к битовым операциям, а словари создаются только по запросу.
+    """
+
+    def __init__(self, snapshot_path: Path) -> None:
+        super().__init__(snapshot_path)
+        self._records: Dict[str, _UserRecord] = {}
+        self._chat_index = ChatIndex()
+        # Сколько пользователей имеет доступ к каждому биту — для chat_is_managed
+        self._bit_counts: List[int] = []
+
+    def replace(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        """Полностью заменяет содержимое кэша новыми строками."""
+        chat_index = ChatIndex()
+        records: Dict[str, _UserRecord] = {}
+        for row in rows:
+            tg_id = row.get("tg_id")
+            if tg_id is None:
+                continue
+            records[str(tg_id)] = self._compact(row, chat_index)
+
+        bit_counts = [0] * len(chat_index)
+        for record in records.values():
+            for bit in _bits_of(record.mask):
+                bit_counts[bit] += 1
+
+        self._records = records
+        self._chat_index = chat_index
+        self._bit_counts = bit_counts
+        self._digests = {}
+
+    def apply_delta(
+        self,
+        changed: Mapping[str, Mapping[str, Any] | None],
+        digests: Mapping[str, str],
+    ) -> tuple[Dict[str, Mapping[str, Any]], Dict[str, Mapping[str, Any]]]:
+        removed = [key for key in self._records if key not in digests]
+
+        before: Dict[str, Mapping[str, Any]] = {}
+        after: Dict[str, Mapping[str, Any]] = {}
+
+        records = self._records
+        for key in removed:
+            old = records.pop(key)
+            self._count(old.mask, -1)
+            before[key] = self._materialize(old)
+
+        for key, row in changed.items():
+            old = records.pop(key, None)
+            if row is None:
+                if old is not None:
+                    self._count(old.mask, -1)
+                    before[key] = self._materialize(old)
+                continue
+
+            record = self._compact(row, self._chat_index)
+            records[key] = record
+            if old is None:
+                self._count(record.mask, 1)
+                after[key] = self._materialize(record)
+                continue
+
+            if (
+                old.mask == record.mask
+                and old.order == record.order
+                and old.role == record.role
+                and old.username == record.username
+                and old.fio == record.fio
+            ):
+                continue
+
+            # Изменившиеся биты: снятые доступы уменьшают счётчики, выданные — увеличивают
+            self._count(old.mask & ~record.mask, -1)
+            self._count(record.mask & ~old.mask, 1)
+            before[key] = self._materialize(old)
+            after[key] = self._materialize(record)
+
+        self._digests = dict(digests)
+        return before, after
+
+    def revert_delta(
+        self,
+        before: Mapping[str, Mapping[str, Any]],
+        after: Mapping[str, Mapping[str, Any]],
+        digests: Mapping[str, str],
+    ) -> None:
+        records = self._records
+        for key in after:
+            old = records.pop(key, None)
+            if old is not None:
+                self._count(old.mask, -1)
+        for key, row in before.items():
+            record = self._compact(row, self._chat_index)
+            records[key] = record
+            self._count(record.mask, 1)
+        self._digests = dict(digests)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {"tg_id": record.tg_id, "role": record.role, "chats": self._chats(record)}
+            for key, record in self._records.items()
+        }
+
+    def get_user(self, tg_id: int) -> Dict[str, Any] | None:
+        record = self._records.get(str(tg_id))
+        return self._materialize(record) if record else None
+
+    def list_user_chats(self, tg_id: int) -> list[int]:
+        record = self._records.get(str(tg_id))
+        if not record:
+            return []
+        return self._chats(record)
+
+    def user_has_access(self, tg_id: int, chat_id: int) -> bool:
+        record = self._records.get(str(tg_id))
+        if not record:
+            return False
+        bit = self._chat_index.bit(chat_id)
+        return bit is not None and bool(record.mask >> bit & 1)
+
+    def chat_is_managed(self, chat_id: int) -> bool:
+        bit = self._chat_index.bit(chat_id)
+        return bit is not None and bit < len(self._bit_counts) and self._bit_counts[bit] > 0
+
+    def managed_chats(self) -> list[int]:
+        return [
+            self._chat_index.chats_of(1 << bit)[0]
+            for bit, count in enumerate(self._bit_counts)
+            if count > 0
+        ]
+
+    def as_mapping(self) -> Mapping[str, Mapping[str, Any]]:
+        """Ленивое представление: словари записей создаются при обращении."""
+        return _RecordsView(self)
+
+    def _compact(self, row: Mapping[str, Any], chat_index: ChatIndex) -> _UserRecord:
+        mask, order = chat_index.encode(parse_chats(row))
+        return _UserRecord(
+            tg_id=row.get("tg_id"),
+            username=row.get("username") or "",
+            fio=row.get("fio") or "",
+            role=sys.intern(row.get("role") or ""),
+            mask=mask,
+            order=order,
+        )
+
+    def _chats(self, record: _UserRecord) -> List[int]:
+        """Чаты записи в её исходном порядке — как у обычного CacheRepository."""
+        if record.order is not None:
+            return list(record.order)
+        return self._chat_index.chats_of(record.mask)
+
+    def _materialize(self, record: _UserRecord) -> Dict[str, Any]:
+        return {
+            "tg_id": record.tg_id,
+            "username": record.username,
+            "fio": record.fio,
+            "role": record.role,
+            "chats": self._chats(record),
+        }
+
+    def _count(self, mask: int, delta: int) -> None:
+        counts = self._bit_counts
+        for bit in _bits_of(mask):
+            if bit >= len(counts):
+                counts.extend([0] * (bit + 1 - len(counts)))
+            counts[bit] += delta
+
+
+def _bits_of(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
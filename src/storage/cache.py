@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from copy import deepcopy
 from pathlib import Path
-from typing import Any, Dict, Iterable, Mapping
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Set, Tuple
 
 from src.utils.logger import logger
 
@@ -14,6 +14,12 @@ class CacheRepository:
     def __init__(self, snapshot_path: Path) -> None:
         self._snapshot_path = snapshot_path
         self._data: Dict[str, Dict[str, Any]] = {}
+        # Дайджесты строк таблицы, из которых получены записи (tg_id → digest)
+        self._digests: Dict[str, str] = {}
+        # Индексы для горячего пути chat_member: tg_id → чаты и чат → tg_id
+        self._user_chats: Dict[str, Tuple[int, ...]] = {}
+        self._chat_users: Dict[int, Set[str]] = {}
+        self._managed_chats: FrozenSet[int] = frozenset()
 
     @property
     def path(self) -> Path:
@@ -42,21 +48,110 @@ class CacheRepository:
     def save_snapshot(self) -> None:
         """Сохраняет текущее состояние в json."""
         self._snapshot_path.parent.mkdir(parents=True, exist_ok=True)
-        snapshot = list(self._data.values())
+        snapshot = list(self.as_mapping().values())
         self._snapshot_path.write_text(
             json.dumps(snapshot, ensure_ascii=False, indent=2),
             encoding="utf-8",
         )
 
+    def close(self) -> None:
+        """Освобождает ресурсы хранилища при остановке бота."""
+
     def replace(self, rows: Iterable[Mapping[str, Any]]) -> None:
         """Полностью заменяет содержимое кэша новыми строками."""
         new_data: Dict[str, Dict[str, Any]] = {}
+        user_chats: Dict[str, Tuple[int, ...]] = {}
+        chat_users: Dict[int, Set[str]] = {}
         for row in rows:
             tg_id = row.get("tg_id")
             if tg_id is None:
                 continue
-            new_data[str(tg_id)] = dict(row)
+            key = str(tg_id)
+            record = dict(row)
+            new_data[key] = record
+            chats = parse_chats(record)
+            user_chats[key] = chats
+            for chat_id in chats:
+                chat_users.setdefault(chat_id, set()).add(key)
+
+        # Индексы и данные подменяются вместе, без await между присваиваниями
         self._data = new_data
+        self._user_chats = user_chats
+        self._chat_users = chat_users
+        self._managed_chats = frozenset(chat_users)
+        self._digests = {}
+
+    def row_digests(self) -> Mapping[str, str]:
+        """Дайджесты строк таблицы, соответствующие текущему содержимому кэша."""
+        return self._digests
+
+    def apply_delta(
+        self,
+        changed: Mapping[str, Mapping[str, Any] | None],
+        digests: Mapping[str, str],
+    ) -> tuple[Dict[str, Mapping[str, Any]], Dict[str, Mapping[str, Any]]]:
+        """
+        Точечно применяет изменения строк таблицы.
+
+        changed — изменившиеся строки (None — строку нужно убрать из кэша),
+        digests — дайджесты всех строк новой версии таблицы; записи,
+        которых в ней нет, удаляются.
+
+        Возвращает состояние затронутых записей до и после изменения —
+        ровно то, что нужно detect_changes().
+        """
+        removed = [key for key in self._data if key not in digests]
+
+        before: Dict[str, Mapping[str, Any]] = {}
+        after: Dict[str, Mapping[str, Any]] = {}
+
+        # Меняем словарь на месте: между чтениями из обработчиков нет await,
+        # поэтому они видят либо старое, либо уже новое состояние.
+        data = self._data
+        for key in removed:
+            before[key] = data.pop(key)
+            self._unindex_user(key)
+
+        for key, row in changed.items():
+            old = data.pop(key, None)
+            if old is not None:
+                before[key] = old
+                self._unindex_user(key)
+            if row is None:
+                continue
+            record = dict(row)
+            data[key] = record
+            after[key] = record
+            self._index_user(key, record)
+
+        if self._managed_chats.symmetric_difference(self._chat_users.keys()):
+            self._managed_chats = frozenset(self._chat_users)
+        self._digests = dict(digests)
+        return before, after
+
+    def revert_delta(
+        self,
+        before: Mapping[str, Mapping[str, Any]],
+        after: Mapping[str, Mapping[str, Any]],
+        digests: Mapping[str, str],
+    ) -> None:
+        """
+        Отменяет apply_delta(), последствия которого не удалось сохранить.
+
+        before/after — то, что вернул apply_delta(), digests — дайджесты до
+        него. Следующая синхронизация снова увидит ту же дельту.
+        """
+        data = self._data
+        for key in after:
+            if data.pop(key, None) is not None:
+                self._unindex_user(key)
+        for key, record in before.items():
+            data[key] = dict(record)
+            self._index_user(key, data[key])
+
+        if self._managed_chats.symmetric_difference(self._chat_users.keys()):
+            self._managed_chats = frozenset(self._chat_users)
+        self._digests = dict(digests)
 
     def snapshot(self) -> Dict[str, Dict[str, Any]]:
         """Возвращает легковесную копию текущего состояния для анализа изменений."""
@@ -76,35 +171,47 @@ class CacheRepository:
         return dict(user) if user else None
 
     def list_user_chats(self, tg_id: int) -> list[int]:
-        user = self._data.get(str(tg_id))
-        if not user:
-            return []
-        chats = user.get("chats") or []
-        result: list[int] = []
-        for chat in chats:
-            try:
-                result.append(int(chat))
-            except (TypeError, ValueError):
-                continue
-        return result
+        return list(self._user_chats.get(str(tg_id), ()))
 
     def user_has_access(self, tg_id: int, chat_id: int) -> bool:
         """Проверяет, есть ли у пользователя доступ к указанному чату."""
-        return chat_id in self.list_user_chats(tg_id)
+        return str(tg_id) in self._chat_users.get(chat_id, ())
 
     def chat_is_managed(self, chat_id: int) -> bool:
         """Проверяет, упоминается ли чат в таблице доступов."""
-        for user in self._data.values():
-            chats = user.get("chats") or []
-            for raw_chat_id in chats:
-                try:
-                    if int(raw_chat_id) == chat_id:
-                        return True
-                except (TypeError, ValueError):
-                    continue
-        return False
+        return chat_id in self._managed_chats
+
+    def managed_chats(self) -> list[int]:
+        """Все чаты, к которым хоть у кого-то есть доступ."""
+        return list(self._managed_chats)
 
     def as_mapping(self) -> Mapping[str, Mapping[str, Any]]:
         """Возвращает текущее состояние без копирования."""
 
-        return self._data
\ No newline at end of file
+        return self._data
+
+    def _index_user(self, key: str, record: Mapping[str, Any]) -> None:
+        chats = parse_chats(record)
+        self._user_chats[key] = chats
+        for chat_id in chats:
+            self._chat_users.setdefault(chat_id, set()).add(key)
+
+    def _unindex_user(self, key: str) -> None:
+        for chat_id in self._user_chats.pop(key, ()):
+            users = self._chat_users.get(chat_id)
+            if users is None:
+                continue
+            users.discard(key)
+            if not users:
+                del self._chat_users[chat_id]
+
+
+def parse_chats(record: Mapping[str, Any]) -> Tuple[int, ...]:
+    """Список chat_id записи в виде целых чисел; некорректные значения пропускаются."""
+    result: list[int] = []
+    for chat in record.get("chats") or []:
+        try:
+            result.append(int(chat))
+        except (TypeError, ValueError):
+            continue
+    return tuple(result)
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+from src.storage.cache import CacheRepository, parse_chats
+from src.utils.logger import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    tg_id    INTEGER PRIMARY KEY,
+    username TEXT NOT NULL DEFAULT '',
+    fio      TEXT NOT NULL DEFAULT '',
+    role     TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS user_chats (
+    tg_id    INTEGER NOT NULL REFERENCES users(tg_id) ON DELETE CASCADE,
+    chat_id  INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (tg_id, chat_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_user_chats_chat ON user_chats (chat_id);
+CREATE TABLE IF NOT EXISTS row_digests (
+    tg_id  INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+"""
+
+# Ограничение SQLite на число параметров в одном запросе
+_CHUNK = 500
+
+
+class _UsersView(Mapping[str, Mapping[str, Any]]):
+    """Read-only представление таблицы users в формате обычного CacheRepository."""
+
+    def __init__(self, repo: "SqliteCacheRepository") -> None:
+        self._repo = repo
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        try:
+            tg_id = int(key)
+        except (TypeError, ValueError):
+            raise KeyError(key) from None
+        user = self._repo.get_user(tg_id)
+        if user is None:
+            raise KeyError(key)
+        return user
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._repo._conn.execute("SELECT tg_id FROM users").fetchall()
+        return (str(tg_id) for (tg_id,) in rows)
+
+    def __len__(self) -> int:
+        return self._repo._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def values(self) -> List[Dict[str, Any]]:  # type: ignore[override]
+        # Один проход по таблицам вместо запроса на каждого пользователя
+        return list(self._repo._load_all().values())
+
+
+class SqliteCacheRepository(CacheRepository):
+    """
+    Кэш пользователей в SQLite (WAL).
+
+    Записи лежат в индексированных таблицах users и user_chats, поэтому
+    проверки доступа — это точечные запросы по первичному ключу или индексу,
+    а не загрузка всей таблицы в память. Полная замена выполняется одной
+    транзакцией. Дельта пишется в транзакцию, которая остаётся открытой до
+    `save_snapshot()`: воркер синхронизации вызывает его после сохранения
+    плана исключений, и при падении между ними база откатывается к прошлой
+    версии таблицы вместе с дайджестами — изменения будут найдены заново.
+    Дайджесты строк хранятся в базе: после перезапуска неизменённые строки
+    таблицы не разбираются заново.
+
+    Запросы идут через одно соединение в потоке event loop: чтения видят
+    ещё не зафиксированную дельту, а коммит в WAL с synchronous=NORMAL не
+    делает fsync. Перенос WAL в основной файл (checkpoint), единственная
+    дорогая операция ввода-вывода, выполняется в фоновом потоке через
+    отдельное соединение.
+    """
+
+    def __init__(self, snapshot_path: Path, db_path: Path) -> None:
+        super().__init__(snapshot_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db_path = db_path
+        self._conn = sqlite3.connect(str(db_path))
+        self._checkpointer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-checkpoint")
+        self._checkpoint_conn = threading.local()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._digests = {
+            str(tg_id): digest
+            for tg_id, digest in self._conn.execute("SELECT tg_id, digest FROM row_digests")
+        }
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    def load_from_disk(self) -> None:
+        """База уже на диске; json-снапшот импортируется только в пустую базу."""
+        if self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+            logger.info(f"Кэш загружен из {self._db_path.name}")
+            return
+        super().load_from_disk()
+
+    def save_snapshot(self) -> None:
+        """Фиксирует дельту и в фоне переносит WAL в основной файл."""
+        self._conn.commit()
+        self._checkpointer.submit(self._checkpoint)
+
+    def close(self) -> None:
+        # Незафиксированная дельта откатывается: план исключений для неё не сохранён
+        self._checkpointer.shutdown(wait=True)
+        self._conn.close()
+
+    def _checkpoint(self) -> None:
+        conn = getattr(self._checkpoint_conn, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self._db_path))
+            self._checkpoint_conn.conn = conn
+        try:
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        except sqlite3.Error as exc:
+            logger.warning(f"[sqlite_cache] Не удалось выполнить checkpoint WAL: {exc}")
+
+    def replace(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        users: List[Tuple[Any, ...]] = []
+        chats: List[Tuple[int, int, int]] = []
+        for row in rows:
+            tg_id = _tg_id(row)
+            if tg_id is None:
+                continue
+            users.append(_user_row(tg_id, row))
+            chats.extend(_chat_rows(tg_id, row))
+
+        with self._conn:
+            self._conn.execute("DELETE FROM user_chats")
+            self._conn.execute("DELETE FROM users")
+            self._conn.execute("DELETE FROM row_digests")
+            self._conn.executemany("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)", users)
+            self._conn.executemany("INSERT OR IGNORE INTO user_chats VALUES (?, ?, ?)", chats)
+        self._digests = {}
+
+    def apply_delta(
+        self,
+        changed: Mapping[str, Mapping[str, Any] | None],
+        digests: Mapping[str, str],
+    ) -> tuple[Dict[str, Mapping[str, Any]], Dict[str, Mapping[str, Any]]]:
+        existing = [tg_id for (tg_id,) in self._conn.execute("SELECT tg_id FROM users")]
+        removed = [tg_id for tg_id in existing if str(tg_id) not in digests]
+        touched = removed + [int(key) for key in changed]
+
+        before: Dict[str, Mapping[str, Any]] = dict(self._load_many(touched))
+        after: Dict[str, Mapping[str, Any]] = {}
+
+        users: List[Tuple[Any, ...]] = []
+        chats: List[Tuple[int, int, int]] = []
+        for key, row in changed.items():
+            if row is None:
+                continue
+            tg_id = int(key)
+            users.append(_user_row(tg_id, row))
+            chats.extend(_chat_rows(tg_id, row))
+            after[key] = {
+                "tg_id": row.get("tg_id"),
+                "username": row.get("username") or "",
+                "fio": row.get("fio") or "",
+                "role": row.get("role") or "",
+                "chats": list(parse_chats(row)),
+            }
+
+        stale_digests = [int(key) for key in self._digests if key not in digests]
+        new_digests = [
+            (int(key), digest)
+            for key, digest in digests.items()
+            if self._digests.get(key) != digest
+        ]
+
+        # Без коммита: транзакцию фиксирует save_snapshot() после сохранения плана исключений
+        try:
+            for chunk in _chunks(touched):
+                marks = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM user_chats WHERE tg_id IN ({marks})", chunk)
+                self._conn.execute(f"DELETE FROM users WHERE tg_id IN ({marks})", chunk)
+            self._conn.executemany("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)", users)
+            self._conn.executemany("INSERT OR IGNORE INTO user_chats VALUES (?, ?, ?)", chats)
+            for chunk in _chunks(stale_digests):
+                marks = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM row_digests WHERE tg_id IN ({marks})", chunk)
+            self._conn.executemany("INSERT OR REPLACE INTO row_digests VALUES (?, ?)", new_digests)
+        except BaseException:
+            self._conn.rollback()
+            raise
+
+        self._digests = dict(digests)
+        return before, after
+
+    def revert_delta(
+        self,
+        before: Mapping[str, Mapping[str, Any]],
+        after: Mapping[str, Mapping[str, Any]],
+        digests: Mapping[str, str],
+    ) -> None:
+        """Дельта ещё не зафиксирована — достаточно откатить транзакцию."""
+        self._conn.rollback()
+        self._digests = dict(digests)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {"tg_id": user["tg_id"], "role": user["role"], "chats": user["chats"]}
+            for key, user in self._load_all().items()
+        }
+
+    def get_user(self, tg_id: int) -> Dict[str, Any] | None:
+        users = self._load_many([tg_id])
+        return users.get(str(tg_id))
+
+    def list_user_chats(self, tg_id: int) -> list[int]:
+        rows = self._conn.execute(
+            "SELECT chat_id FROM user_chats WHERE tg_id = ? ORDER BY position", (tg_id,)
+        )
+        return [chat_id for (chat_id,) in rows]
+
+    def user_has_access(self, tg_id: int, chat_id: int) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM user_chats WHERE tg_id = ? AND chat_id = ?", (tg_id, chat_id)
+        ).fetchone()
+        return row is not None
+
+    def chat_is_managed(self, chat_id: int) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM user_chats WHERE chat_id = ? LIMIT 1", (chat_id,)
+        ).fetchone()
+        return row is not None
+
+    def managed_chats(self) -> list[int]:
+        return [chat_id for (chat_id,) in self._conn.execute("SELECT DISTINCT chat_id FROM user_chats")]
+
+    def as_mapping(self) -> Mapping[str, Mapping[str, Any]]:
+        return _UsersView(self)
+
+    def _load_many(self, tg_ids: Sequence[int]) -> Dict[str, Dict[str, Any]]:
+        result: Dict[str, Dict[str, Any]] = {}
+        for chunk in _chunks(list(tg_ids)):
+            marks = ",".join("?" * len(chunk))
+            for tg_id, username, fio, role in self._conn.execute(
+                f"SELECT tg_id, username, fio, role FROM users WHERE tg_id IN ({marks})", chunk
+            ):
+                result[str(tg_id)] = _record(tg_id, username, fio, role)
+            for tg_id, chat_id in self._conn.execute(
+                f"SELECT tg_id, chat_id FROM user_chats WHERE tg_id IN ({marks}) "
+                "ORDER BY tg_id, position",
+                chunk,
+            ):
+                result[str(tg_id)]["chats"].append(chat_id)
+        return result
+
+    def _load_all(self) -> Dict[str, Dict[str, Any]]:
+        result = {
+            str(tg_id): _record(tg_id, username, fio, role)
+            for tg_id, username, fio, role in self._conn.execute(
+                "SELECT tg_id, username, fio, role FROM users"
+            )
+        }
+        for tg_id, chat_id in self._conn.execute(
+            "SELECT tg_id, chat_id FROM user_chats ORDER BY tg_id, position"
+        ):
+            result[str(tg_id)]["chats"].append(chat_id)
+        return result
+
+
+def _record(tg_id: int, username: str, fio: str, role: str) -> Dict[str, Any]:
+    return {"tg_id": tg_id, "username": username, "fio": fio, "role": role, "chats": []}
+
+
+def _tg_id(row: Mapping[str, Any]) -> int | None:
+    try:
+        return int(row.get("tg_id"))
+    except (TypeError, ValueError):
+        logger.warning(f"[sqlite_cache] Пропускаю запись с некорректным tg_id: {row.get('tg_id')!r}")
+        return None
+
+
+def _user_row(tg_id: int, row: Mapping[str, Any]) -> Tuple[Any, ...]:
+    return (tg_id, row.get("username") or "", row.get("fio") or "", row.get("role") or "")
+
+
+def _chat_rows(tg_id: int, row: Mapping[str, Any]) -> List[Tuple[int, int, int]]:
+    return [(tg_id, chat_id, position) for position, chat_id in enumerate(parse_chats(row))]
+
+
+def _chunks(values: List[int]) -> Iterator[List[int]]:
+    for start in range(0, len(values), _CHUNK):
+        yield values[start:start + _CHUNK]
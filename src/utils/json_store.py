@@ -3,23 +3,34 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Tuple
+
+# The journal is folded into the snapshot once it outgrows the snapshot
+# (but not before it reaches this many bytes).
+_COMPACT_MIN_BYTES = 1024 * 1024
 
 
 class JsonKeyValueStore:
     """Simple JSON backed storage with in-memory caching.
 
-    The store keeps data in memory and persists it on each mutation.
-    File operations are executed in a thread pool so we do not block the
-    event loop. The class is intentionally small but gives us a centralised
-    place to manage tiny persistent dictionaries.
+    The store keeps data in memory. Mutations are appended to a journal
+    (`<path>.journal`, one JSON line per operation, fsynced), so a write costs
+    O(changed keys) rather than a rewrite of the whole file. The journal is
+    periodically compacted into the snapshot, which is written to a temporary
+    file and atomically moved into place — a crash never leaves a truncated
+    snapshot, and a torn last journal line is ignored on load. File operations
+    are executed in a thread pool so we do not block the event loop.
     """
 
     def __init__(self, path: str | Path) -> None:
         self._path = Path(path)
+        self._journal_path = self._path.with_name(self._path.name + ".journal")
         self._lock = asyncio.Lock()
         self._data: Dict[str, Any] | None = None
+        self._journal_bytes = 0
+        self._snapshot_bytes = 0
 
     async def _ensure_loaded(self) -> None:
         if self._data is not None:
@@ -29,46 +40,106 @@ class JsonKeyValueStore:
             if self._data is not None:
                 return
 
-            def _load() -> Dict[str, Any]:
-                if not self._path.exists():
-                    return {}
-                try:
-                    with self._path.open("r", encoding="utf-8") as fh:
-                        return json.load(fh)
-                except json.JSONDecodeError:
-                    # Corrupted file — start from scratch but do not crash the bot.
-                    return {}
-
-            self._data = await asyncio.to_thread(_load)
+            self._data = await asyncio.to_thread(self._load)
+
+    def _load(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        if self._path.exists():
+            self._snapshot_bytes = self._path.stat().st_size
+            try:
+                with self._path.open("r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except json.JSONDecodeError:
+                # Corrupted file — start from scratch but do not crash the bot.
+                data = {}
+
+        if self._journal_path.exists():
+            valid = 0
+            with self._journal_path.open("rb+") as fh:
+                for line in fh:
+                    try:
+                        op = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        # Torn write at the tail: everything before it is intact.
+                        # Cut it off so that new entries are not glued to it.
+                        fh.truncate(valid)
+                        break
+                    _apply(data, op)
+                    valid += len(line)
+            self._journal_bytes = valid
+        return data
 
     async def get(self, key: str, default: Any | None = None) -> Any:
         await self._ensure_loaded()
         assert self._data is not None
         return self._data.get(key, default)
 
-    async def set(self, key: str, value: Any) -> None:
+    async def items(self) -> List[Tuple[str, Any]]:
+        """All key/value pairs in insertion order."""
         await self._ensure_loaded()
         assert self._data is not None
+        return list(self._data.items())
 
-        async with self._lock:
-            self._data[key] = value
-            await self._flush()
+    async def set(self, key: str, value: Any) -> None:
+        await self.update(set_items=[(key, value)])
 
     async def delete(self, key: str) -> None:
-        await self._ensure_loaded()
-        assert self._data is not None
+        await self.update(delete_keys=[key])
 
-        async with self._lock:
-            if key in self._data:
-                del self._data[key]
-                await self._flush()
+    async def update(
+        self,
+        set_items: Iterable[Tuple[str, Any]] = (),
+        delete_keys: Iterable[str] = (),
+    ) -> None:
+        """Deletes `delete_keys`, then sets `set_items` — as one durable journal write.
 
-    async def _flush(self) -> None:
+        Deleting and re-setting a key moves it to the end of the insertion order.
+        """
+        await self._ensure_loaded()
         assert self._data is not None
 
-        def _dump(data: Dict[str, Any]) -> None:
-            self._path.parent.mkdir(parents=True, exist_ok=True)
-            with self._path.open("w", encoding="utf-8") as fh:
-                json.dump(data, fh, ensure_ascii=False, indent=2)
-
-        await asyncio.to_thread(_dump, dict(self._data))
\ No newline at end of file
+        async with self._lock:
+            ops: List[Dict[str, Any]] = [{"d": key} for key in delete_keys if key in self._data]
+            ops += [{"k": key, "v": value} for key, value in set_items]
+            if not ops:
+                return
+            for op in ops:
+                _apply(self._data, op)
+
+            lines = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops)
+            self._journal_bytes += await asyncio.to_thread(self._append, lines)
+
+            if self._journal_bytes > max(_COMPACT_MIN_BYTES, self._snapshot_bytes):
+                self._snapshot_bytes = await asyncio.to_thread(self._compact, dict(self._data))
+                self._journal_bytes = 0
+
+    def _append(self, lines: str) -> int:
+        payload = lines.encode("utf-8")
+        self._journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._journal_path.open("ab") as fh:
+            fh.write(payload)
+            fh.flush()
+            os.fsync(fh.fileno())
+        return len(payload)
+
+    def _compact(self, data: Dict[str, Any]) -> int:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False, indent=2)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, self._path)
+        # Replaying the old journal over the new snapshot is harmless, so a
+        # crash between these two steps loses nothing.
+        with self._journal_path.open("w", encoding="utf-8") as fh:
+            fh.flush()
+            os.fsync(fh.fileno())
+        return self._path.stat().st_size
+
+
+def _apply(data: Dict[str, Any], op: Dict[str, Any]) -> None:
+    if "d" in op:
+        data.pop(op["d"], None)
+    else:
+        data[op["k"]] = op["v"]
@@ -1,12 +1,14 @@
 """Утилита для мониторинга использования памяти."""
 import gc
-import psutil
+
 from src.utils.logger import logger
 
 
 def log_memory_usage(context: str = "") -> None:
     """Логирует текущее использование памяти процессом."""
     try:
+        import psutil  # ленивый импорт: не замедляет старт бота
+
         process = psutil.Process()
         mem_info = process.memory_info()
         mem_mb = mem_info.rss / 1024 / 1024  # RSS в мегабайтах
@@ -0,0 +1,256 @@
+"""Профилирование по запросу: снимки tracemalloc и сэмплирующий CPU-профайлер."""
+from __future__ import annotations
+
+import asyncio
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.utils.logger import logger
+
+Frame = Tuple[str, str, int]  # (файл, функция, строка)
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+class MemoryTracer:
+    """
+    Разница аллокаций между снимками tracemalloc.
+
+    Первый `snapshot()` включает трассировку и запоминает базовый снимок,
+    каждый следующий пишет в файл top-N строк кода по приросту памяти
+    относительно предыдущего снимка. `stop()` выключает трассировку —
+    пока она включена, аллокации заметно дороже.
+    """
+
+    def __init__(self, output_dir: Path, *, top_n: int = 30, frames: int = 1) -> None:
+        self._output_dir = output_dir
+        self._top_n = top_n
+        self._frames = frames
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def snapshot(self) -> Optional[Path]:
+        """Снимок памяти; возвращает путь к отчёту или None, если трассировка только включена."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._frames)
+            self._previous = self._take()
+            logger.info("🧠 tracemalloc включён, базовый снимок сохранён")
+            return None
+
+        current = self._take()
+        previous = self._previous or current
+        self._previous = current
+        diff = current.compare_to(previous, "lineno")
+        traced, peak = tracemalloc.get_traced_memory()
+
+        lines = [
+            f"# tracemalloc diff {_timestamp()}",
+            f"# отслеживается {traced / 1024 / 1024:.1f} MB, пик {peak / 1024 / 1024:.1f} MB",
+            "",
+        ]
+        lines.extend(str(stat) for stat in diff[: self._top_n])
+        path = self._write(f"memory-{_timestamp()}.txt", lines)
+        logger.info(f"🧠 Разница снимков памяти записана в {path}")
+        return path
+
+    def stop(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("🧠 tracemalloc выключен")
+        self._previous = None
+
+    def _take(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+    def _write(self, name: str, lines: List[str]) -> Path:
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+        path = self._output_dir / name
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return path
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий CPU-профайлер потока event loop.
+
+    Отдельный поток раз в `interval` секунд читает текущий стек потока
+    цикла через `sys._current_frames()` и считает одинаковые стеки.
+    Бот при этом не останавливается и не инструментируется, накладные
+    расходы — один захват GIL на сэмпл. Результат: стеки в формате
+    collapsed (flamegraph.pl, speedscope) и сводка по функциям.
+    """
+
+    def __init__(self, output_dir: Path, *, interval: float = 0.005, top_n: int = 30) -> None:
+        self._output_dir = output_dir
+        self._interval = interval
+        self._top_n = top_n
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, duration: float) -> Path:
+        """Сэмплирует поток текущего event loop `duration` секунд и пишет отчёт."""
+        if self._lock.locked():
+            raise RuntimeError("CPU-профилирование уже идёт")
+        async with self._lock:
+            target = threading.get_ident()
+            stop = threading.Event()
+            stacks: Counter[Tuple[Frame, ...]] = Counter()
+            sampler = threading.Thread(
+                target=self._sample,
+                args=(target, stop, stacks),
+                name="cpu-profiler",
+                daemon=True,
+            )
+            logger.info(f"🔥 CPU-профилирование на {duration:.0f} сек")
+            started = time.perf_counter()
+            sampler.start()
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                stop.set()
+                await asyncio.to_thread(sampler.join)
+            elapsed = time.perf_counter() - started
+            path = await asyncio.to_thread(self._report, stacks, elapsed)
+        logger.info(f"🔥 CPU-профиль ({sum(stacks.values())} сэмплов) записан в {path}")
+        return path
+
+    def _sample(self, target: int, stop: threading.Event, stacks: Counter[Tuple[Frame, ...]]) -> None:
+        while not stop.wait(self._interval):
+            frame = sys._current_frames().get(target)
+            stack: List[Frame] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, frame.f_lineno))
+                frame = frame.f_back
+            if stack:
+                stacks[tuple(reversed(stack))] += 1
+
+    def _report(self, stacks: Counter[Tuple[Frame, ...]], elapsed: float) -> Path:
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = _timestamp()
+
+        folded = self._output_dir / f"cpu-{stamp}.folded"
+        folded.write_text(
+            "".join(
+                ";".join(f"{name} ({_short(filename)}:{line})" for filename, name, line in stack)
+                + f" {count}\n"
+                for stack, count in stacks.most_common()
+            ),
+            encoding="utf-8",
+        )
+
+        total = sum(stacks.values()) or 1
+        own: Counter[Tuple[str, str]] = Counter()
+        cumulative: Counter[Tuple[str, str]] = Counter()
+        for stack, count in stacks.items():
+            filename, name, _ = stack[-1]
+            own[(filename, name)] += count
+            for function in {(filename, name) for filename, name, _ in stack}:
+                cumulative[function] += count
+
+        lines = [
+            f"# CPU-профиль {stamp}: {elapsed:.1f} сек, {sum(stacks.values())} сэмплов",
+            f"# стеки: {folded.name}",
+            "",
+            "## Собственное время (функция на вершине стека)",
+        ]
+        lines.extend(_rows(own, total, self._top_n))
+        lines += ["", "## Суммарное время (функция где-либо в стеке)"]
+        lines.extend(_rows(cumulative, total, self._top_n))
+
+        summary = self._output_dir / f"cpu-{stamp}.txt"
+        summary.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return summary
+
+
+def _short(filename: str) -> str:
+    parts = Path(filename).parts
+    return "/".join(parts[-2:]) if len(parts) > 1 else filename
+
+
+def _rows(counter: Counter[Tuple[str, str]], total: int, top_n: int) -> List[str]:
+    return [
+        f"{count * 100 / total:6.2f}%  {count:7d}  {name} ({_short(filename)})"
+        for (filename, name), count in counter.most_common(top_n)
+    ]
+
+
+class Profiler:
+    """
+    Точка входа профилирования во время работы бота.
+
+    Запускается сигналами (SIGUSR1 — снимок памяти, SIGUSR2 — CPU-профиль)
+    или командой администратора; отчёты складываются в `output_dir`.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        *,
+        cpu_duration: float = 30.0,
+        sample_interval: float = 0.005,
+        top_n: int = 30,
+    ) -> None:
+        self.output_dir = output_dir
+        self.cpu_duration = cpu_duration
+        self.memory = MemoryTracer(output_dir, top_n=top_n)
+        self.cpu = SamplingProfiler(output_dir, interval=sample_interval, top_n=top_n)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def memory_snapshot(self) -> Optional[Path]:
+        # Сравнение снимков на большом кэше занимает заметное время — не в event loop
+        return await asyncio.to_thread(self.memory.snapshot)
+
+    async def cpu_profile(self, duration: float | None = None) -> Path:
+        return await self.cpu.profile(duration or self.cpu_duration)
+
+    def install_signal_handlers(self, loop: asyncio.AbstractEventLoop) -> None:
+        """SIGUSR1 — снимок памяти, SIGUSR2 — CPU-профиль (где сигналы поддерживаются)."""
+        handlers: Dict[str, Callable[[], Awaitable[object]]] = {
+            "SIGUSR1": self.memory_snapshot,
+            "SIGUSR2": self.cpu_profile,
+        }
+        for name, action in handlers.items():
+            signum = getattr(signal, name, None)
+            if signum is None:
+                continue
+            try:
+                loop.add_signal_handler(signum, self.spawn, action)
+            except NotImplementedError:
+                continue
+
+    def spawn(self, action: Callable[[], Awaitable[object]]) -> None:
+        """Выполняет профилирование в фоне; ошибки только логируются."""
+        task = asyncio.create_task(action())
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            logger.warning(f"⚠️ Профилирование не выполнено: {exc}")
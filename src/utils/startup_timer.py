@@ -0,0 +1,33 @@
+"""Замер длительности этапов запуска бота."""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from src.utils.logger import logger
+
+
+class StartupTimer:
+    """Копит длительности этапов старта и выводит их одной сводкой."""
+
+    def __init__(self, started_at: float | None = None) -> None:
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        self._phases: List[Tuple[str, float]] = []
+
+    def mark(self, name: str, seconds: float) -> None:
+        self._phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name, time.perf_counter() - started)
+
+    def report(self) -> None:
+        total = time.perf_counter() - self._started_at
+        lines = [f"⏱ Запуск занял {total:.2f} сек:"]
+        lines.extend(f"   • {name}: {seconds * 1000:.0f} мс" for name, seconds in self._phases)
+        logger.info("\n".join(lines))
@@ -0,0 +1,46 @@
+"""
+Локальная имитация push-уведомлений Drive для проверки SheetPushReceiver.
+
+Пример:
+    python -m tools.fake_drive_push --token secret --count 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import uuid
+
+import aiohttp
+
+
+async def _post(url: str, channel_id: str, token: str, state: str, count: int, delay: float) -> None:
+    async with aiohttp.ClientSession() as session:
+        for number in range(1, count + 1):
+            headers = {
+                "X-Goog-Channel-ID": channel_id,
+                "X-Goog-Channel-Token": token,
+                "X-Goog-Resource-State": state,
+                "X-Goog-Message-Number": str(number),
+                "X-Goog-Resource-ID": "fake-resource",
+            }
+            async with session.post(url, headers=headers) as response:
+                print(f"#{number} {state} -> HTTP {response.status}")
+            if number < count:
+                await asyncio.sleep(delay)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Отправляет фейковые push-уведомления Drive")
+    parser.add_argument("--url", default="http://127.0.0.1:8081/drive/notifications")
+    parser.add_argument("--token", required=True, help="значение SHEETS_PUSH_TOKEN")
+    parser.add_argument("--channel-id", default=str(uuid.uuid4()))
+    parser.add_argument("--state", default="update")
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    asyncio.run(_post(args.url, args.channel_id, args.token, args.state, args.count, args.delay))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Локальный фейковый Google Sheets API для нагрузочных прогонов.
+
+Отдаёт `spreadsheets.get` (modifiedTime и размеры листов) и
+`values:batchGet` по синтетическим листам "Доступы"/"Чаты" из
+`benchmarks.generators`. Правки таблицы (`grant`/`revoke`) меняют строки и
+modifiedTime — бот видит их так же, как настоящие. Можно добавить
+задержку ответа и долю ответов 429 с Retry-After.
+
+Пример (бот запущен с GOOGLE_API_URL=http://127.0.0.1:8091):
+    python -m tools.fake_sheets_api --users 10000 --chats 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from aiohttp import web
+
+from benchmarks.generators import Scenario, Sheet, generate_access, generate_mapping
+
+ACCESS_SHEET = "Доступы"
+MAPPING_SHEET = "Чаты"
+
+_RANGE_RE = re.compile(r"^'?(?P<sheet>.+?)'?!(?P<start>[A-Z]+)(?P<top>\d+):(?P<end>[A-Z]+)(?P<bottom>\d+)$")
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index
+
+
+class FakeSheetsAPI:
+    """Состояние и HTTP-приложение фейкового Sheets API."""
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        *,
+        latency: float = 0.0,
+        quota_error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.scenario = scenario
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self._rng = random.Random(seed)
+        self.sheets: Dict[str, Sheet] = {
+            ACCESS_SHEET: generate_access(scenario, seed=seed),
+            MAPPING_SHEET: generate_mapping(scenario.chats),
+        }
+        self.modified = datetime.now(timezone.utc)
+        self.calls: Dict[str, int] = {"get": 0, "batchGet": 0, "quota_errors": 0}
+        self.loaded = asyncio.Event()
+
+    @property
+    def access(self) -> Sheet:
+        return self.sheets[ACCESS_SHEET]
+
+    def grant(self, tg_ids: List[int], chat_index: int) -> None:
+        """Правка таблицы: выдаёт пользователям доступ к чату (ставит "+")."""
+        column = 3 + chat_index
+        wanted = {str(tg_id) for tg_id in tg_ids}
+        for row in self.access[1:]:
+            if row and row[0] in wanted:
+                row.extend([""] * (column + 1 - len(row)))
+                row[column] = "+"
+        self._touch()
+
+    def revoke(self, tg_ids: List[int], chat_index: int) -> None:
+        """Правка таблицы: снимает доступ пользователей к чату."""
+        column = 3 + chat_index
+        wanted = {str(tg_id) for tg_id in tg_ids}
+        for row in self.access[1:]:
+            if row and row[0] in wanted and len(row) > column:
+                row[column] = ""
+        self._touch()
+
+    def _touch(self) -> None:
+        self.modified = datetime.now(timezone.utc)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v4/spreadsheets/{spreadsheet_id}/values:batchGet", self._batch_get)
+        app.router.add_get("/v4/spreadsheets/{spreadsheet_id}", self._get)
+        return app
+
+    async def _simulate(self) -> web.Response | None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.quota_error_rate and self._rng.random() < self.quota_error_rate:
+            self.calls["quota_errors"] += 1
+            return web.json_response(
+                {"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}},
+                status=429,
+                headers={"Retry-After": "5"},
+            )
+        return None
+
+    async def _get(self, request: web.Request) -> web.Response:
+        self.calls["get"] += 1
+        error = await self._simulate()
+        if error is not None:
+            return error
+        return web.json_response(
+            {
+                "properties": {"modifiedTime": self.modified.isoformat().replace("+00:00", "Z")},
+                "sheets": [
+                    {
+                        "properties": {
+                            "title": title,
+                            "gridProperties": {
+                                "rowCount": len(rows),
+                                "columnCount": max((len(row) for row in rows), default=1),
+                            },
+                        }
+                    }
+                    for title, rows in self.sheets.items()
+                ],
+            }
+        )
+
+    async def _batch_get(self, request: web.Request) -> web.Response:
+        self.calls["batchGet"] += 1
+        error = await self._simulate()
+        if error is not None:
+            return error
+
+        value_ranges = []
+        for spec in request.query.getall("ranges", []):
+            sheet, bounds = self._parse_range(spec)
+            rows = self.sheets.get(sheet, [])
+            top, bottom, left, right = bounds
+            values = [row[left - 1:right] for row in rows[top - 1:bottom]]
+            value_ranges.append({"range": spec, "values": values})
+        self.loaded.set()
+        return web.json_response({"valueRanges": value_ranges})
+
+    @staticmethod
+    def _parse_range(spec: str) -> Tuple[str, Tuple[int, int, int, int]]:
+        match = _RANGE_RE.match(spec)
+        if match is None:
+            raise web.HTTPBadRequest(text=f"Unsupported range: {spec}")
+        sheet = match["sheet"].replace("''", "'")
+        return sheet, (
+            int(match["top"]),
+            int(match["bottom"]),
+            _column_index(match["start"]),
+            _column_index(match["end"]),
+        )
+
+
+def cache_records(api: FakeSheetsAPI) -> List[Dict[str, Any]]:
+    """
+    Записи кэша бота, соответствующие текущему листу "Доступы".
+
+    load_driver кладёт их в cache.json до запуска бота, чтобы первая
+    синхронизация не рассылала уведомления всем пользователям таблицы.
+    """
+    mapping = {row[0]: int(row[1]) for row in api.sheets[MAPPING_SHEET][1:]}
+    headers = api.access[0]
+    records = []
+    for row in api.access[1:]:
+        chats = [
+            mapping[header]
+            for header, cell in zip(headers[3:], row[3:])
+            if cell == "+" and header in mapping
+        ]
+        records.append(
+            {"tg_id": int(row[0]), "username": row[1], "fio": row[2], "role": "", "chats": chats}
+        )
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Фейковый Google Sheets API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--density", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, сек")
+    parser.add_argument("--quota-error-rate", type=float, default=0.0, help="доля ответов 429")
+    args = parser.parse_args()
+
+    api = FakeSheetsAPI(
+        Scenario(args.users, args.chats, args.density),
+        latency=args.latency,
+        quota_error_rate=args.quota_error_rate,
+    )
+    print(f"Фейковый Sheets API: http://{args.host}:{args.port} (GOOGLE_API_URL)")
+    web.run_app(api.build_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
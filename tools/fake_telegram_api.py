@@ -0,0 +1,327 @@
+"""
+Локальный фейковый сервер Bot API для нагрузочных прогонов.
+
+Реализует методы, которыми пользуется бот (getMe, getUpdates, getChat,
+getChatMember, ban/unbanChatMember, create/revokeChatInviteLink,
+sendMessage, deleteMessage, approve/declineChatJoinRequest и др.), держит
+состав чатов в памяти и умеет отвечать с задержкой и случайными 429
+(RetryAfter). Апдейты для long polling подкладываются через `push_update`
+(из load_driver) или POST /_control/updates.
+
+Пример (бот запущен с TELEGRAM_API_URL=http://127.0.0.1:8090):
+    python -m tools.fake_telegram_api --latency 0.05 --flood-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import secrets
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+
+from aiohttp import web
+
+BOT_ID = 4242
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+class _TelegramError(Exception):
+    def __init__(self, code: int, description: str, retry_after: int | None = None) -> None:
+        super().__init__(description)
+        self.code = code
+        self.description = description
+        self.retry_after = retry_after
+
+
+class FakeTelegramAPI:
+    """Состояние и HTTP-приложение фейкового Bot API."""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        flood_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._updates: List[Dict[str, Any]] = []
+        self._updates_changed = asyncio.Condition()
+        self._message_ids = itertools.count(1)
+        self.members: Dict[Tuple[int, int], str] = {}
+        self.invite_links: Dict[str, Dict[str, Any]] = {}
+        self.calls: Counter[str] = Counter()
+        self.floods: Counter[str] = Counter()
+        self.polled = asyncio.Event()
+        # Ожидания load_driver: ключ события → future с моментом его наступления
+        self._expectations: Dict[str, List[asyncio.Future[float]]] = defaultdict(list)
+        self._methods: Dict[str, Handler] = {
+            "getMe": self._get_me,
+            "getUpdates": self._get_updates,
+            "deleteWebhook": lambda _: True,
+            "setWebhook": lambda _: True,
+            "getChat": self._get_chat,
+            "getChatMember": self._get_chat_member,
+            "banChatMember": self._ban_chat_member,
+            "unbanChatMember": self._unban_chat_member,
+            "createChatInviteLink": self._create_chat_invite_link,
+            "revokeChatInviteLink": self._revoke_chat_invite_link,
+            "exportChatInviteLink": lambda params: self._new_link(int(params["chat_id"]))["invite_link"],
+            "sendMessage": self._send_message,
+            "sendDocument": self._send_message,
+            "deleteMessage": lambda _: True,
+            "approveChatJoinRequest": self._approve_join_request,
+            "declineChatJoinRequest": self._decline_join_request,
+            "answerCallbackQuery": lambda _: True,
+        }
+
+    # ---------- управление из load_driver ----------
+
+    async def push_update(self, update: Dict[str, Any]) -> None:
+        async with self._updates_changed:
+            self._updates.append(update)
+            self._updates_changed.notify_all()
+
+    def expect(self, key: str) -> asyncio.Future[float]:
+        """Future, которое завершится моментом (perf_counter) события `key`."""
+        future: asyncio.Future[float] = asyncio.get_running_loop().create_future()
+        self._expectations[key].append(future)
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self.calls),
+            "floods": dict(self.floods),
+            "pending_updates": len(self._updates),
+            "members": len(self.members),
+            "invite_links": len(self.invite_links),
+        }
+
+    def build_app(self) -> web.Application:
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        app.router.add_get("/bot{token}/{method}", self._handle)
+        app.router.add_post("/_control/updates", self._control_updates)
+        app.router.add_get("/_control/stats", self._control_stats)
+        return app
+
+    # ---------- HTTP ----------
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        handler = self._methods.get(method)
+        if handler is None:
+            return _error(404, "Not Found: method not found")
+
+        params = await _read_params(request)
+        if method != "getUpdates":
+            await self._simulate_network()
+            if self.flood_rate and self._rng.random() < self.flood_rate:
+                self.floods[method] += 1
+                return _error(
+                    429,
+                    f"Too Many Requests: retry after {self.retry_after}",
+                    retry_after=self.retry_after,
+                )
+        try:
+            result = handler(params)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except _TelegramError as exc:
+            return _error(exc.code, exc.description, retry_after=exc.retry_after)
+        except (KeyError, ValueError) as exc:
+            return _error(400, f"Bad Request: {exc}")
+        return web.json_response({"ok": True, "result": result})
+
+    async def _control_updates(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        updates = payload if isinstance(payload, list) else [payload]
+        for update in updates:
+            await self.push_update(update)
+        return web.json_response({"queued": len(updates)})
+
+    async def _control_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    async def _simulate_network(self) -> None:
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _fire(self, key: str) -> None:
+        now = time.perf_counter()
+        for future in self._expectations.pop(key, []):
+            if not future.done():
+                future.set_result(now)
+
+    # ---------- методы Bot API ----------
+
+    def _get_me(self, _: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": BOT_ID,
+            "is_bot": True,
+            "first_name": "Fake AutoControlBot",
+            "username": "fake_autocontrol_bot",
+            "can_join_groups": True,
+            "can_read_all_group_messages": False,
+            "supports_inline_queries": False,
+        }
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.polled.set()
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        async with self._updates_changed:
+            # Подтверждённые offset'ом апдейты больше не нужны
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]
+            if not self._updates and timeout > 0:
+                try:
+                    await asyncio.wait_for(self._updates_changed.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return self._updates[:limit]
+
+    def _get_chat(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        chat_id = int(params["chat_id"])
+        chat: Dict[str, Any] = {"id": chat_id, "accent_color_id": 0, "max_reaction_count": 11}
+        if chat_id > 0:
+            chat.update(type="private", first_name=f"User {chat_id}")
+        else:
+            chat.update(type="supergroup", title=f"Chat {chat_id}")
+        return chat
+
+    def _get_chat_member(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        chat_id, user_id = int(params["chat_id"]), int(params["user_id"])
+        status = self.members.get((chat_id, user_id), "left")
+        member: Dict[str, Any] = {"status": status, "user": _user(user_id)}
+        if status == "kicked":
+            member["until_date"] = 0
+        return member
+
+    def _ban_chat_member(self, params: Dict[str, Any]) -> bool:
+        chat_id, user_id = int(params["chat_id"]), int(params["user_id"])
+        self.members[(chat_id, user_id)] = "kicked"
+        self._fire(f"ban:{chat_id}:{user_id}")
+        return True
+
+    def _unban_chat_member(self, params: Dict[str, Any]) -> bool:
+        chat_id, user_id = int(params["chat_id"]), int(params["user_id"])
+        only_if_banned = str(params.get("only_if_banned", "")).lower() == "true"
+        if not only_if_banned or self.members.get((chat_id, user_id)) == "kicked":
+            self.members[(chat_id, user_id)] = "left"
+        return True
+
+    def _create_chat_invite_link(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        link = self._new_link(int(params["chat_id"]))
+        link["name"] = params.get("name")
+        if params.get("member_limit"):
+            link["member_limit"] = int(params["member_limit"])
+        link["creates_join_request"] = str(params.get("creates_join_request", "")).lower() == "true"
+        return link
+
+    def _revoke_chat_invite_link(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        link = self.invite_links.get(params["invite_link"])
+        if link is None:
+            raise _TelegramError(400, "Bad Request: INVITE_HASH_EXPIRED")
+        link["is_revoked"] = True
+        return link
+
+    def _new_link(self, chat_id: int) -> Dict[str, Any]:
+        url = f"https://t.me/+fake{secrets.token_hex(8)}"
+        link = {
+            "invite_link": url,
+            "creator": _user(BOT_ID, is_bot=True),
+            "creates_join_request": False,
+            "is_primary": False,
+            "is_revoked": False,
+        }
+        self.invite_links[url] = link
+        return link
+
+    def _send_message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        chat_id = int(params["chat_id"])
+        self._fire(f"message:{chat_id}")
+        chat = self._get_chat({"chat_id": chat_id})
+        chat.pop("accent_color_id", None)
+        chat.pop("max_reaction_count", None)
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": chat,
+            "from": _user(BOT_ID, is_bot=True),
+            "text": params.get("text") or params.get("caption") or "",
+        }
+
+    def _approve_join_request(self, params: Dict[str, Any]) -> bool:
+        chat_id, user_id = int(params["chat_id"]), int(params["user_id"])
+        self.members[(chat_id, user_id)] = "member"
+        self._fire(f"join:{chat_id}:{user_id}")
+        return True
+
+    def _decline_join_request(self, params: Dict[str, Any]) -> bool:
+        chat_id, user_id = int(params["chat_id"]), int(params["user_id"])
+        self._fire(f"join:{chat_id}:{user_id}")
+        return True
+
+
+def _user(user_id: int, *, is_bot: bool = False) -> Dict[str, Any]:
+    return {"id": user_id, "is_bot": is_bot, "first_name": f"User {user_id}"}
+
+
+def _error(code: int, description: str, *, retry_after: int | None = None) -> web.Response:
+    payload: Dict[str, Any] = {"ok": False, "error_code": code, "description": description}
+    if retry_after is not None:
+        payload["parameters"] = {"retry_after": retry_after}
+    return web.json_response(payload, status=code)
+
+
+async def _read_params(request: web.Request) -> Dict[str, Any]:
+    """Параметры метода: aiogram шлёт multipart/form-data, сложные значения — JSON-строками."""
+    if request.content_type == "application/json":
+        return await request.json()
+    form = await request.post()
+    params = {**request.query, **{key: value for key, value in form.items() if isinstance(value, str)}}
+    for key, value in params.items():
+        if isinstance(value, str) and value[:1] in "[{":
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                pass
+    return params
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Фейковый сервер Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, сек")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, сек")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    api = FakeTelegramAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        flood_rate=args.flood_rate,
+        retry_after=args.retry_after,
+    )
+    print(f"Фейковый Bot API: http://{args.host}:{args.port} (TELEGRAM_API_URL)")
+    web.run_app(api.build_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
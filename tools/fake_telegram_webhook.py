@@ -0,0 +1,114 @@
+"""
+Локальная имитация Telegram, отправляющая апдейты на webhook бота.
+
+Пример (бот запущен с TELEGRAM_MODE=webhook и TELEGRAM_WEBHOOK_SECRET=secret):
+    python -m tools.fake_telegram_webhook --secret secret --kind chat_member --count 200
+
+Обработчики бота при этом обращаются к настоящему Bot API; для полностью
+локального прогона укажите боту адрес фейкового сервера Bot API.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from typing import Any, Dict
+
+import aiohttp
+
+_update_ids = itertools.count(random.randint(1, 10**6))
+
+
+def _user(tg_id: int) -> Dict[str, Any]:
+    return {"id": tg_id, "is_bot": False, "first_name": f"User {tg_id}", "username": f"user{tg_id}"}
+
+
+def start_message(tg_id: int) -> Dict[str, Any]:
+    return {
+        "update_id": next(_update_ids),
+        "message": {
+            "message_id": random.randint(1, 10**6),
+            "date": int(time.time()),
+            "chat": {"id": tg_id, "type": "private", "first_name": f"User {tg_id}"},
+            "from": _user(tg_id),
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+def chat_member(chat_id: int, tg_id: int, *, joined: bool = True) -> Dict[str, Any]:
+    old, new = ("left", "member") if joined else ("member", "left")
+    return {
+        "update_id": next(_update_ids),
+        "chat_member": {
+            "chat": {"id": chat_id, "type": "supergroup", "title": f"Chat {chat_id}"},
+            "from": _user(tg_id),
+            "date": int(time.time()),
+            "old_chat_member": {"status": old, "user": _user(tg_id)},
+            "new_chat_member": {"status": new, "user": _user(tg_id)},
+        },
+    }
+
+
+def chat_join_request(chat_id: int, tg_id: int) -> Dict[str, Any]:
+    return {
+        "update_id": next(_update_ids),
+        "chat_join_request": {
+            "chat": {"id": chat_id, "type": "supergroup", "title": f"Chat {chat_id}"},
+            "from": _user(tg_id),
+            "user_chat_id": tg_id,
+            "date": int(time.time()),
+        },
+    }
+
+
+def build_update(kind: str, chat_id: int, tg_id: int) -> Dict[str, Any]:
+    if kind == "start":
+        return start_message(tg_id)
+    if kind == "chat_member":
+        return chat_member(chat_id, tg_id, joined=True)
+    if kind == "join_request":
+        return chat_join_request(chat_id, tg_id)
+    return random.choice([start_message(tg_id), chat_member(chat_id, tg_id)])
+
+
+async def _post(args: argparse.Namespace) -> None:
+    statuses: Counter[int] = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    headers = {"X-Telegram-Bot-Api-Secret-Token": args.secret}
+
+    async with aiohttp.ClientSession() as session:
+
+        async def _send(number: int) -> None:
+            tg_id = args.first_user + number % args.users
+            payload = build_update(args.kind, args.chat_id, tg_id)
+            async with semaphore:
+                async with session.post(args.url, json=payload, headers=headers) as response:
+                    statuses[response.status] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_send(number) for number in range(args.count)))
+        elapsed = time.perf_counter() - started
+
+    print(f"Отправлено {args.count} апдейтов за {elapsed:.2f} сек: {dict(statuses)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Отправляет фейковые апдейты Telegram на webhook")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/telegram/webhook")
+    parser.add_argument("--secret", required=True, help="значение TELEGRAM_WEBHOOK_SECRET")
+    parser.add_argument("--kind", choices=["start", "chat_member", "join_request", "mixed"], default="mixed")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--chat-id", type=int, default=-1001000000001)
+    parser.add_argument("--first-user", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=50)
+    asyncio.run(_post(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Нагрузочный прогон настоящего бота (`python -m src.main`) против фейковых API.
+
+Драйвер поднимает в своём процессе фейковые Bot API и Sheets API,
+запускает бота отдельным процессом с TELEGRAM_API_URL/GOOGLE_API_URL,
+указывающими на них, и с отдельным STORAGE_DIR, а затем подаёт нагрузку:
+
+    start  — волна /start от пользователей из таблицы; готово, когда бот
+             ответил пользователю сообщением;
+    join   — волна заявок на вступление в чат (бот запускается с
+             JOIN_REQUESTS_ENABLED=1); готово, когда заявка одобрена или отклонена;
+    edits  — массовая правка таблицы: выдача чата N пользователям;
+             готово, когда пользователь получил уведомление.
+
+В конце печатаются пропускная способность, перцентили задержки и
+счётчики вызовов фейковых API.
+
+Пример:
+    python -m tools.load_driver start --count 2000 --rate 200 --users 10000 --tg-flood-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from aiohttp import web
+
+from benchmarks.generators import Scenario, chat_id
+from tools.fake_sheets_api import FakeSheetsAPI, cache_records
+from tools.fake_telegram_api import FakeTelegramAPI
+from tools.fake_telegram_webhook import chat_join_request, start_message
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FAKE_TOKEN = "123456:FAKE-load-test-token"
+
+
+async def _serve(app: web.Application, host: str, port: int) -> Callable[[], Awaitable[None]]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner.cleanup
+
+
+def _percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(share * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def _start_bot(
+    args: argparse.Namespace, sheets: FakeSheetsAPI, workdir: Path
+) -> asyncio.subprocess.Process:
+    storage = workdir / "storage"
+    storage.mkdir(parents=True, exist_ok=True)
+    # Кэш совпадает с таблицей: первая синхронизация не рассылает уведомления всем
+    (storage / "cache.json").write_text(
+        json.dumps(cache_records(sheets), ensure_ascii=False), encoding="utf-8"
+    )
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(REPO_ROOT),
+        "BOT_TOKEN": FAKE_TOKEN,
+        "TELEGRAM_API_URL": f"http://{args.host}:{args.tg_port}",
+        "GOOGLE_API_URL": f"http://{args.host}:{args.sheets_port}",
+        "GOOGLE_SHEETS_URL": "https://docs.google.com/spreadsheets/d/load-test/edit",
+        "STORAGE_DIR": str(storage),
+        "TELEGRAM_MODE": "polling",
+        "SHEETS_PUSH_ENABLED": "",
+        "SHEETS_POLL_MIN_INTERVAL": str(args.poll_interval),
+        "JOIN_REQUESTS_ENABLED": "1" if args.scenario == "join" else "",
+        "METRICS_PORT": str(args.metrics_port),
+    }
+    with (workdir / "bot.out").open("wb") as log:
+        return await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "src.main",
+            cwd=workdir, env=env, stdout=log, stderr=asyncio.subprocess.STDOUT,
+        )
+
+
+async def _stop_bot(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+    process.send_signal(signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), timeout=30)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+async def _drive(
+    args: argparse.Namespace, telegram: FakeTelegramAPI, sheets: FakeSheetsAPI
+) -> tuple[List[float], int, float]:
+    """Подаёт нагрузку; возвращает задержки, число таймаутов и длительность волны."""
+    tg_ids = [int(row[0]) for row in sheets.access[1:]]
+    target_chat = chat_id(args.chat_index)
+    interval = 1 / args.rate if args.rate > 0 else 0.0
+    waits: List[tuple[float, asyncio.Future[float]]] = []
+
+    if args.scenario == "edits":
+        column = 3 + args.chat_index
+        users = [
+            int(row[0]) for row in sheets.access[1:]
+            if len(row) <= column or row[column] != "+"
+        ][: args.count]
+        futures = [telegram.expect(f"message:{tg_id}") for tg_id in users]
+        started = time.perf_counter()
+        sheets.grant(users, args.chat_index)
+        waits = [(started, future) for future in futures]
+    else:
+        started = time.perf_counter()
+        for number in range(args.count):
+            tg_id = tg_ids[number % len(tg_ids)]
+            if args.scenario == "start":
+                future = telegram.expect(f"message:{tg_id}")
+                update = start_message(tg_id)
+            else:
+                future = telegram.expect(f"join:{target_chat}:{tg_id}")
+                update = chat_join_request(target_chat, tg_id)
+            waits.append((time.perf_counter(), future))
+            await telegram.push_update(update)
+            if interval:
+                await asyncio.sleep(interval)
+
+    done, pending = await asyncio.wait([future for _, future in waits], timeout=args.timeout)
+    for future in pending:
+        future.cancel()
+
+    latencies = [
+        future.result() - sent for sent, future in waits
+        if future.done() and not future.cancelled()
+    ]
+    finished = max((future.result() for future in done), default=time.perf_counter())
+    return latencies, len(pending), finished - started
+
+
+def _report(
+    args: argparse.Namespace,
+    latencies: List[float],
+    timeouts: int,
+    elapsed: float,
+    telegram: FakeTelegramAPI,
+    sheets: FakeSheetsAPI,
+) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "scenario": args.scenario,
+        "sent": args.count,
+        "completed": len(latencies),
+        "timeouts": timeouts,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_second": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+        "telegram": telegram.stats(),
+        "sheets": dict(sheets.calls),
+    }
+    if latencies:
+        report["latency_ms"] = {
+            name: round(_percentile(latencies, share) * 1000, 1)
+            for name, share in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        }
+    return report
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    sheets = FakeSheetsAPI(
+        Scenario(args.users, args.chats, args.density),
+        latency=args.sheets_latency,
+        quota_error_rate=args.sheets_quota_error_rate,
+    )
+    telegram = FakeTelegramAPI(
+        latency=args.tg_latency,
+        jitter=args.tg_jitter,
+        flood_rate=args.tg_flood_rate,
+        retry_after=args.tg_retry_after,
+    )
+    stop_telegram = await _serve(telegram.build_app(), args.host, args.tg_port)
+    stop_sheets = await _serve(sheets.build_app(), args.host, args.sheets_port)
+
+    workdir = Path(tempfile.mkdtemp(prefix="load-"))
+    print(f"Рабочий каталог бота: {workdir} (лог — bot.out)")
+    process = await _start_bot(args, sheets, workdir)
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(telegram.polled.wait(), sheets.loaded.wait()), timeout=args.startup_timeout
+        )
+        # Даём первой синхронизации и фоновым задачам (пул ссылок) отработать
+        await asyncio.sleep(args.settle)
+        print(f"▶ Бот готов, сценарий {args.scenario}: {args.count} событий")
+        latencies, timeouts, elapsed = await _drive(args, telegram, sheets)
+    finally:
+        await _stop_bot(process)
+        await stop_telegram()
+        await stop_sheets()
+
+    return _report(args, latencies, timeouts, elapsed, telegram, sheets)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон бота против фейковых API")
+    parser.add_argument("scenario", choices=["start", "join", "edits"])
+    parser.add_argument("--count", type=int, default=500, help="число событий в волне")
+    parser.add_argument("--rate", type=float, default=0.0, help="событий в секунду (0 — все сразу)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="ожидание завершения волны, сек")
+    parser.add_argument("--users", type=int, default=5000, help="строк в фейковой таблице")
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--density", type=float, default=0.1)
+    parser.add_argument("--chat-index", type=int, default=0, help="чат для join/edits")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tg-port", type=int, default=8090)
+    parser.add_argument("--sheets-port", type=int, default=8091)
+    parser.add_argument("--metrics-port", type=int, default=0)
+    parser.add_argument("--tg-latency", type=float, default=0.02)
+    parser.add_argument("--tg-jitter", type=float, default=0.01)
+    parser.add_argument("--tg-flood-rate", type=float, default=0.0, help="доля ответов 429 от Bot API")
+    parser.add_argument("--tg-retry-after", type=int, default=1)
+    parser.add_argument("--sheets-latency", type=float, default=0.1)
+    parser.add_argument("--sheets-quota-error-rate", type=float, default=0.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--settle", type=float, default=3.0)
+    parser.add_argument("--output", type=Path, help="сохранить отчёт в JSON")
+    args = parser.parse_args()
+
+    if args.chat_index >= args.chats:
+        parser.error("--chat-index должен быть меньше --chats")
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    with suppress(KeyboardInterrupt):
+        main()